@@ -0,0 +1,231 @@
+"""Admission control for parse requests.
+
+Each request gets a cost estimate (peak bytes) from its upload size and page count
+and waits in one of two priority lanes. Interactive single-file imports are served
+first, bulk work gets a guaranteed share of slots, and within a lane users are
+served round-robin so one large import cannot starve everyone else. Requests are
+shed with `Overloaded` when a lane's queue is full, the memory budget is spent or
+they wait too long.
+"""
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from .env import env_float
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+_PDF_PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+_BYTES_PER_PAGE_GUESS = 50 * 1024
+_MB = 1024 * 1024
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of queued."""
+
+    code = "OVERLOADED"
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_page_count(content: bytes) -> int:
+    """Count page objects in a PDF; falls back to a size-based guess for other files."""
+    if content[:5] == b"%PDF-":
+        pages = len(_PDF_PAGE_PATTERN.findall(content))
+        if pages:
+            return pages
+    return max(1, math.ceil(len(content) / _BYTES_PER_PAGE_GUESS))
+
+
+def estimate_cost(content: bytes, page_count: Optional[int] = None) -> int:
+    """Estimated peak memory of parsing `content`, in bytes."""
+    if page_count is None:
+        page_count = estimate_page_count(content)
+    page_cost = env_float("ADMISSION_PAGE_COST_MB", 4.0) * _MB
+    return int(len(content) * 3 + page_count * page_cost)
+
+
+def choose_lane(requested: Optional[str], file_count: int = 1, page_count: int = 1) -> str:
+    """Honour an explicit lane, otherwise treat multi-file or long uploads as bulk."""
+    value = (requested or "").strip().lower()
+    if value in LANES:
+        return value
+    if file_count > 1 or page_count > env_float("ADMISSION_BULK_PAGE_THRESHOLD", 50):
+        return BULK
+    return INTERACTIVE
+
+
+class _Ticket:
+    __slots__ = ("user", "lane", "cost", "granted")
+
+    def __init__(self, user: str, lane: str, cost: int):
+        self.user = user
+        self.lane = lane
+        self.cost = cost
+        self.granted = False
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        memory_budget: Optional[int] = None,
+        max_queue: Optional[dict] = None,
+        queue_timeout: Optional[float] = None,
+        interactive_burst: Optional[int] = None,
+    ):
+        self.concurrency = concurrency or int(
+            env_float("PARSE_CONCURRENCY", os.cpu_count() or 2)
+        )
+        self.memory_budget = memory_budget or int(
+            env_float("PARSE_MEMORY_BUDGET_MB", 1024) * _MB
+        )
+        self.max_queue = max_queue or {
+            INTERACTIVE: int(env_float("ADMISSION_MAX_QUEUE_INTERACTIVE", 32)),
+            BULK: int(env_float("ADMISSION_MAX_QUEUE_BULK", 64)),
+        }
+        self.queue_timeout = (
+            queue_timeout
+            if queue_timeout is not None
+            else env_float("ADMISSION_QUEUE_TIMEOUT_SECONDS", 30)
+        )
+        # Interactive tickets dispatched in a row before a waiting bulk ticket gets a slot
+        self.interactive_burst = interactive_burst or int(
+            env_float("ADMISSION_INTERACTIVE_BURST", 4)
+        )
+
+        self._condition = threading.Condition()
+        self._queues: dict[str, OrderedDict] = {lane: OrderedDict() for lane in LANES}
+        self._depth = {lane: 0 for lane in LANES}
+        self._running = 0
+        self._reserved = 0
+        self._interactive_streak = 0
+        self._average_seconds = 1.0
+        self._admitted = {lane: 0 for lane in LANES}
+        self._shed = {lane: {"queue": 0, "memory": 0, "timeout": 0} for lane in LANES}
+
+    @contextmanager
+    def admit(self, user: str, lane: str, cost: int) -> Iterator[None]:
+        """Hold a parse slot for the duration of the block, queueing fairly for it."""
+        ticket = self._enqueue(user or "anonymous", lane if lane in LANES else BULK, cost)
+        self._wait(ticket)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(ticket, time.monotonic() - started)
+
+    def retry_after(self, lane: str) -> int:
+        with self._condition:
+            return self._retry_after(lane)
+
+    def metrics(self) -> dict:
+        with self._condition:
+            return {
+                "running": self._running,
+                "concurrency": self.concurrency,
+                "reservedBytes": self._reserved,
+                "memoryBudgetBytes": self.memory_budget,
+                "queueDepth": dict(self._depth),
+                "maxQueueDepth": dict(self.max_queue),
+                "admitted": dict(self._admitted),
+                "shed": {lane: dict(counts) for lane, counts in self._shed.items()},
+                "averageParseSeconds": round(self._average_seconds, 3),
+            }
+
+    def _retry_after(self, lane: str) -> int:
+        waiting = self._depth[lane] + (self._depth[INTERACTIVE] if lane == BULK else 0)
+        estimate = self._average_seconds * (waiting + 1) / self.concurrency
+        return int(min(max(math.ceil(estimate), 1), 60))
+
+    def _shed_request(self, lane: str, reason: str, message: str):
+        self._shed[lane][reason] += 1
+        raise Overloaded(message, self._retry_after(lane))
+
+    def _enqueue(self, user: str, lane: str, cost: int) -> _Ticket:
+        with self._condition:
+            if self._depth[lane] >= self.max_queue[lane]:
+                self._shed_request(lane, "queue", f"The {lane} parse queue is full")
+            # An oversized request is still let through when nothing else is reserved
+            if self._reserved and self._reserved + cost > self.memory_budget:
+                self._shed_request(lane, "memory", "Parse memory budget exceeded")
+
+            ticket = _Ticket(user, lane, cost)
+            self._queues[lane].setdefault(user, deque()).append(ticket)
+            self._depth[lane] += 1
+            self._reserved += cost
+            self._dispatch()
+            return ticket
+
+    def _wait(self, ticket: _Ticket):
+        deadline = time.monotonic() + self.queue_timeout
+        with self._condition:
+            while not ticket.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._remove(ticket)
+                    self._reserved -= ticket.cost
+                    self._shed_request(
+                        ticket.lane, "timeout", "Timed out waiting for a parse slot"
+                    )
+                self._condition.wait(remaining)
+            self._admitted[ticket.lane] += 1
+
+    def _release(self, ticket: _Ticket, elapsed: float):
+        with self._condition:
+            self._running -= 1
+            self._reserved -= ticket.cost
+            self._average_seconds = 0.8 * self._average_seconds + 0.2 * elapsed
+            self._dispatch()
+
+    def _remove(self, ticket: _Ticket):
+        queue = self._queues[ticket.lane].get(ticket.user)
+        if queue is not None and ticket in queue:
+            queue.remove(ticket)
+            self._depth[ticket.lane] -= 1
+            if not queue:
+                del self._queues[ticket.lane][ticket.user]
+
+    def _next_lane(self) -> Optional[str]:
+        if self._depth[INTERACTIVE] and (
+            not self._depth[BULK] or self._interactive_streak < self.interactive_burst
+        ):
+            self._interactive_streak += 1
+            return INTERACTIVE
+        if self._depth[BULK]:
+            self._interactive_streak = 0
+            return BULK
+        return None
+
+    def _dispatch(self):
+        """Grant free slots, picking lanes by priority and users round-robin (lock held)."""
+        granted = False
+        while self._running < self.concurrency:
+            lane = self._next_lane()
+            if lane is None:
+                break
+            users = self._queues[lane]
+            user, queue = next(iter(users.items()))
+            ticket = queue.popleft()
+            if queue:
+                users.move_to_end(user)
+            else:
+                del users[user]
+            self._depth[lane] -= 1
+            self._running += 1
+            ticket.granted = True
+            granted = True
+        if granted:
+            self._condition.notify_all()
+
+
+controller = AdmissionController()
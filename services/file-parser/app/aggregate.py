@@ -0,0 +1,195 @@
+"""Vectorized analytics rollups over a columnar transaction batch.
+
+The batch is loaded straight from its columns into a DataFrame of integer cents,
+and monthly, category and account totals, per-account running balances and top
+merchants are computed as pandas group-bys. Outflows are reduced by reimbursement
+allocations the same way the analytics routes do. Results are cached by a hash of
+the request body, so repeated dashboard loads over the same history are free.
+"""
+import re
+from typing import Callable, Optional
+
+import pandas as pd
+
+from .merchants import merchant_key
+from .money import from_cents, to_cents
+from .result_cache import ResultCache
+
+UNCATEGORIZED = "uncategorized"
+UNKNOWN_ACCOUNT = "unknown"
+
+_ACCOUNT_FIELDS = ("accountId", "accountIdentifier", "accountNumber")
+# A UTC offset after a time of day; dropping it keeps the statement's local date
+_OFFSET_PATTERN = re.compile(
+    r"(\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?)\s*(?:Z|UTC|[+-]\d{2}:?\d{2})$", re.I
+)
+
+
+def _column(columnar: dict, name: str) -> Optional[list]:
+    count = int(columnar.get("count") or 0)
+    columns = columnar.get("columns") or {}
+    if name in columns:
+        return columns[name]
+    fields = (columnar.get("header") or {}).get("fields") or {}
+    if name in fields:
+        return [fields[name]] * count
+    return None
+
+
+def _first_column(columnar: dict, names: tuple, default) -> list:
+    count = int(columnar.get("count") or 0)
+    merged = [None] * count
+    for name in names:
+        values = _column(columnar, name)
+        if values is None:
+            continue
+        merged = [current or value for current, value in zip(merged, values)]
+    return [value or default for value in merged]
+
+
+def _cents_column(values: Optional[list], count: int) -> list[int]:
+    if values is None:
+        return [0] * count
+    return [max(to_cents(value) or 0, 0) for value in values]
+
+
+def _reimbursed_cents(linkage) -> int:
+    if not isinstance(linkage, dict):
+        return 0
+    allocations = linkage.get("reimbursedByAllocations")
+    if not isinstance(allocations, list):
+        return 0
+    return sum(
+        max(to_cents(item.get("amount")) or 0, 0)
+        for item in allocations
+        if isinstance(item, dict)
+    )
+
+
+def _local_date_text(value):
+    if not isinstance(value, str):
+        return value
+    return _OFFSET_PATTERN.sub(r"\1", value.strip())
+
+
+def frame_from_columnar(columnar: dict) -> pd.DataFrame:
+    """One row per transaction with date, month, in/out cents, category, account, merchant."""
+    count = int(columnar.get("count") or 0)
+    raw_dates = _column(columnar, "date") or [None] * count
+    dates = pd.to_datetime(
+        pd.Series([_local_date_text(value) for value in raw_dates], dtype="object"),
+        errors="coerce",
+        format="mixed",
+        utc=True,
+    )
+
+    amount_out = _cents_column(_column(columnar, "amountOut"), count)
+    linkage = _column(columnar, "linkage")
+    if linkage is not None:
+        amount_out = [
+            max(out - _reimbursed_cents(link), 0) for out, link in zip(amount_out, linkage)
+        ]
+
+    merchants = _column(columnar, "merchantKey")
+    if merchants is None:
+        descriptions = _column(columnar, "description") or [""] * count
+        merchants = [merchant_key(str(value or "")) for value in descriptions]
+
+    frame = pd.DataFrame(
+        {
+            "date": dates,
+            "in": pd.Series(_cents_column(_column(columnar, "amountIn"), count), dtype="int64"),
+            "out": pd.Series(amount_out, dtype="int64"),
+            "category": _first_column(columnar, ("categoryId",), UNCATEGORIZED),
+            "account": [str(value) for value in _first_column(columnar, _ACCOUNT_FIELDS, UNKNOWN_ACCOUNT)],
+            "merchant": merchants,
+        }
+    )
+    frame = frame[frame["date"].notna()].reset_index(drop=True)
+    frame["day"] = frame["date"].dt.strftime("%Y-%m-%d")
+    frame["month"] = frame["date"].dt.strftime("%Y-%m")
+    frame["net"] = frame["in"] - frame["out"]
+    return frame
+
+
+def _totals_records(grouped: pd.DataFrame, key: str) -> list[dict]:
+    return [
+        {
+            key: index,
+            "totalIn": from_cents(int(row["in"])),
+            "totalOut": from_cents(int(row["out"])),
+            "net": from_cents(int(row["in"]) - int(row["out"])),
+            "count": int(row["count"]),
+        }
+        for index, row in grouped.iterrows()
+    ]
+
+
+def _rollup(frame: pd.DataFrame, by: str) -> pd.DataFrame:
+    return frame.groupby(by, sort=True).agg(
+        **{"in": ("in", "sum"), "out": ("out", "sum"), "count": ("in", "size")}
+    )
+
+
+def _running_balances(frame: pd.DataFrame, opening_balances: dict) -> dict:
+    daily = frame.groupby(["account", "day"], sort=True)["net"].sum().reset_index()
+    daily["balance"] = daily.groupby("account")["net"].cumsum()
+    opening = {account: to_cents(value) or 0 for account, value in opening_balances.items()}
+    daily["balance"] += daily["account"].map(opening).fillna(0).astype("int64")
+
+    balances: dict[str, list] = {}
+    for account, rows in daily.groupby("account", sort=True):
+        balances[account] = [
+            {"date": day, "net": from_cents(int(net)), "balance": from_cents(int(balance))}
+            for day, net, balance in zip(rows["day"], rows["net"], rows["balance"])
+        ]
+    return balances
+
+
+def aggregate(columnar: dict, top_merchants: int = 10, opening_balances: Optional[dict] = None) -> dict:
+    """Monthly, category and account rollups, running balances and top merchants."""
+    frame = frame_from_columnar(columnar)
+    if frame.empty:
+        return {
+            "totals": {"totalIn": 0.0, "totalOut": 0.0, "net": 0.0, "count": 0},
+            "monthly": [],
+            "categories": [],
+            "accounts": [],
+            "runningBalances": {},
+            "topMerchants": [],
+        }
+
+    categories = _rollup(frame, "category").sort_values("out", ascending=False, kind="stable")
+    merchants = (
+        frame[frame["out"] > 0]
+        .groupby("merchant", sort=True)
+        .agg(out=("out", "sum"), count=("out", "size"))
+        .sort_values(["out", "count"], ascending=False, kind="stable")
+        .head(max(top_merchants, 0))
+    )
+    total_in, total_out = int(frame["in"].sum()), int(frame["out"].sum())
+
+    return {
+        "totals": {
+            "totalIn": from_cents(total_in),
+            "totalOut": from_cents(total_out),
+            "net": from_cents(total_in - total_out),
+            "count": int(len(frame)),
+        },
+        "monthly": _totals_records(_rollup(frame, "month"), "month"),
+        "categories": _totals_records(categories, "categoryId"),
+        "accounts": _totals_records(_rollup(frame, "account"), "account"),
+        "runningBalances": _running_balances(frame, opening_balances or {}),
+        "topMerchants": [
+            {"merchantKey": key, "totalOut": from_cents(int(row["out"])), "count": int(row["count"])}
+            for key, row in merchants.iterrows()
+        ],
+    }
+
+
+_cache = ResultCache("AGGREGATE_CACHE_SIZE", 32)
+
+
+def cached_aggregate(key: str, compute: Callable[[], dict]) -> tuple[dict, bool]:
+    """Return (result, cache hit) for a batch hash, running `compute` on a miss."""
+    return _cache.get_or_compute(key, compute)
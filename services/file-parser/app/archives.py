@@ -0,0 +1,177 @@
+"""Read statement entries out of a ZIP upload without extracting it to disk.
+
+Entries are read one at a time from the in-memory archive. Declared sizes are
+checked against the uncompressed budget before anything is inflated, and the
+bytes actually inflated are counted again while reading, so an archive that lies
+about its sizes is stopped at the budget too. Each entry's parser is picked from
+its content: PDF statements by the issuer or headings on the first page, Revolut CSV
+exports by their header, and anything else CSV by the generic parser.
+"""
+import io
+import os
+import re
+import zipfile
+from typing import Iterator, Optional
+
+import pdfplumber
+
+from .compression import max_decompressed_bytes
+from .env import env_int
+
+# Local file header, and the end-of-directory record an empty archive starts with
+ZIP_MAGICS = (b"PK\x03\x04", b"PK\x05\x06")
+
+_READ_CHUNK = 1024 * 1024
+
+# First-page wording checked in order: (issuer names, headings its parser keys on).
+# Issuer names are only looked for in the header above the first heading or dated
+# row, because transaction rows name wallets ("TOP-UP TO PAYLAH!"). The consolidated
+# DBS/POSB check goes last because PayLah statements mention DBS too.
+_PDF_MARKERS = (
+    ("dbs_paylah_statement", re.compile(r"paylah"), re.compile(r"^new transactions$", re.M)),
+    ("youtrip_statement", re.compile(r"youtrip"), re.compile(r"^my [a-z]{3} statement$", re.M)),
+    (
+        "revolut_statement",
+        re.compile(r"revolut"),
+        re.compile(r"^date description money out money in balance$", re.M),
+    ),
+    ("ocbc_frank_statement", re.compile(r"\bocbc\b|\bfrank\b"), re.compile(r"^balance b/f\b", re.M)),
+    (
+        "dbs_posb_consolidated",
+        re.compile(r"\bposb\b|\bdbs\b"),
+        re.compile(r"^balance brought forward\b", re.M),
+    ),
+)
+_HEADER_MAX_LINES = 15
+_ROW_START_PATTERN = re.compile(r"^\d{1,2}[\s/]")
+_REVOLUT_CSV_COLUMNS = ("started date", "completed date")
+
+
+class ArchiveTooLarge(ValueError):
+    """Raised when an archive inflates past its uncompressed budget or entry limit."""
+
+    code = "ARCHIVE_TOO_LARGE"
+
+
+def max_archive_bytes() -> int:
+    return env_int("MAX_ARCHIVE_UNCOMPRESSED_BYTES", max_decompressed_bytes())
+
+
+def max_archive_entries() -> int:
+    return env_int("MAX_ARCHIVE_ENTRIES", 200)
+
+
+def archive_workers() -> int:
+    return max(env_int("ARCHIVE_PARSE_WORKERS", min(os.cpu_count() or 2, 4)), 1)
+
+
+def is_zip(content: bytes) -> bool:
+    return content[:4] in ZIP_MAGICS
+
+
+def _is_statement_entry(info: zipfile.ZipInfo) -> bool:
+    base = info.filename.rsplit("/", 1)[-1]
+    if info.is_dir() or info.filename.startswith("__MACOSX/"):
+        return False
+    return bool(base) and not base.startswith(".")
+
+
+def _read_entry(archive: zipfile.ZipFile, info: zipfile.ZipInfo, budget: int) -> bytes:
+    chunks = []
+    size = 0
+    with archive.open(info) as stream:
+        while True:
+            chunk = stream.read(min(_READ_CHUNK, budget - size + 1))
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > budget:
+                raise ArchiveTooLarge(
+                    f"Archive inflates past {max_archive_bytes()} bytes"
+                )
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _entries(archive: zipfile.ZipFile, entries: list, limit: int) -> Iterator[tuple[str, bytes]]:
+    remaining = limit
+    with archive:
+        for info in entries:
+            try:
+                data = _read_entry(archive, info, remaining)
+            except (zipfile.BadZipFile, RuntimeError, NotImplementedError) as e:
+                # Corrupt, encrypted or unsupported entries; keep the rest of the archive
+                print(f"Skipping archive entry {info.filename}: {e}")
+                continue
+            remaining -= len(data)
+            yield info.filename, data
+
+
+def iter_entries(content: bytes) -> Iterator[tuple[str, bytes]]:
+    """Return a lazy (name, bytes) iterator over the archive's statement entries.
+
+    The entry count and declared sizes are checked here, before anything is inflated;
+    the iterator raises ArchiveTooLarge if the inflated bytes pass the budget anyway.
+    """
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(content))
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Not a readable ZIP archive: {e}") from e
+
+    entries = [info for info in archive.infolist() if _is_statement_entry(info)]
+    limit = max_archive_bytes()
+    if len(entries) > max_archive_entries():
+        archive.close()
+        raise ArchiveTooLarge(
+            f"Archive has {len(entries)} entries; the limit is {max_archive_entries()}"
+        )
+    if sum(info.file_size for info in entries) > limit:
+        archive.close()
+        raise ArchiveTooLarge(f"Archive declares more than {limit} uncompressed bytes")
+    return _entries(archive, entries, limit)
+
+
+def _first_page_text(content: bytes) -> str:
+    with pdfplumber.open(io.BytesIO(content)) as pdf:
+        if not pdf.pages:
+            return ""
+        return pdf.pages[0].extract_text() or ""
+
+
+def _header_text(text: str) -> str:
+    """First-page lines above the first heading or dated row."""
+    header = []
+    for line in text.split("\n")[:_HEADER_MAX_LINES]:
+        line = line.strip()
+        if _ROW_START_PATTERN.match(line) or any(
+            heading_pattern.match(line) for _, _, heading_pattern in _PDF_MARKERS
+        ):
+            break
+        header.append(line)
+    return "\n".join(header)
+
+
+def detect_parser(filename: str, content: bytes, default: Optional[str] = None) -> Optional[str]:
+    """Pick a parser id for one archive entry, falling back to `default`."""
+    if content.lstrip().startswith(b"%PDF"):
+        try:
+            text = _first_page_text(content).lower()
+        except Exception as e:
+            print(f"Could not read first page of {filename}: {e}")
+            return default
+        header = _header_text(text)
+        for parser_id, issuer_pattern, _ in _PDF_MARKERS:
+            if issuer_pattern.search(header):
+                return parser_id
+        for parser_id, _, heading_pattern in _PDF_MARKERS:
+            if heading_pattern.search(text):
+                return parser_id
+        return default
+
+    text = content[:4096].decode("utf-8", errors="ignore").lstrip("\ufeff")
+    header = text.split("\n", 1)[0].lower()
+    if all(column in header for column in _REVOLUT_CSV_COLUMNS):
+        return "revolut_statement"
+    if filename.lower().endswith(".csv") or "," in header:
+        return default or "generic_csv"
+    return default
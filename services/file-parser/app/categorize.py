@@ -0,0 +1,185 @@
+"""Import-rule categorization for a whole parsed batch.
+
+A user's `description_contains` rules are compiled into one Aho-Corasick automaton
+per case-sensitivity class, so each description is scanned once per class no
+matter how many rules there are. Compiled rule sets are cached by a hash of their
+rule fields. Rules are applied with the same precedence as the import flow: rules
+run in the order given, the first label and category win, and a rule that marks a
+row internal stops later rules from setting a category.
+"""
+import hashlib
+import json
+from collections import deque
+from typing import Iterable, Optional
+
+from .result_cache import ResultCache
+
+_RULE_FIELDS = (
+    "id",
+    "name",
+    "parserId",
+    "matchType",
+    "matchValue",
+    "caseSensitive",
+    "enabled",
+    "setLabel",
+    "setCategoryName",
+    "markInternal",
+)
+
+
+class _Automaton:
+    """Aho-Corasick automaton mapping each needle to the rule indices that use it."""
+
+    __slots__ = ("_goto", "_fail", "_outputs")
+
+    def __init__(self, needles: Iterable[tuple[str, int]]):
+        self._goto: list[dict] = [{}]
+        outputs: list[list] = [[]]
+        for needle, rule_index in needles:
+            state = 0
+            for char in needle:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(rule_index)
+
+        # Breadth-first failure links; each state also reports its suffix matches
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                outputs[next_state].extend(outputs[self._fail[next_state]])
+                queue.append(next_state)
+        self._outputs = [tuple(sorted(set(found))) for found in outputs]
+
+    def matches(self, text: str) -> set[int]:
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+
+class CompiledRules:
+    """Enabled rules in order plus one automaton per case-sensitivity class."""
+
+    def __init__(self, rules: list[dict]):
+        self.rules = [rule for rule in rules if rule.get("enabled", True)]
+        self.always = []
+        sensitive, insensitive = [], []
+        for index, rule in enumerate(self.rules):
+            match_type = rule.get("matchType") or "description_contains"
+            if match_type == "always":
+                self.always.append(index)
+            elif match_type == "description_contains":
+                needle = str(rule.get("matchValue") or "").strip()
+                if not needle:
+                    continue
+                if rule.get("caseSensitive"):
+                    sensitive.append((needle, index))
+                else:
+                    insensitive.append((needle.lower(), index))
+        self._sensitive = _Automaton(sensitive) if sensitive else None
+        self._insensitive = _Automaton(insensitive) if insensitive else None
+
+    def matching_rules(self, description: str) -> list[int]:
+        """Indices of rules matching `description`, in rule order."""
+        found = set(self.always)
+        if self._sensitive is not None:
+            found |= self._sensitive.matches(description)
+        if self._insensitive is not None:
+            found |= self._insensitive.matches(description.lower())
+        return sorted(found)
+
+
+def rule_set_hash(rules: list[dict]) -> str:
+    canonical = [
+        {field: rule.get(field) for field in _RULE_FIELDS if field in rule}
+        for rule in rules
+        if isinstance(rule, dict)
+    ]
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+_cache = ResultCache("CATEGORIZE_CACHE_SIZE", 64)
+
+
+def compile_rules(rules: list[dict]) -> tuple[CompiledRules, str, bool]:
+    """Return (compiled rules, rule-set hash, cache hit), compiling on a miss."""
+    key = rule_set_hash(rules)
+    compiled, cached = _cache.get_or_compute(
+        key, lambda: CompiledRules([rule for rule in rules if isinstance(rule, dict)])
+    )
+    return compiled, key, cached
+
+
+def _has_text(value) -> bool:
+    return bool(str(value or "").strip())
+
+
+def _suggest(compiled: CompiledRules, transaction: dict, parser_id: Optional[str]) -> dict:
+    linkage = transaction.get("linkage") if isinstance(transaction.get("linkage"), dict) else None
+    label = None
+    category_name = None
+    mark_internal = False
+    matched = []
+
+    for index in compiled.matching_rules(str(transaction.get("description") or "")):
+        rule = compiled.rules[index]
+        rule_parser_id = str(rule.get("parserId") or "").strip()
+        if rule_parser_id and rule_parser_id != parser_id:
+            continue
+        matched.append(rule.get("id", index))
+
+        if rule.get("markInternal") and linkage is None and not mark_internal:
+            mark_internal = True
+            linkage = {"type": "internal"}
+
+        if (
+            rule.get("setLabel")
+            and label is None
+            and not _has_text(transaction.get("label"))
+        ):
+            label = rule["setLabel"]
+
+        if (
+            rule.get("setCategoryName")
+            and category_name is None
+            and not transaction.get("categoryId")
+            and (linkage is None or linkage.get("type") == "reimbursed")
+        ):
+            category_name = rule["setCategoryName"]
+
+    return {
+        "categoryName": category_name,
+        "label": label,
+        "markInternal": mark_internal,
+        "matchedRuleIds": matched,
+    }
+
+
+def categorize(transactions: list, rules: list, parser_id: Optional[str] = None) -> dict:
+    """Suggest a category, label and internal marking for every transaction."""
+    compiled, key, cached = compile_rules(rules)
+    parser_id = str(parser_id or "").strip() or None
+    suggestions = [
+        _suggest(compiled, transaction if isinstance(transaction, dict) else {}, parser_id)
+        for transaction in transactions
+    ]
+    return {"suggestions": suggestions, "ruleSetHash": key, "cached": cached}
@@ -0,0 +1,332 @@
+"""Offline bulk parsing for backfills: `python -m app.cli parse <dir>`.
+
+Each file under the directory is parsed in its own worker process, --workers at a
+time, with the parser given by --parser-id or the one detected from its content.
+Workers run under the same deadline and budgets as /parse, so a file stuck inside
+pdfminer is killed instead of hanging the run. Every finished file becomes one
+output line, either the /parse rows or their columnar layout. Files that parsed
+are appended to a checkpoint file, so a resumed run skips them and retries the
+ones that failed. A summary with page and row throughput, failures per parser and
+the slowest files goes to stderr.
+
+`python -m app.cli compare-backends <dir>` parses each PDF with both extraction
+backends and lists the files whose rows differ, before a parser is moved to the
+pdfium text backend.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, Iterator, Optional
+
+from . import admission, compression, extraction
+from .archives import detect_parser
+from .columnar import to_columnar
+from .deadlines import ParseCancelled, ParseTimeout
+from .dedupe import attach_fingerprints
+from .merchants import attach_merchant_keys
+from .parsers import PARSER_MAP, run_parser
+from .workers import (
+    ParseBudgetExceeded,
+    WorkerCrashed,
+    isolation_mode,
+    parse_timeout_seconds,
+    run_isolated,
+)
+
+STATEMENT_SUFFIXES = (".pdf", ".csv")
+COMPRESSED_SUFFIXES = ("", ".gz", ".zst")
+OUTPUT_FORMATS = ("ndjson", "columnar")
+
+
+def find_statements(root: str) -> list[str]:
+    """Statement files under `root`, as sorted paths relative to it."""
+    suffixes = tuple(
+        statement + compressed
+        for statement in STATEMENT_SUFFIXES
+        for compressed in COMPRESSED_SUFFIXES
+    )
+    found = []
+    for directory, subdirectories, filenames in os.walk(root):
+        subdirectories[:] = [name for name in subdirectories if not name.startswith(".")]
+        for filename in filenames:
+            if filename.startswith(".") or not filename.lower().endswith(suffixes):
+                continue
+            found.append(os.path.relpath(os.path.join(directory, filename), root))
+    return sorted(found)
+
+
+def read_checkpoint(path: Optional[str]) -> set[str]:
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as handle:
+        return {line.rstrip("\n") for line in handle if line.strip()}
+
+
+def parse_file(task: tuple) -> dict:
+    """Parse one file; returns its output record, never raises."""
+    root, path, parser_id, _, verbose = task
+    started = time.perf_counter()
+    record = {"path": path, "parserId": parser_id}
+    try:
+        with open(os.path.join(root, path), "rb") as handle:
+            content = compression.maybe_decompress(handle.read())
+        record["pages"] = admission.estimate_page_count(content)
+
+        with contextlib.ExitStack() as stack:
+            # Parser progress prints would interleave with output written to stdout
+            log = sys.stderr if verbose else stack.enter_context(open(os.devnull, "w"))
+            stack.enter_context(contextlib.redirect_stdout(log))
+            parser_id = parser_id or detect_parser(path, content)
+            record["parserId"] = parser_id
+            if parser_id not in PARSER_MAP:
+                raise ValueError("Could not detect a parser for this file")
+            transactions, reconciliation = run_parser(parser_id, content)
+
+        attach_fingerprints(transactions)
+        attach_merchant_keys(transactions)
+        record.update(
+            {
+                "success": True,
+                "count": len(transactions),
+                "reconciliation": reconciliation,
+                "transactions": transactions,
+            }
+        )
+    except Exception as e:
+        record.update({"success": False, "count": 0, "error": f"{type(e).__name__}: {e}"})
+        if getattr(e, "code", None):
+            record["code"] = e.code
+    record["seconds"] = round(time.perf_counter() - started, 4)
+    return record
+
+
+def _isolated_parse_file(task: tuple) -> dict:
+    """Run `parse_file` in a killable worker; returns its output record, never raises."""
+    _, path, parser_id, timeout, _ = task
+    started = time.perf_counter()
+    try:
+        return run_isolated(parse_file, (task,), timeout=timeout, label=parser_id or "cli")
+    except (ParseTimeout, ParseCancelled, ParseBudgetExceeded, WorkerCrashed) as e:
+        return {
+            "path": path,
+            "parserId": parser_id,
+            "success": False,
+            "count": 0,
+            "error": f"{type(e).__name__}: {e}",
+            "code": e.code,
+            "seconds": round(time.perf_counter() - started, 4),
+        }
+
+
+def _results(tasks: list[tuple], workers: int) -> Iterator[dict]:
+    # Inline parses share the process, and parse_file redirects its stdout
+    if workers <= 1 or len(tasks) <= 1 or isolation_mode() != "process":
+        for task in tasks:
+            yield _isolated_parse_file(task)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_isolated_parse_file, task) for task in tasks]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def _output_line(record: dict, output_format: str) -> str:
+    if output_format == "columnar" and record["success"]:
+        record = {**record, "columnar": to_columnar(record.pop("transactions"))}
+    return json.dumps(record, default=str) + "\n"
+
+
+def summarize(records: Iterable[dict], elapsed: float, skipped: int = 0, slowest: int = 10) -> dict:
+    """Throughput, failures per parser and the slowest files of a run."""
+    records = list(records)
+    pages = sum(record.get("pages") or 0 for record in records if record["success"])
+    rows = sum(record["count"] for record in records)
+    failures: dict[str, int] = {}
+    for record in records:
+        if not record["success"]:
+            key = record.get("parserId") or "undetected"
+            failures[key] = failures.get(key, 0) + 1
+    ranked = sorted(records, key=lambda record: record["seconds"], reverse=True)
+    return {
+        "files": len(records),
+        "parsed": sum(1 for record in records if record["success"]),
+        "failed": sum(failures.values()),
+        "skipped": skipped,
+        "pages": pages,
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "pagesPerSecond": round(pages / elapsed, 2) if elapsed > 0 else 0.0,
+        "rowsPerSecond": round(rows / elapsed, 2) if elapsed > 0 else 0.0,
+        "failuresByParser": dict(sorted(failures.items())),
+        "slowest": [
+            {
+                "path": record["path"],
+                "parserId": record.get("parserId"),
+                "pages": record.get("pages"),
+                "seconds": record["seconds"],
+            }
+            for record in ranked[: max(slowest, 0)]
+        ],
+    }
+
+
+def _print_summary(summary: dict):
+    out = sys.stderr
+    print(
+        f"Parsed {summary['parsed']}/{summary['files']} files "
+        f"({summary['skipped']} skipped from checkpoint) in {summary['seconds']}s",
+        file=out,
+    )
+    print(
+        f"Throughput: {summary['pagesPerSecond']} pages/s, {summary['rowsPerSecond']} rows/s "
+        f"({summary['pages']} pages, {summary['rows']} rows)",
+        file=out,
+    )
+    for parser_id, count in summary["failuresByParser"].items():
+        print(f"Failures for {parser_id}: {count}", file=out)
+    if summary["slowest"]:
+        print("Slowest files:", file=out)
+        for item in summary["slowest"]:
+            print(f"  {item['seconds']:>8.3f}s  {item['pages'] or '?':>4} pages  {item['path']}", file=out)
+
+
+def run_parse(args: argparse.Namespace) -> int:
+    if args.parser_id and args.parser_id not in PARSER_MAP:
+        print(f"Unknown parser: {args.parser_id}", file=sys.stderr)
+        return 2
+    checkpoint = args.checkpoint or (f"{args.output}.checkpoint" if args.output else None)
+    if args.resume and checkpoint is None:
+        print("--resume needs -o or --checkpoint to know which files are done", file=sys.stderr)
+        return 2
+    done = read_checkpoint(checkpoint) if args.resume else set()
+    paths = find_statements(args.directory)
+    pending = [path for path in paths if path not in done]
+    timeout = args.timeout if args.timeout is not None else parse_timeout_seconds()
+    tasks = [
+        (args.directory, path, args.parser_id, timeout, args.verbose) for path in pending
+    ]
+
+    mode = "a" if args.resume else "w"
+    output = open(args.output, mode, encoding="utf-8") if args.output else sys.stdout
+    progress = open(checkpoint, mode, encoding="utf-8") if checkpoint else None
+    records = []
+    started = time.perf_counter()
+    try:
+        for record in _results(tasks, args.workers):
+            output.write(_output_line(dict(record), args.format))
+            output.flush()
+            if progress is not None and record["success"]:
+                progress.write(record["path"] + "\n")
+                progress.flush()
+            record.pop("transactions", None)
+            records.append(record)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if progress is not None:
+            progress.close()
+
+    summary = summarize(
+        records, time.perf_counter() - started, len(paths) - len(pending), args.slowest
+    )
+    _print_summary(summary)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as handle:
+            json.dump(summary, handle, indent=2)
+    return 1 if summary["failed"] else 0
+
+
+def compare_file(root: str, path: str, parser_id: Optional[str]) -> dict:
+    """Parse one PDF on each extraction backend; never raises."""
+    record = {"path": path, "parserId": parser_id}
+    try:
+        with open(os.path.join(root, path), "rb") as handle:
+            content = compression.maybe_decompress(handle.read())
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            parser_id = parser_id or detect_parser(path, content)
+            record["parserId"] = parser_id
+            if parser_id not in PARSER_MAP:
+                raise ValueError("Could not detect a parser for this file")
+            outputs = extraction.parse_on_each_backend(PARSER_MAP[parser_id], content)
+    except Exception as e:
+        record.update({"identical": False, "error": f"{type(e).__name__}: {e}"})
+        return record
+
+    reference, candidate = outputs[extraction.PDFPLUMBER], outputs[extraction.PDFIUM]
+    first = next(
+        (index for index, (left, right) in enumerate(zip(reference, candidate)) if left != right),
+        None,
+    )
+    if first is None and len(reference) != len(candidate):
+        first = min(len(reference), len(candidate))
+    record.update(
+        {
+            "identical": first is None,
+            "counts": {backend: len(rows) for backend, rows in outputs.items()},
+        }
+    )
+    if first is not None:
+        record["firstDifference"] = {
+            backend: rows[first] if first < len(rows) else None for backend, rows in outputs.items()
+        }
+    return record
+
+
+def run_compare_backends(args: argparse.Namespace) -> int:
+    if args.parser_id and args.parser_id not in PARSER_MAP:
+        print(f"Unknown parser: {args.parser_id}", file=sys.stderr)
+        return 2
+    paths = [path for path in find_statements(args.directory) if ".pdf" in path.lower()]
+    differing = 0
+    for path in paths:
+        record = compare_file(args.directory, path, args.parser_id)
+        differing += 0 if record["identical"] else 1
+        sys.stdout.write(json.dumps(record, default=str) + "\n")
+    print(f"{len(paths) - differing}/{len(paths)} files identical on both backends", file=sys.stderr)
+    return 1 if differing else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parse = commands.add_parser("parse", help="Parse every statement under a directory")
+    parse.add_argument("directory")
+    parse.add_argument("--parser-id", help="Parser for every file (default: detect per file)")
+    parse.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parse.add_argument("--format", choices=OUTPUT_FORMATS, default="ndjson")
+    parse.add_argument("--output", "-o", help="Output file (default: stdout)")
+    parse.add_argument(
+        "--checkpoint", help="File of finished paths (default: <output>.checkpoint)"
+    )
+    parse.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip files that parsed before, retry failures and append to the output",
+    )
+    parse.add_argument("--timeout", type=float, help="Seconds per file (default: PARSE_TIMEOUT_SECONDS)")
+    parse.add_argument("--slowest", type=int, default=10, help="Slowest files listed in the summary")
+    parse.add_argument("--summary", help="Also write the summary as JSON to this file")
+    parse.add_argument("--verbose", action="store_true", help="Show parser logs on stderr")
+    parse.set_defaults(handler=run_parse)
+
+    compare = commands.add_parser(
+        "compare-backends", help="List PDFs whose rows differ between extraction backends"
+    )
+    compare.add_argument("directory")
+    compare.add_argument("--parser-id", help="Parser for every file (default: detect per file)")
+    compare.set_defaults(handler=run_compare_backends)
+    return parser
+
+
+def main(argv: Optional[list] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
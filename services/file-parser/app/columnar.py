@@ -0,0 +1,236 @@
+"""Columnar encodings for large parse results.
+
+Rows are split into statement-level values (identical on every row, sent once in
+the header), one parallel array per varying top-level field, and a sparse
+index/value map per metadata key that is only present on some rows.
+"""
+import json
+import struct
+from typing import Optional
+
+COLUMNAR_JSON_MIMETYPE = "application/vnd.file-parser.columnar+json"
+COLUMNAR_BINARY_MIMETYPE = "application/vnd.file-parser.columnar"
+COLUMNAR_VERSION = 1
+
+BINARY_MAGIC = b"PFC1"
+
+_MISSING = object()
+
+
+def _is_constant(values: list) -> bool:
+    first = values[0]
+    return first is not _MISSING and all(value == first for value in values)
+
+
+def to_columnar(transactions: list[dict]) -> dict:
+    """Convert /parse rows into the columnar layout."""
+    count = len(transactions)
+    header: dict = {"fields": {}, "metadata": {}}
+    columns: dict[str, list] = {}
+    sparse_metadata: dict[str, dict] = {}
+
+    field_names: list[str] = []
+    metadata_names: list[str] = []
+    for transaction in transactions:
+        for key in transaction:
+            if key != "metadata" and key not in field_names:
+                field_names.append(key)
+        metadata = transaction.get("metadata")
+        if isinstance(metadata, dict):
+            for key in metadata:
+                if key not in metadata_names:
+                    metadata_names.append(key)
+
+    for key in field_names:
+        values = [transaction.get(key, _MISSING) for transaction in transactions]
+        if count and _is_constant(values):
+            header["fields"][key] = values[0]
+        else:
+            columns[key] = [None if value is _MISSING else value for value in values]
+
+    metadata_rows = [
+        transaction.get("metadata") if isinstance(transaction.get("metadata"), dict) else {}
+        for transaction in transactions
+    ]
+    for key in metadata_names:
+        values = [metadata.get(key, _MISSING) for metadata in metadata_rows]
+        if _is_constant(values):
+            header["metadata"][key] = values[0]
+            continue
+        indices = [index for index, value in enumerate(values) if value is not _MISSING]
+        sparse_metadata[key] = {
+            "index": indices,
+            "values": [values[index] for index in indices],
+        }
+
+    return {
+        "format": "columnar",
+        "version": COLUMNAR_VERSION,
+        "count": count,
+        "header": header,
+        "columns": columns,
+        "sparseMetadata": sparse_metadata,
+    }
+
+
+def from_columnar(payload: dict) -> list[dict]:
+    """Rebuild /parse rows from the columnar layout."""
+    count = int(payload.get("count") or 0)
+    header = payload.get("header") or {}
+    columns = payload.get("columns") or {}
+    rows = [dict(header.get("fields") or {}) for _ in range(count)]
+    for key, values in columns.items():
+        for row, value in zip(rows, values):
+            row[key] = value
+    for row in rows:
+        row["metadata"] = dict(header.get("metadata") or {})
+    for key, sparse in (payload.get("sparseMetadata") or {}).items():
+        for index, value in zip(sparse["index"], sparse["values"]):
+            rows[index]["metadata"][key] = value
+    return rows
+
+
+# Binary layout, little-endian:
+#   magic "PFC1" | u32 JSON length | JSON {envelope, header, sparseMetadata, count, columns: [[name, kind], ...]}
+#   then one block per column in the listed order:
+#     kind "i": validity bitmap (ceil(count / 8) bytes) + count x i64
+#     kind "f": validity bitmap + count x f64
+#     kind "s": validity bitmap + (count + 1) x u32 offsets + UTF-8 blob
+#     kind "j": u32 length + JSON array (columns with mixed value types)
+
+
+_INT64_MIN, _INT64_MAX = -(2**63), 2**63 - 1
+
+
+def _column_kind(values: list) -> str:
+    present = [value for value in values if value is not None]
+    # Integer columns such as merchantId stay integers, as they are in the JSON response
+    if all(
+        isinstance(value, int) and not isinstance(value, bool) and _INT64_MIN <= value <= _INT64_MAX
+        for value in present
+    ):
+        return "i"
+    if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+        return "f"
+    if all(isinstance(value, str) for value in present):
+        return "s"
+    return "j"
+
+
+def _validity_bitmap(values: list) -> bytes:
+    bitmap = bytearray((len(values) + 7) // 8)
+    for index, value in enumerate(values):
+        if value is not None:
+            bitmap[index >> 3] |= 1 << (index & 7)
+    return bytes(bitmap)
+
+
+def _is_valid(bitmap: bytes, index: int) -> bool:
+    return bool(bitmap[index >> 3] & (1 << (index & 7)))
+
+
+def encode_binary(columnar: dict, envelope: Optional[dict] = None) -> bytes:
+    count = columnar["count"]
+    column_kinds = [
+        [name, _column_kind(values)] for name, values in columnar["columns"].items()
+    ]
+    preamble = json.dumps(
+        {
+            "envelope": envelope or {},
+            "version": columnar["version"],
+            "count": count,
+            "header": columnar["header"],
+            "sparseMetadata": columnar["sparseMetadata"],
+            "columns": column_kinds,
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+    blocks = [BINARY_MAGIC, struct.pack("<I", len(preamble)), preamble]
+    for name, kind in column_kinds:
+        values = columnar["columns"][name]
+        if kind == "i":
+            blocks.append(_validity_bitmap(values))
+            blocks.append(struct.pack(f"<{count}q", *[value or 0 for value in values]))
+        elif kind == "f":
+            blocks.append(_validity_bitmap(values))
+            blocks.append(
+                struct.pack(f"<{count}d", *[float(value or 0) for value in values])
+            )
+        elif kind == "s":
+            blocks.append(_validity_bitmap(values))
+            encoded = [(value or "").encode("utf-8") for value in values]
+            offsets = [0]
+            for item in encoded:
+                offsets.append(offsets[-1] + len(item))
+            blocks.append(struct.pack(f"<{count + 1}I", *offsets))
+            blocks.append(b"".join(encoded))
+        else:
+            data = json.dumps(values, separators=(",", ":")).encode("utf-8")
+            blocks.append(struct.pack("<I", len(data)))
+            blocks.append(data)
+    return b"".join(blocks)
+
+
+def decode_binary(data: bytes) -> tuple[dict, dict]:
+    """Return (columnar payload, envelope) from the binary encoding."""
+    if data[:4] != BINARY_MAGIC:
+        raise ValueError("Not a columnar binary payload")
+    (preamble_length,) = struct.unpack_from("<I", data, 4)
+    offset = 8 + preamble_length
+    preamble = json.loads(data[8:offset].decode("utf-8"))
+    count = preamble["count"]
+    bitmap_length = (count + 7) // 8
+
+    columns: dict[str, list] = {}
+    for name, kind in preamble["columns"]:
+        if kind in ("i", "f"):
+            bitmap = data[offset : offset + bitmap_length]
+            offset += bitmap_length
+            values = struct.unpack_from(f"<{count}{'q' if kind == 'i' else 'd'}", data, offset)
+            offset += 8 * count
+            columns[name] = [
+                value if _is_valid(bitmap, index) else None
+                for index, value in enumerate(values)
+            ]
+        elif kind == "s":
+            bitmap = data[offset : offset + bitmap_length]
+            offset += bitmap_length
+            offsets = struct.unpack_from(f"<{count + 1}I", data, offset)
+            offset += 4 * (count + 1)
+            blob = data[offset : offset + offsets[-1]]
+            offset += offsets[-1]
+            columns[name] = [
+                blob[offsets[index] : offsets[index + 1]].decode("utf-8")
+                if _is_valid(bitmap, index)
+                else None
+                for index in range(count)
+            ]
+        else:
+            (length,) = struct.unpack_from("<I", data, offset)
+            offset += 4
+            columns[name] = json.loads(data[offset : offset + length].decode("utf-8"))
+            offset += length
+
+    columnar = {
+        "format": "columnar",
+        "version": preamble["version"],
+        "count": count,
+        "header": preamble["header"],
+        "columns": columns,
+        "sparseMetadata": preamble["sparseMetadata"],
+    }
+    return columnar, preamble["envelope"]
+
+
+def negotiate_format(requested: Optional[str], accept_header: Optional[str]) -> str:
+    """Pick "json", "columnar" or "columnar-binary" from ?format= or the Accept header."""
+    value = (requested or "").strip().lower()
+    if value in {"json", "columnar", "columnar-binary"}:
+        return value
+    accept = (accept_header or "").lower()
+    if COLUMNAR_JSON_MIMETYPE in accept:
+        return "columnar"
+    if COLUMNAR_BINARY_MIMETYPE in accept:
+        return "columnar-binary"
+    return "json"
@@ -0,0 +1,186 @@
+"""gzip/zstd negotiation for responses and decompression of uploads."""
+import io
+import json
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from .env import env_int
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip is always available
+    zstandard = None
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+_DECOMPRESS_ERRORS = (zlib.error,) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+
+def min_compress_bytes() -> int:
+    return env_int("COMPRESSION_MIN_BYTES", 1024)
+
+
+def max_decompressed_bytes() -> int:
+    return env_int("MAX_DECOMPRESSED_BYTES", 100 * 1024 * 1024)
+
+
+def compression_level(encoding: str) -> int:
+    default = 3 if encoding == "zstd" else 6
+    return env_int(f"{encoding.upper()}_COMPRESSION_LEVEL", default)
+
+
+def supported_encodings() -> list[str]:
+    return ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+
+def choose_encoding(accept_encodings) -> Optional[str]:
+    """Pick the best encoding from a werkzeug Accept-Encoding header, preferring zstd."""
+    best = None
+    best_quality = 0.0
+    for encoding in supported_encodings():
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=compression_level("zstd")).compress(data)
+    compressor = zlib.compressobj(compression_level("gzip"), zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """Compress a streamed body, flushing after every chunk so clients see rows as they arrive."""
+    if encoding == "zstd":
+        compressor = zstandard.ZstdCompressor(level=compression_level("zstd")).compressobj()
+        for chunk in chunks:
+            data = compressor.compress(_to_bytes(chunk))
+            data += compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            if data:
+                yield data
+        yield compressor.flush()
+        return
+
+    compressor = zlib.compressobj(compression_level("gzip"), zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(_to_bytes(chunk)) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _to_bytes(chunk) -> bytes:
+    return chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+def detect_encoding(data: bytes) -> Optional[str]:
+    if data[:2] == GZIP_MAGIC:
+        return "gzip"
+    if data[:4] == ZSTD_MAGIC:
+        return "zstd"
+    return None
+
+
+def _gunzip(data: bytes, max_length: int) -> bytes:
+    """Inflate every member of a gzip body, stopping once `max_length` bytes are out.
+
+    Concatenated gzip output has one member per file, and a decompressor stops at
+    the end of the first one. Trailing bytes that are not a gzip member are ignored.
+    """
+    output = bytearray()
+    remaining = data
+    while True:
+        decompressor = zlib.decompressobj(47)
+        output += decompressor.decompress(remaining, max_length - len(output))
+        remaining = decompressor.unused_data
+        if len(output) >= max_length or remaining[:2] != GZIP_MAGIC:
+            return bytes(output)
+
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    """Decompress an upload, refusing output larger than MAX_DECOMPRESSED_BYTES."""
+    limit = max_decompressed_bytes()
+    try:
+        if encoding == "zstd":
+            if zstandard is None:
+                raise ValueError("zstd uploads are not supported on this server")
+            reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data))
+            output = reader.read(limit + 1)
+        elif encoding == "gzip":
+            output = _gunzip(data, limit + 1)
+        else:
+            raise ValueError(f"Unsupported content encoding: {encoding}")
+    except _DECOMPRESS_ERRORS as e:
+        raise ValueError(f"Corrupt {encoding} data: {e}") from e
+    if len(output) > limit:
+        raise ValueError("Decompressed upload exceeds the size limit")
+    return output
+
+
+def maybe_decompress(data: bytes) -> bytes:
+    """Transparently unwrap gzip/zstd file uploads such as a gzipped CSV export."""
+    encoding = detect_encoding(data)
+    return decompress(data, encoding) if encoding else data
+
+
+class DecompressRequestMiddleware:
+    """WSGI middleware that unwraps request bodies sent with Content-Encoding gzip/zstd."""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        encoding = (environ.get("HTTP_CONTENT_ENCODING") or "").strip().lower()
+        if encoding and encoding != "identity":
+            try:
+                length = int(environ.get("CONTENT_LENGTH") or 0)
+            except ValueError:
+                length = 0
+            raw = environ["wsgi.input"].read(length) if length else environ["wsgi.input"].read()
+            try:
+                body = decompress(raw, encoding)
+            except ValueError as e:
+                message = json.dumps({"error": f"Invalid compressed request: {str(e)}"})
+                start_response(
+                    "400 BAD REQUEST",
+                    [("Content-Type", "application/json"), ("Content-Length", str(len(message)))],
+                )
+                return [message.encode("utf-8")]
+            environ["wsgi.input"] = io.BytesIO(body)
+            environ["CONTENT_LENGTH"] = str(len(body))
+            environ.pop("HTTP_CONTENT_ENCODING", None)
+        return self.wsgi_app(environ, start_response)
+
+
+def install(app):
+    """Accept compressed request bodies and compress responses for a Flask app."""
+    from flask import request
+
+    app.wsgi_app = DecompressRequestMiddleware(app.wsgi_app)
+
+    @app.after_request
+    def _compress_response(response):
+        if response.status_code < 200 or response.status_code in (204, 304):
+            return response
+        if response.headers.get("Content-Encoding"):
+            return response
+        encoding = choose_encoding(request.accept_encodings)
+        if not encoding:
+            return response
+
+        response.vary.add("Accept-Encoding")
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encoding)
+            response.headers.pop("Content-Length", None)
+            response.headers["Content-Encoding"] = encoding
+            return response
+
+        data = response.get_data()
+        if len(data) < min_compress_bytes():
+            return response
+        response.set_data(compress(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+        return response
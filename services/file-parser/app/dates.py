@@ -0,0 +1,20 @@
+"""Date helpers shared by the row-matching modules."""
+from datetime import date
+from typing import Optional
+
+from dateutil import parser as date_parser
+
+
+def date_ordinal(value) -> Optional[int]:
+    """Day ordinal of an ISO or free-form date, or None when it cannot be parsed."""
+    text = str(value or "").strip()
+    if not text:
+        return None
+    try:
+        return date.fromisoformat(text[:10]).toordinal()
+    except ValueError:
+        pass
+    try:
+        return date_parser.parse(text).date().toordinal()
+    except Exception:
+        return None
@@ -0,0 +1,62 @@
+"""Per-parse deadlines with cooperative cancellation checks."""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+class ParseTimeout(Exception):
+    """Raised when a parse runs past its deadline."""
+
+    code = "PARSE_TIMEOUT"
+
+
+class ParseCancelled(Exception):
+    """Raised when a parse is cancelled, e.g. because the client disconnected."""
+
+    code = "PARSE_CANCELLED"
+
+
+class Deadline:
+    __slots__ = ("expires_at", "cancelled")
+
+    def __init__(self, seconds: Optional[float]):
+        self.expires_at = time.monotonic() + seconds if seconds else None
+        self.cancelled = False
+
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def cancel(self):
+        self.cancelled = True
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("parse_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[Deadline]:
+    """Bound every `check_deadline()` call made inside the block to `seconds` from now."""
+    deadline = Deadline(seconds)
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def check_deadline():
+    """Cancellation point for parser loops; a no-op outside a deadline scope."""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return
+    if deadline.cancelled:
+        raise ParseCancelled("Parse was cancelled")
+    if deadline.expires_at is not None and time.monotonic() > deadline.expires_at:
+        raise ParseTimeout("Parse exceeded its deadline")
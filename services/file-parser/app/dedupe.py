@@ -0,0 +1,233 @@
+"""Stable transaction fingerprints and batch duplicate detection."""
+import re
+from bisect import bisect_left, bisect_right
+from collections import deque
+from datetime import date
+from hashlib import blake2b
+from typing import Optional
+
+from .dates import date_ordinal
+from .money import to_cents
+
+DEFAULT_NEAR_DATE_WINDOW_DAYS = 2
+
+
+def _normalize_account(transaction: dict) -> str:
+    metadata = transaction.get("metadata") if isinstance(transaction.get("metadata"), dict) else {}
+    account = (
+        transaction.get("accountIdentifier")
+        or transaction.get("accountNumber")
+        or metadata.get("accountIdentifier")
+        or metadata.get("accountNumber")
+        or ""
+    )
+    return re.sub(r"[^0-9a-z]", "", str(account).lower())
+
+
+def _normalize_description(value: str) -> str:
+    normalized = re.sub(r"[^0-9a-z]+", " ", (value or "").lower())
+    return re.sub(r"\s+", " ", normalized).strip()
+
+
+def _to_cents(value) -> Optional[int]:
+    # The field already gives the direction, so signed exports count by magnitude
+    cents = to_cents(value)
+    return abs(cents) if cents else None
+
+
+def _direction_and_cents(transaction: dict) -> Optional[tuple[str, int]]:
+    amount_in = _to_cents(transaction.get("amountIn"))
+    if amount_in:
+        return ("in", amount_in)
+    amount_out = _to_cents(transaction.get("amountOut"))
+    if amount_out:
+        return ("out", amount_out)
+    return None
+
+
+def _digest(*parts: str) -> str:
+    return blake2b("|".join(parts).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def fingerprint_fields(transaction: dict) -> Optional[dict]:
+    """Return the normalized fields a fingerprint is built from, or None if incomplete."""
+    ordinal = date_ordinal(transaction.get("date"))
+    direction_cents = _direction_and_cents(transaction)
+    if ordinal is None or not direction_cents:
+        return None
+    direction, cents = direction_cents
+    return {
+        "account": _normalize_account(transaction),
+        "date": date.fromordinal(ordinal).isoformat(),
+        "ordinal": ordinal,
+        "direction": direction,
+        "amountCents": cents,
+        "description": _normalize_description(str(transaction.get("description") or "")),
+    }
+
+
+def transaction_fingerprint(transaction: dict) -> Optional[tuple[str, str]]:
+    """Return (fingerprint, bucket) for a parsed transaction.
+
+    The fingerprint covers account, date, direction, integer cents and normalized
+    description. The bucket drops date and description so near-duplicates (shifted
+    posting date, reworded description) land in the same bucket.
+    """
+    fields = fingerprint_fields(transaction)
+    if not fields:
+        return None
+    return _keys_from_fields(fields)
+
+
+def _keys_from_fields(fields: dict) -> tuple[str, str]:
+    bucket = _digest(fields["account"], fields["direction"], str(fields["amountCents"]))
+    fingerprint = _digest(
+        fields["account"],
+        fields["date"],
+        fields["direction"],
+        str(fields["amountCents"]),
+        fields["description"],
+    )
+    return fingerprint, bucket
+
+
+def attach_fingerprints(transactions: list[dict]) -> list[dict]:
+    """Set `fingerprint` and `fingerprintBucket` on every row that has enough data."""
+    for transaction in transactions:
+        keys = transaction_fingerprint(transaction)
+        if not keys:
+            continue
+        transaction["fingerprint"], transaction["fingerprintBucket"] = keys
+    return transactions
+
+
+def _description_similarity(left: str, right: str) -> float:
+    left_tokens = set(left.split())
+    right_tokens = set(right.split())
+    if not left_tokens or not right_tokens:
+        return 0.0
+    return len(left_tokens & right_tokens) / len(left_tokens | right_tokens)
+
+
+def _existing_entry(raw, position: int) -> Optional[dict]:
+    """Accept either a bare fingerprint string or a compact {id, fingerprint, bucket, date} object."""
+    if isinstance(raw, str):
+        return {
+            "id": position,
+            "fingerprint": raw,
+            "bucket": None,
+            "ordinal": None,
+            "description": "",
+        }
+    if not isinstance(raw, dict) or not raw.get("fingerprint"):
+        return None
+    return {
+        "id": raw.get("id", position),
+        "fingerprint": str(raw["fingerprint"]),
+        "bucket": raw.get("bucket") or raw.get("fingerprintBucket"),
+        "ordinal": date_ordinal(raw.get("date")),
+        "description": _normalize_description(str(raw.get("description") or "")),
+    }
+
+
+def find_duplicates(
+    transactions: list[dict],
+    existing: list,
+    date_window_days: int = DEFAULT_NEAR_DATE_WINDOW_DAYS,
+) -> dict:
+    """Classify a parsed batch against existing fingerprints.
+
+    Exact matches are a multiset intersection on fingerprints, so two identical coffees
+    on the same day only match two existing rows. Remaining rows are looked up in a
+    bucket index sorted by date and reported as near-duplicates within the window,
+    each scored in [0, 1) below the 1.0 an exact match stands for.
+    """
+    exact_index: dict[str, deque] = {}
+    bucket_index: dict[str, list[tuple[int, int, dict]]] = {}
+    for position, raw in enumerate(existing or []):
+        entry = _existing_entry(raw, position)
+        if not entry:
+            continue
+        exact_index.setdefault(entry["fingerprint"], deque()).append(entry)
+        if entry["bucket"] and entry["ordinal"] is not None:
+            bucket_index.setdefault(entry["bucket"], []).append(
+                (entry["ordinal"], position, entry)
+            )
+    for entries in bucket_index.values():
+        entries.sort(key=lambda item: (item[0], item[1]))
+    bucket_ordinals = {
+        bucket: [item[0] for item in entries] for bucket, entries in bucket_index.items()
+    }
+
+    exact_matches: list[dict] = []
+    near_matches: list[dict] = []
+    batch_duplicates: list[dict] = []
+    new_indices: list[int] = []
+    matched_existing: set[int] = set()
+    first_batch_index: dict[str, int] = {}
+
+    for index, transaction in enumerate(transactions or []):
+        fields = fingerprint_fields(transaction)
+        if not fields:
+            new_indices.append(index)
+            continue
+        fingerprint, bucket = _keys_from_fields(fields)
+
+        candidates = exact_index.get(fingerprint)
+        if candidates:
+            entry = candidates.popleft()
+            matched_existing.add(id(entry))
+            exact_matches.append(
+                {"index": index, "existingId": entry["id"], "fingerprint": fingerprint}
+            )
+            continue
+
+        if fingerprint in first_batch_index:
+            batch_duplicates.append(
+                {"index": index, "duplicateOf": first_batch_index[fingerprint]}
+            )
+        else:
+            first_batch_index[fingerprint] = index
+
+        ordinal = fields["ordinal"]
+        entries = bucket_index.get(bucket) or []
+        ordinals = bucket_ordinals.get(bucket) or []
+        start = bisect_left(ordinals, ordinal - date_window_days)
+        end = bisect_right(ordinals, ordinal + date_window_days)
+        near_for_row: list[dict] = []
+        for entry_ordinal, _, entry in entries[start:end]:
+            if id(entry) in matched_existing:
+                continue
+            day_gap = abs(entry_ordinal - ordinal)
+            reasons = ["Exact amount match"]
+            reasons.append("Same date" if day_gap == 0 else f"Date within {day_gap} days")
+            # Weights top out at 0.95 so a near match never outranks an exact one (1.0)
+            score = 0.5 + (0.2 if day_gap == 0 else 0.1)
+            if entry["description"]:
+                similarity = _description_similarity(fields["description"], entry["description"])
+                score += 0.25 * similarity
+                if similarity >= 0.5:
+                    reasons.append("Similar description")
+            near_for_row.append(
+                {
+                    "existingId": entry["id"],
+                    "dayGap": day_gap,
+                    "score": round(score, 4),
+                    "reasons": reasons,
+                }
+            )
+
+        if near_for_row:
+            near_for_row.sort(key=lambda match: (-match["score"], match["dayGap"]))
+            near_matches.append(
+                {"index": index, "fingerprint": fingerprint, "matches": near_for_row}
+            )
+        else:
+            new_indices.append(index)
+
+    return {
+        "exact": exact_matches,
+        "near": near_matches,
+        "batchDuplicates": batch_duplicates,
+        "new": new_indices,
+    }
@@ -0,0 +1,133 @@
+"""PDF extraction backends that parsers choose between.
+
+Parsers that read only `page.extract_text()` lines (PayLah, YouTrip, the Revolut
+PDF) do not need pdfminer's layout analysis, so they ask for the `pdfium`
+backend: PDFium's text layer through pypdfium2, which pdfplumber already depends
+on. Column parsers (POSB, OCBC) ask for `pdfplumber` because they need word
+geometry from `extract_words`, which pdfium pages do not have. Both backends hand
+back documents with the same `pages` / `extract_text` shape, with pdfium text
+normalized to pdfplumber's line breaks.
+
+The text-only parsers only get pdfium when PDF_TEXT_BACKEND=pdfium; the default
+stays on pdfplumber until `python -m app.cli compare-backends` has matched the
+two on real statements. `use_backend` forces one backend for a block on parsers
+that prefer pdfium, which the differential tests use to check that parser output
+does not depend on the backend; column parsers stay on pdfplumber regardless. Pinned documents and the layout artifact store are always served
+through `layout_store`.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+import pypdfium2
+
+from . import layout_store
+
+PDFPLUMBER = "pdfplumber"
+PDFIUM = "pdfium"
+BACKENDS = (PDFPLUMBER, PDFIUM)
+
+# PDFium keeps global state and is not safe to call from several threads at once
+_pdfium_lock = threading.Lock()
+
+_forced_backend: ContextVar[Optional[str]] = ContextVar("forced_extraction_backend", default=None)
+
+
+def text_backend() -> str:
+    """Backend for parsers that prefer pdfium, from PDF_TEXT_BACKEND."""
+    configured = (os.getenv("PDF_TEXT_BACKEND") or PDFPLUMBER).strip().lower()
+    return configured if configured in BACKENDS else PDFPLUMBER
+
+
+def resolve_backend(preferred: str) -> str:
+    # Column parsers need extract_words, which pdfium pages do not have
+    if preferred != PDFIUM:
+        return PDFPLUMBER
+    forced = _forced_backend.get()
+    return forced if forced is not None else text_backend()
+
+
+@contextmanager
+def use_backend(backend: str) -> Iterator[str]:
+    """Open every PDF inside the block with `backend` if its parser prefers pdfium."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown extraction backend: {backend}")
+    token = _forced_backend.set(backend)
+    try:
+        yield backend
+    finally:
+        _forced_backend.reset(token)
+
+
+def _normalize_text(text: str) -> str:
+    # PDFium ends lines with CRLF and may emit blank lines; pdfplumber does neither
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").replace("\x00", "").split("\n")
+    return "\n".join(line.rstrip() for line in lines if line.strip())
+
+
+class PdfiumPage:
+    """Text-only stand-in for a pdfplumber page backed by PDFium's text layer."""
+
+    def __init__(self, document: "PdfiumDocument", index: int):
+        self._document = document
+        self._index = index
+        self._text: Optional[str] = None
+        with _pdfium_lock:
+            page = document._pdf[index]
+            try:
+                self.width, self.height = page.get_size()
+            finally:
+                page.close()
+
+    def extract_text(self, **kwargs) -> str:
+        if self._text is None:
+            with _pdfium_lock:
+                page = self._document._pdf[self._index]
+                try:
+                    text_page = page.get_textpage()
+                    try:
+                        self._text = _normalize_text(text_page.get_text_range())
+                    finally:
+                        text_page.close()
+                finally:
+                    page.close()
+        return self._text
+
+
+class PdfiumDocument:
+    """Stand-in for a pdfplumber PDF exposing `pages` and the context-manager protocol."""
+
+    def __init__(self, content: bytes):
+        with _pdfium_lock:
+            self._pdf = pypdfium2.PdfDocument(content)
+            page_count = len(self._pdf)
+        self.pages = [PdfiumPage(self, index) for index in range(page_count)]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        with _pdfium_lock:
+            self._pdf.close()
+
+
+def open_pdf(content: bytes, backend: str = PDFPLUMBER):
+    """Open a PDF with the parser's preferred backend, subject to overrides."""
+    if resolve_backend(backend) == PDFIUM and not layout_store.serves_artifacts():
+        return PdfiumDocument(content)
+    return layout_store.open_pdf(content)
+
+
+def parse_on_each_backend(parser_func: Callable, content: bytes) -> dict:
+    """Run `parser_func(content)` once per backend; returns {backend: output}."""
+    outputs = {}
+    for backend in BACKENDS:
+        with use_backend(backend):
+            outputs[backend] = parser_func(content)
+    return outputs
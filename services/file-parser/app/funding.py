@@ -0,0 +1,199 @@
+"""Match trip wallet top-ups to the bank outflows that funded them.
+
+Each top-up row yields one or more expected bank amounts in the home currency:
+`fromAmount` when it is in the home currency and the credited amount, each with and
+without `feeAmount`. A credited amount in a foreign currency is converted back
+through `fxRate`. Bank outflows are indexed by amount in cents, so each
+expectation only visits the rows inside its tolerance. Candidates are ranked by a
+cost that combines the amount difference, days apart and provider wording, and the
+whole trip is assigned greedily by cost so one bank row funds at most one top-up.
+"""
+from bisect import bisect_left, bisect_right
+from typing import Optional
+
+from .dates import date_ordinal
+from .money import from_cents, parse_decimal, to_cents
+
+DEFAULT_HOME_CURRENCY = "SGD"
+DEFAULT_FUNDING_WINDOW_DAYS = 7
+DEFAULT_MAX_CANDIDATES = 5
+
+# Converted expectations allow for the spread between the card rate and the bank debit
+_FX_TOLERANCE = 0.02
+_PROVIDER_KEYWORDS = {
+    "revolut_statement": "revolut",
+    "youtrip_statement": "youtrip",
+}
+
+
+def _metadata(row: dict) -> dict:
+    return row.get("metadata") if isinstance(row.get("metadata"), dict) else {}
+
+
+def _is_topup(row: dict) -> bool:
+    return str(_metadata(row).get("transactionType") or "").lower() == "topup"
+
+
+def _to_home(amount: float, currency: str, metadata: dict, home: str) -> Optional[float]:
+    """Convert `amount` in `currency` to the home currency with the row's fxRate."""
+    rate = parse_decimal(metadata.get("fxRate"))
+    if not rate or rate <= 0:
+        return None
+    base = str(metadata.get("fxBaseCurrency") or home).upper()
+    quote = str(metadata.get("fxQuoteCurrency") or currency).upper()
+    if base == home and quote == currency:
+        return amount / rate
+    if base == currency and quote == home:
+        return amount * rate
+    return None
+
+
+def expected_amounts(row: dict, home: str = DEFAULT_HOME_CURRENCY) -> list[dict]:
+    """Bank debits in home-currency cents that could have funded a top-up row."""
+    metadata = _metadata(row)
+    currency = str(row.get("currency") or metadata.get("currency") or home).upper()
+    fee = to_cents(metadata.get("feeAmount")) or 0
+    expectations: dict[int, dict] = {}
+
+    def add(cents: Optional[int], basis: str, exact: bool = True):
+        if cents and cents > 0 and cents not in expectations:
+            expectations[cents] = {"cents": cents, "basis": basis, "exact": exact}
+
+    from_amount = to_cents(metadata.get("fromAmount"))
+    if from_amount and str(metadata.get("fromCurrency") or home).upper() == home:
+        add(from_amount, "fromAmount")
+        if fee:
+            add(from_amount + fee, "fromAmount + feeAmount")
+
+    credited = to_cents(row.get("amountIn")) or to_cents(metadata.get("toAmount"))
+    if credited and currency == home:
+        add(credited, "amountIn")
+        if fee:
+            add(credited + fee, "amountIn + feeAmount")
+    elif credited:
+        converted = _to_home(from_cents(credited), currency, metadata, home)
+        if converted:
+            add(to_cents(round(converted, 2)), f"amountIn / fxRate ({currency})", exact=False)
+
+    return list(expectations.values())
+
+
+def _bank_index(bank_rows: list, home: str, excluded: set) -> tuple[list[int], list[dict]]:
+    legs = []
+    for index, row in enumerate(bank_rows):
+        if not isinstance(row, dict) or row.get("id") in excluded:
+            continue
+        currency = str(row.get("currency") or home).upper()
+        cents = to_cents(row.get("amountOut")) or 0
+        day = date_ordinal(row.get("date"))
+        if currency != home or cents <= 0 or day is None:
+            continue
+        legs.append(
+            {
+                "index": index,
+                "id": row.get("id"),
+                "day": day,
+                "cents": cents,
+                "text": str(row.get("description") or "").lower(),
+            }
+        )
+    legs.sort(key=lambda leg: (leg["cents"], leg["day"]))
+    return [leg["cents"] for leg in legs], legs
+
+
+def _candidate(topup_day: int, expectation: dict, leg: dict, keyword: str) -> dict:
+    difference = leg["cents"] - expectation["cents"]
+    days = abs(leg["day"] - topup_day)
+    keyword_hit = bool(keyword) and keyword in leg["text"]
+
+    cost = 100 * abs(difference) / expectation["cents"] + 0.5 * days
+    cost += 0 if expectation["exact"] else 0.5
+    cost -= 1 if keyword_hit else 0
+
+    reasons = [f"matches {expectation['basis']}"]
+    if difference:
+        reasons.append(f"off by {from_cents(abs(difference)):.2f}")
+    reasons.append("same day" if days == 0 else f"{days} day{'s' if days != 1 else ''} apart")
+    if keyword_hit:
+        reasons.append(f"mentions {keyword}")
+    return {
+        "bankIndex": leg["index"],
+        "id": leg["id"],
+        "amount": from_cents(leg["cents"]),
+        "expectedAmount": from_cents(expectation["cents"]),
+        "daysApart": days,
+        "cost": round(cost, 4),
+        "reason": ", ".join(reasons),
+    }
+
+
+def match_funding(
+    topups: list,
+    bank_rows: list,
+    home_currency: str = DEFAULT_HOME_CURRENCY,
+    window_days: int = DEFAULT_FUNDING_WINDOW_DAYS,
+    parser_id: Optional[str] = None,
+    max_candidates: int = DEFAULT_MAX_CANDIDATES,
+    exclude_bank_ids: Optional[list] = None,
+) -> dict:
+    """Rank bank candidates for every top-up and pick one bank row per top-up.
+
+    Only rows whose metadata marks them as a top-up are matched; indices refer to
+    positions in `topups` and `bank_rows`.
+    """
+    home = (home_currency or DEFAULT_HOME_CURRENCY).upper()
+    keyword = _PROVIDER_KEYWORDS.get(str(parser_id or "").strip().lower(), "")
+    amounts, legs = _bank_index(bank_rows, home, set(exclude_bank_ids or []))
+
+    ranked: dict[int, list[dict]] = {}
+    for topup_index, row in enumerate(topups):
+        if not isinstance(row, dict) or not _is_topup(row):
+            continue
+        day = date_ordinal(row.get("date"))
+        if day is None:
+            continue
+        by_bank_row: dict[int, dict] = {}
+        for expectation in expected_amounts(row, home):
+            slack = 1 if expectation["exact"] else max(int(expectation["cents"] * _FX_TOLERANCE), 1)
+            low = bisect_left(amounts, expectation["cents"] - slack)
+            high = bisect_right(amounts, expectation["cents"] + slack)
+            for leg in legs[low:high]:
+                if abs(leg["day"] - day) > window_days:
+                    continue
+                candidate = _candidate(day, expectation, leg, keyword)
+                current = by_bank_row.get(leg["index"])
+                if current is None or candidate["cost"] < current["cost"]:
+                    by_bank_row[leg["index"]] = candidate
+        ranked[topup_index] = sorted(
+            by_bank_row.values(), key=lambda item: (item["cost"], item["bankIndex"])
+        )
+
+    # Cheapest pairs first across the whole trip, each bank row used once
+    pairs = sorted(
+        (
+            (candidate["cost"], topup_index, candidate["bankIndex"], candidate)
+            for topup_index, candidates in ranked.items()
+            for candidate in candidates
+        ),
+        key=lambda item: item[:3],
+    )
+    recommended: dict[int, dict] = {}
+    used_bank_rows: set[int] = set()
+    for _, topup_index, bank_index, candidate in pairs:
+        if topup_index in recommended or bank_index in used_bank_rows:
+            continue
+        recommended[topup_index] = candidate
+        used_bank_rows.add(bank_index)
+
+    matches = [
+        {
+            "topupIndex": topup_index,
+            "recommended": recommended.get(topup_index),
+            "candidates": candidates[: max(max_candidates, 1)],
+        }
+        for topup_index, candidates in sorted(ranked.items())
+    ]
+    return {
+        "matches": matches,
+        "unmatched": [match["topupIndex"] for match in matches if not match["recommended"]],
+    }
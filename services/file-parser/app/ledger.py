@@ -0,0 +1,360 @@
+"""Replay a trip's parsed wallet rows into per-currency balances with FIFO cost basis.
+
+Rows become a single event stream: top-ups and other inflows add lots, conversions
+move value from one currency wallet to another, and spending consumes lots oldest
+first. Each lot carries its home-currency cost. Because every row's currency,
+integer amounts and fallback home value are derived column-wise in a DataFrame
+before the replay, the FIFO pass itself only does lot arithmetic. A spend that
+runs past the lots is priced from its own FX rate, or from the last known unit
+cost of that currency, and reported as unfunded. Wallets open with the balance
+printed on their first row unless opening balances are given.
+"""
+from collections import deque
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .money import from_cents, parse_decimal, to_cents
+from .result_cache import ResultCache
+
+DEFAULT_HOME_CURRENCY = "SGD"
+
+TOPUP = "topup"
+CONVERSION = "conversion"
+INFLOW = "inflow"
+SPEND = "spend"
+
+
+def _metadata(row: dict) -> dict:
+    return row.get("metadata") if isinstance(row.get("metadata"), dict) else {}
+
+
+def _home_rate(metadata: dict, currency: str, home: str) -> float:
+    """Home units per unit of `currency` from the row's fxRate, or NaN."""
+    rate = parse_decimal(metadata.get("fxRate"))
+    if not rate or rate <= 0:
+        return np.nan
+    base = str(metadata.get("fxBaseCurrency") or home).upper()
+    quote = str(
+        metadata.get("fxQuoteCurrency")
+        or metadata.get("merchantCurrency")
+        or metadata.get("foreignCurrency")
+        or currency
+    ).upper()
+    if base == home and quote == currency:
+        return 1 / rate
+    if base == currency and quote == home:
+        return rate
+    return np.nan
+
+
+def _conversion_key(metadata: dict, currency: str) -> tuple:
+    return (
+        str(metadata.get("fromCurrency") or currency).upper(),
+        to_cents(metadata.get("fromAmount")),
+        str(metadata.get("toCurrency") or currency).upper(),
+        to_cents(metadata.get("toAmount")),
+    )
+
+
+def _paired_conversion_legs(rows: list, home: str) -> set:
+    """Indexes of conversion in-legs whose out-leg is also among the rows.
+
+    Revolut prints an exchange on both wallets' statements with the same from/to
+    amounts; only the out-leg is replayed so the exchange is not counted twice.
+    """
+    out_legs: dict = {}
+    in_legs = []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            continue
+        metadata = _metadata(row)
+        if str(metadata.get("transactionType") or "").lower() != CONVERSION:
+            continue
+        currency = str(row.get("currency") or metadata.get("currency") or home).upper()
+        key = _conversion_key(metadata, currency)
+        if currency == key[0]:
+            out_legs[key] = out_legs.get(key, 0) + 1
+        elif currency == key[2]:
+            in_legs.append((index, key))
+
+    paired = set()
+    for index, key in in_legs:
+        if out_legs.get(key):
+            out_legs[key] -= 1
+            paired.add(index)
+    return paired
+
+
+def event_frame(rows: list, home: str = DEFAULT_HOME_CURRENCY) -> pd.DataFrame:
+    """One event per usable row, in date order, with integer minor-unit amounts."""
+    records = []
+    paired_in_legs = _paired_conversion_legs(rows, home)
+    for index, row in enumerate(rows):
+        if index in paired_in_legs:
+            continue
+        if not isinstance(row, dict):
+            continue
+        metadata = _metadata(row)
+        currency = str(row.get("currency") or metadata.get("currency") or home).upper()
+        kind = str(metadata.get("transactionType") or "").lower()
+        from_amount = to_cents(metadata.get("fromAmount")) or 0
+        to_amount = to_cents(metadata.get("toAmount")) or 0
+        amount_in = to_cents(row.get("amountIn")) or 0
+        amount_out = to_cents(row.get("amountOut")) or 0
+
+        if kind == CONVERSION and from_amount > 0 and to_amount > 0:
+            event = CONVERSION
+            from_currency = str(metadata.get("fromCurrency") or currency).upper()
+            to_currency = str(metadata.get("toCurrency") or currency).upper()
+        elif amount_in > 0:
+            event = TOPUP if kind == TOPUP else INFLOW
+            from_currency, to_currency = "", currency
+            from_amount, to_amount = 0, amount_in
+            home_source = to_cents(metadata.get("fromAmount"))
+            if event == TOPUP and home_source and str(metadata.get("fromCurrency") or "").upper() == home:
+                from_currency, from_amount = home, home_source
+        elif amount_out > 0:
+            event = SPEND
+            from_currency, to_currency = currency, ""
+            from_amount, to_amount = amount_out, 0
+        else:
+            continue
+
+        records.append(
+            {
+                "index": index,
+                "date": str(row.get("date") or ""),
+                "event": event,
+                "fromCurrency": from_currency,
+                "fromAmount": from_amount,
+                "toCurrency": to_currency,
+                "toAmount": to_amount,
+                "rate": _home_rate(
+                    metadata, from_currency if event == SPEND else to_currency, home
+                ),
+                "description": str(row.get("description") or ""),
+            }
+        )
+
+    frame = pd.DataFrame.from_records(
+        records,
+        columns=[
+            "index", "date", "event", "fromCurrency", "fromAmount",
+            "toCurrency", "toAmount", "rate", "description",
+        ],
+    )
+    if frame.empty:
+        return frame
+    frame["fromAmount"] = frame["fromAmount"].astype("int64")
+    frame["toAmount"] = frame["toAmount"].astype("int64")
+
+    # Fallback home value of the amount a row moves, where its own rate allows it
+    amount = np.where(frame["event"] == SPEND, frame["fromAmount"], frame["toAmount"])
+    currency = np.where(frame["event"] == SPEND, frame["fromCurrency"], frame["toCurrency"])
+    frame["homeValue"] = np.where(currency == home, amount, amount * frame["rate"].to_numpy())
+    frame["homeValue"] = np.where(
+        (frame["event"] == TOPUP) & (frame["fromCurrency"] == home),
+        frame["fromAmount"],
+        frame["homeValue"],
+    )
+    frame["sortDate"] = pd.to_datetime(frame["date"], errors="coerce", format="mixed", utc=True)
+    return frame.sort_values(["sortDate", "index"], kind="stable").reset_index(drop=True)
+
+
+class _Wallet:
+    __slots__ = ("lots", "last_unit_cost")
+
+    def __init__(self):
+        self.lots: deque = deque()  # [amount, home cost]
+        self.last_unit_cost: Optional[float] = None
+
+    def add(self, amount: int, cost: float):
+        if amount <= 0:
+            return
+        self.lots.append([amount, cost])
+        self.last_unit_cost = cost / amount
+
+    def take(self, amount: int) -> tuple[float, int]:
+        """Consume `amount` oldest-first; returns (home cost, amount not covered)."""
+        cost = 0.0
+        while amount > 0 and self.lots:
+            lot = self.lots[0]
+            used = min(amount, lot[0])
+            share = lot[1] * used / lot[0]
+            cost += share
+            lot[0] -= used
+            lot[1] -= share
+            amount -= used
+            if lot[0] == 0:
+                self.lots.popleft()
+        return cost, amount
+
+    def balance(self) -> int:
+        return sum(lot[0] for lot in self.lots)
+
+    def cost_basis(self) -> float:
+        return sum(lot[1] for lot in self.lots)
+
+
+def _uncovered_cost(
+    amount: int, currency: str, home: str, row_value: float, row_amount: int, wallet: _Wallet
+) -> Optional[float]:
+    if currency == home:
+        return float(amount)
+    if not np.isnan(row_value) and row_amount:
+        return row_value * amount / row_amount
+    if wallet.last_unit_cost is not None:
+        return wallet.last_unit_cost * amount
+    return None
+
+
+def _inferred_openings(rows: list, frame: pd.DataFrame, home: str) -> dict[str, int]:
+    """Opening wallet balances implied by the first row of each currency that has a balance."""
+    openings: dict[str, int] = {}
+    seen: set[str] = set()
+    for index in frame["index"] if not frame.empty else []:
+        row = rows[index]
+        currency = str(row.get("currency") or _metadata(row).get("currency") or home).upper()
+        if currency in seen:
+            continue
+        seen.add(currency)
+        balance = to_cents(row.get("balance"))
+        if balance is None:
+            continue
+        opening = (
+            balance - (to_cents(row.get("amountIn")) or 0) + (to_cents(row.get("amountOut")) or 0)
+        )
+        if opening > 0:
+            openings[currency] = opening
+    return openings
+
+
+def build_ledger(
+    rows: list,
+    home_currency: str = DEFAULT_HOME_CURRENCY,
+    opening_balances: Optional[dict] = None,
+) -> dict:
+    """Wallet balances, FIFO cost basis and home-currency spend for a trip's rows.
+
+    Wallets start from `opening_balances` ({currency: {"amount", "costBasis"}}) and
+    otherwise from the balance printed on their first row.
+    """
+    home = (home_currency or DEFAULT_HOME_CURRENCY).upper()
+    frame = event_frame(rows, home)
+    wallets: dict[str, _Wallet] = {}
+    events = []
+    unfunded = []
+
+    def wallet(currency: str) -> _Wallet:
+        return wallets.setdefault(currency, _Wallet())
+
+    openings = {
+        currency: {"amount": amount}
+        for currency, amount in _inferred_openings(rows, frame, home).items()
+    }
+    for currency, value in (opening_balances or {}).items():
+        value = value if isinstance(value, dict) else {"amount": value}
+        openings[str(currency).upper()] = {
+            "amount": to_cents(value.get("amount")) or 0,
+            "cost": to_cents(value.get("costBasis")),
+        }
+    for currency, opening in sorted(openings.items()):
+        cost = opening.get("cost")
+        if cost is None and currency == home:
+            cost = opening["amount"]
+        if cost is None:
+            unfunded.append(
+                {
+                    "index": None,
+                    "currency": currency,
+                    "amount": from_cents(opening["amount"]),
+                    "priced": False,
+                }
+            )
+        wallet(currency).add(opening["amount"], float(cost or 0))
+
+    for event in frame.itertuples(index=False):
+        if event.event in (TOPUP, INFLOW):
+            value = event.homeValue
+            if np.isnan(value):
+                unit = wallet(event.toCurrency).last_unit_cost
+                value = unit * event.toAmount if unit is not None else 0.0
+            wallet(event.toCurrency).add(event.toAmount, float(value))
+            home_cost = float(value)
+        else:
+            source = wallet(event.fromCurrency)
+            cost, missing = source.take(event.fromAmount)
+            if missing:
+                extra = _uncovered_cost(
+                    missing, event.fromCurrency, home, event.homeValue, event.fromAmount, source
+                )
+                unfunded.append(
+                    {
+                        "index": int(event.index),
+                        "currency": event.fromCurrency,
+                        "amount": from_cents(missing),
+                        "priced": extra is not None,
+                    }
+                )
+                cost += extra or 0.0
+            home_cost = cost
+            if event.event == CONVERSION:
+                wallet(event.toCurrency).add(event.toAmount, cost)
+
+        events.append(
+            {
+                "index": int(event.index),
+                "date": event.date,
+                "type": event.event,
+                "fromCurrency": event.fromCurrency or None,
+                "fromAmount": from_cents(int(event.fromAmount)) if event.fromAmount else None,
+                "toCurrency": event.toCurrency or None,
+                "toAmount": from_cents(int(event.toAmount)) if event.toAmount else None,
+                "homeAmount": from_cents(round(home_cost)),
+            }
+        )
+
+    spend = [event for event in events if event["type"] == SPEND]
+    spend_frame = pd.DataFrame(spend, columns=["date", "fromCurrency", "fromAmount", "homeAmount"])
+    by_currency = (
+        spend_frame.groupby("fromCurrency", sort=True)[["fromAmount", "homeAmount"]].sum()
+        if not spend_frame.empty
+        else pd.DataFrame(columns=["fromAmount", "homeAmount"])
+    )
+
+    return {
+        "homeCurrency": home,
+        "wallets": {
+            currency: {
+                "balance": from_cents(state.balance()),
+                "costBasis": from_cents(round(state.cost_basis())),
+                "lots": [
+                    {"amount": from_cents(amount), "costBasis": from_cents(round(cost))}
+                    for amount, cost in state.lots
+                ],
+            }
+            for currency, state in sorted(wallets.items())
+        },
+        "spend": {
+            "totalHome": round(float(spend_frame["homeAmount"].sum()), 2) if spend else 0.0,
+            "byCurrency": {
+                currency: {
+                    "amount": round(float(row["fromAmount"]), 2),
+                    "homeAmount": round(float(row["homeAmount"]), 2),
+                }
+                for currency, row in by_currency.iterrows()
+            },
+        },
+        "events": events,
+        "unfunded": unfunded,
+    }
+
+
+_cache = ResultCache("LEDGER_CACHE_SIZE", 32)
+
+
+def cached_ledger(key: str, compute: Callable[[], dict]) -> tuple[dict, bool]:
+    """Return (ledger, cache hit) for a trip import hash, running `compute` on a miss."""
+    return _cache.get_or_compute(key, compute)
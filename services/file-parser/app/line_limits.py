@@ -0,0 +1,13 @@
+"""Length cap applied to extracted statement lines before any line pattern runs.
+
+The line patterns are written to run in linear time, but a corrupted or crafted
+PDF can still produce "lines" that are megabytes long. No genuine statement row
+comes close to this limit, so such lines are skipped instead of matched.
+"""
+from .env import env_int
+
+MAX_LINE_LENGTH = env_int("PARSE_MAX_LINE_LENGTH", 1000)
+
+
+def is_overlong(line: str) -> bool:
+    return len(line) > MAX_LINE_LENGTH
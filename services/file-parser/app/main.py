@@ -1,15 +1,153 @@
+import json
 import os
-from flask import Flask, request, jsonify
+import struct
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 
-from .parsers import PARSER_MAP, revolut_statement_parser
+from . import admission, compression, profiling
+from .aggregate import aggregate, cached_aggregate
+from .archives import ArchiveTooLarge, archive_workers, detect_parser, is_zip, iter_entries
+from .categorize import categorize
+from .columnar import (
+    COLUMNAR_BINARY_MIMETYPE,
+    decode_binary,
+    encode_binary,
+    negotiate_format,
+    to_columnar,
+)
+from .deadlines import ParseCancelled, ParseTimeout
+from .dedupe import DEFAULT_NEAR_DATE_WINDOW_DAYS, attach_fingerprints, find_duplicates
+from .funding import (
+    DEFAULT_FUNDING_WINDOW_DAYS,
+    DEFAULT_HOME_CURRENCY,
+    DEFAULT_MAX_CANDIDATES,
+    match_funding,
+)
+from .layout_store import artifact_dir, document_hash, is_document_hash, reparse
+from .ledger import build_ledger, cached_ledger
+from .merchants import attach_merchant_keys, cache_stats
+from .parsers import PARSER_MAP, reconcile_for, revolut_statement_parser, run_parser
+from .result_cache import batch_hash
+from .stitching import STITCHABLE_PARSER_IDS, AccountMismatch, stitch_statements
+from .transfers import (
+    DEFAULT_AMOUNT_TOLERANCE_CENTS,
+    DEFAULT_REFUND_WINDOW_DAYS,
+    DEFAULT_TRANSFER_WINDOW_DAYS,
+    match_transfers,
+)
+from .workers import (
+    ParseBudgetExceeded,
+    WorkerCrashed,
+    client_disconnected,
+    run_isolated,
+    usage_stats,
+)
 
 app = Flask(__name__)
 
 # CORS configuration
 frontend_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
 CORS(app, origins=[frontend_url], supports_credentials=True)
+compression.install(app)
+
+
+def _transactions_response(envelope: dict, transactions: list[dict]):
+    """Serialize parsed rows in the format the client negotiated (plain JSON by default)"""
+    response_format = negotiate_format(
+        request.args.get("format"), request.headers.get("Accept")
+    )
+    envelope = {**envelope, "count": len(transactions)}
+
+    if response_format == "columnar":
+        return jsonify({**envelope, "columnar": to_columnar(transactions)})
+
+    if response_format == "columnar-binary":
+        return Response(
+            encode_binary(to_columnar(transactions), envelope),
+            mimetype=COLUMNAR_BINARY_MIMETYPE,
+        )
+
+    return jsonify({**envelope, "transactions": transactions})
+
+
+def _parse_all(parser_func, contents: list[bytes]) -> list[list[dict]]:
+    return [parser_func(content) for content in contents]
+
+
+def _run_with_deadline(func, *args, label: str = None):
+    """Run parser work in a killable worker, cancelling it if the client goes away"""
+    environ = request.environ
+    return run_isolated(
+        func, args, is_cancelled=lambda: client_disconnected(environ), label=label
+    )
+
+
+def _parse_documents_concurrently(
+    parser_func, contents: list[bytes], label: str, lane: str
+) -> list[list[dict]]:
+    """Parse each document in its own worker at the same time; returns rows per document
+
+    Every document is admitted separately, so the fan-out never holds more parse
+    slots or memory than admission grants. The caller must not hold a slot itself.
+    """
+    environ = request.environ
+    user = _request_user()
+
+    def parse_one(content: bytes) -> list[dict]:
+        cost = admission.estimate_cost(content)
+        with admission.controller.admit(user, lane, cost):
+            return run_isolated(
+                parser_func,
+                (content,),
+                is_cancelled=lambda: client_disconnected(environ),
+                label=label,
+            )
+
+    workers = min(len(contents), admission.controller.concurrency)
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        return list(executor.map(parse_one, contents))
+
+
+def _deadline_error_response(e: Exception):
+    if isinstance(e, ParseTimeout):
+        return jsonify({"error": "Parsing took too long and was stopped", "code": e.code}), 504
+    if isinstance(e, ParseCancelled):
+        return jsonify({"error": "Parsing was cancelled", "code": e.code}), 499
+    if isinstance(e, ParseBudgetExceeded):
+        return jsonify({"error": str(e), "code": e.code}), 413
+    return jsonify({"error": f"Parse worker failed: {str(e)}", "code": e.code}), 500
+
+
+def _request_user() -> str:
+    return request.headers.get("X-User-Id") or request.form.get("userId") or request.remote_addr
+
+
+def _requested_lane():
+    return request.headers.get("X-Parse-Priority") or request.form.get("priority")
+
+
+def _overloaded_response(e: admission.Overloaded):
+    response = jsonify({"error": str(e), "code": e.code, "retryAfter": e.retry_after})
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response, 429
+
+
+def _save_profile(report: dict, parser_id: str, filename: str, sampled: bool) -> dict:
+    """Keep a profile report and return the summary linked from the /parse envelope"""
+    profile_id = profiling.store.save(
+        report, parserId=parser_id, filename=filename, sampled=sampled
+    )
+    print(f"Profiled {parser_id} parse of {filename} as {profile_id} ({report['seconds']}s)")
+    return {
+        "id": profile_id,
+        "mode": report["mode"],
+        "seconds": report["seconds"],
+        "hotFunctions": report["hotFunctions"][:10],
+        "url": f"/profiles/{profile_id}",
+        "flamegraphUrl": f"/profiles/{profile_id}?format=folded",
+    }
 
 
 @app.route("/health", methods=["GET"])
@@ -28,7 +166,10 @@ def parse_file():
         return jsonify({"error": "No file provided"}), 400
 
     file = request.files["file"]
-    supplemental_file = request.files.get("supplementalFile")
+    # Revolut takes any number of extra PDFs (one per currency account) and CSV exports
+    supplemental_files = [
+        f for f in request.files.getlist("supplementalFile") if f and f.filename
+    ]
     parser_id = request.form.get("parserId")
 
     if not file or not file.filename:
@@ -40,11 +181,28 @@ def parse_file():
     # Get file extension
     filename = secure_filename(file.filename)
 
-    # Read file content
-    content = file.read()
-    supplemental_content = None
-    if supplemental_file and supplemental_file.filename:
-        supplemental_content = supplemental_file.read()
+    try:
+        profile_mode = profiling.requested_mode(
+            request.headers.get("X-Profile") or request.args.get("profile"),
+            request.headers.get("X-Profile-Token"),
+        )
+    except profiling.ProfilingForbidden as e:
+        return jsonify({"error": str(e), "code": e.code}), 403
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    # Continuous sampling stays out of the response; reports are only in the store
+    sampled = profile_mode is None and profiling.sample_this_request()
+    if sampled:
+        profile_mode = profiling.SAMPLING
+
+    try:
+        # Read file content, unwrapping gzip/zstd uploads
+        content = compression.maybe_decompress(file.read())
+        supplemental_contents = [
+            compression.maybe_decompress(f.read()) for f in supplemental_files
+        ]
+    except ValueError as e:
+        return jsonify({"error": f"Invalid compressed upload: {str(e)}"}), 400
 
     try:
         # Get the parser function from the map
@@ -52,21 +210,59 @@ def parse_file():
         if not parser_func:
             return jsonify({"error": f"Unknown parser: {parser_id}"}), 400
 
-        if parser_id == "revolut_statement" and supplemental_content:
-            transactions = revolut_statement_parser.parse_with_supplemental(
-                content, supplemental_content
-            )
+        uploads = [content, *supplemental_contents]
+        page_counts = [admission.estimate_page_count(upload) for upload in uploads]
+        lane = admission.choose_lane(_requested_lane(), len(page_counts), sum(page_counts))
+        if not profile_mode and parser_id == "revolut_statement" and supplemental_contents:
+            # Each document is admitted on its own inside the fan-out
+            documents = _parse_documents_concurrently(parser_func, uploads, parser_id, lane)
+            transactions = revolut_statement_parser.merge_documents(documents)
+            reconciliation = reconcile_for(parser_id, transactions)
         else:
-            # All parsers now use the same interface
-            transactions = parser_func(content)
+            cost = sum(
+                admission.estimate_cost(upload, pages)
+                for upload, pages in zip(uploads, page_counts)
+            )
+            with admission.controller.admit(_request_user(), lane, cost):
+                if profile_mode:
+                    (transactions, reconciliation), report = _run_with_deadline(
+                        profiling.run_profiled,
+                        profile_mode,
+                        run_parser,
+                        parser_id,
+                        content,
+                        supplemental_contents,
+                        label=parser_id,
+                    )
+                else:
+                    transactions, reconciliation = _run_with_deadline(
+                        run_parser, parser_id, content, supplemental_contents, label=parser_id
+                    )
 
-        return jsonify({
+        attach_fingerprints(transactions)
+        attach_merchant_keys(transactions)
+
+        envelope = {
             "success": True,
             "filename": filename,
             "parserId": parser_id,
-            "transactions": transactions,
-            "count": len(transactions),
-        })
+            "reconciliation": reconciliation,
+        }
+        if artifact_dir():
+            envelope["documentHash"] = document_hash(content)
+        if profile_mode:
+            profile = _save_profile(report, parser_id, filename, sampled)
+            if not sampled:
+                envelope["profile"] = profile
+        return _transactions_response(envelope, transactions)
+    except admission.Overloaded as e:
+        print(f"Parse shed: {e}")
+        return _overloaded_response(e)
+    except (ParseTimeout, ParseCancelled, ParseBudgetExceeded, WorkerCrashed) as e:
+        print(f"Parse stopped: {e}")
+        if getattr(e, "profile", None):
+            _save_profile(e.profile, parser_id, filename, sampled)
+        return _deadline_error_response(e)
     except Exception as e:
         print(f"Parse error: {e}")
         import traceback
@@ -74,6 +270,426 @@ def parse_file():
         return jsonify({"error": f"Failed to parse file: {str(e)}"}), 500
 
 
+@app.route("/reparse", methods=["POST"])
+def reparse_document():
+    """Re-run a parser on stored layout artifacts instead of the original PDF"""
+    if not artifact_dir():
+        return jsonify({"error": "Layout artifact store is not enabled"}), 400
+
+    payload = request.get_json(silent=True) or {}
+    doc_hash = str(payload.get("documentHash") or "").strip().lower()
+    parser_id = payload.get("parserId")
+
+    if not doc_hash:
+        return jsonify({"error": "No documentHash provided"}), 400
+    if not is_document_hash(doc_hash):
+        return jsonify({"error": "documentHash must be a hex SHA-256"}), 400
+
+    parser_func = PARSER_MAP.get(parser_id)
+    if not parser_func:
+        return jsonify({"error": f"Unknown parser: {parser_id}"}), 400
+
+    try:
+        lane = admission.choose_lane(_requested_lane())
+        with admission.controller.admit(_request_user(), lane, admission.estimate_cost(b"", 1)):
+            transactions = _run_with_deadline(reparse, doc_hash, parser_func, label=parser_id)
+        if transactions is None:
+            return jsonify({"error": f"No stored artifacts for {doc_hash}"}), 404
+
+        attach_fingerprints(transactions)
+        attach_merchant_keys(transactions)
+        return _transactions_response(
+            {
+                "success": True,
+                "documentHash": doc_hash,
+                "parserId": parser_id,
+                "reconciliation": reconcile_for(parser_id, transactions),
+            },
+            transactions,
+        )
+    except admission.Overloaded as e:
+        print(f"Reparse shed: {e}")
+        return _overloaded_response(e)
+    except (ParseTimeout, ParseCancelled, ParseBudgetExceeded, WorkerCrashed) as e:
+        print(f"Reparse stopped: {e}")
+        return _deadline_error_response(e)
+    except Exception as e:
+        print(f"Reparse error: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": f"Failed to reparse document: {str(e)}"}), 500
+
+
+@app.route("/stitch", methods=["POST"])
+def stitch_files():
+    """Parse consecutive statements for one account and stitch them into one ledger"""
+    files = [f for f in request.files.getlist("files") if f and f.filename]
+    parser_id = request.form.get("parserId")
+
+    if not files:
+        return jsonify({"error": "No files provided"}), 400
+
+    if parser_id not in STITCHABLE_PARSER_IDS:
+        return jsonify({"error": f"Parser does not support stitching: {parser_id}"}), 400
+
+    try:
+        parser_func = PARSER_MAP[parser_id]
+        contents = [compression.maybe_decompress(f.read()) for f in files]
+        page_count = sum(admission.estimate_page_count(content) for content in contents)
+        cost = sum(admission.estimate_cost(content) for content in contents)
+        lane = admission.choose_lane(_requested_lane(), len(contents), page_count)
+        with admission.controller.admit(_request_user(), lane, cost):
+            statements = _run_with_deadline(_parse_all, parser_func, contents, label=parser_id)
+        result = stitch_statements(statements)
+        transactions = result.pop("transactions")
+        attach_fingerprints(transactions)
+        attach_merchant_keys(transactions)
+
+        return _transactions_response(
+            {
+                "success": True,
+                "filenames": [secure_filename(f.filename) for f in files],
+                "parserId": parser_id,
+                **result,
+            },
+            transactions,
+        )
+    except AccountMismatch as e:
+        return jsonify({"error": str(e), "code": e.code}), 400
+    except admission.Overloaded as e:
+        print(f"Stitch shed: {e}")
+        return _overloaded_response(e)
+    except (ParseTimeout, ParseCancelled, ParseBudgetExceeded, WorkerCrashed) as e:
+        print(f"Stitch stopped: {e}")
+        return _deadline_error_response(e)
+    except Exception as e:
+        print(f"Stitch error: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": f"Failed to stitch files: {str(e)}"}), 500
+
+
+def _parse_archive_entry(filename: str, content: bytes, default_parser_id: str = None):
+    """Detect and run the parser for one archive entry; returns (parserId, rows, reconciliation)"""
+    parser_id = detect_parser(filename, content, default_parser_id)
+    if parser_id not in PARSER_MAP:
+        return parser_id, None, None
+    transactions, reconciliation = run_parser(parser_id, content)
+    return parser_id, transactions, reconciliation
+
+
+def _archive_entry_result(index: int, name: str, content: bytes, default_parser_id, user, environ):
+    """Parse one archive entry under admission in the bulk lane; never raises"""
+    result = {"index": index, "filename": name}
+    try:
+        page_count = admission.estimate_page_count(content)
+        cost = admission.estimate_cost(content, page_count)
+        with admission.controller.admit(user, admission.BULK, cost):
+            parser_id, transactions, reconciliation = run_isolated(
+                _parse_archive_entry,
+                (name, content, default_parser_id),
+                is_cancelled=lambda: client_disconnected(environ),
+                label=default_parser_id or "archive",
+            )
+    except (
+        admission.Overloaded,
+        ParseTimeout,
+        ParseCancelled,
+        ParseBudgetExceeded,
+        WorkerCrashed,
+    ) as e:
+        print(f"Archive entry {name} stopped: {e}")
+        return {**result, "success": False, "error": str(e), "code": e.code}
+    except Exception as e:
+        print(f"Archive entry {name} failed: {e}")
+        return {**result, "success": False, "error": f"Failed to parse entry: {str(e)}"}
+
+    if transactions is None:
+        return {**result, "success": False, "error": "Could not detect a parser for this entry"}
+    attach_fingerprints(transactions)
+    attach_merchant_keys(transactions)
+    return {
+        **result,
+        "success": True,
+        "parserId": parser_id,
+        "reconciliation": reconciliation,
+        "count": len(transactions),
+        "transactions": transactions,
+    }
+
+
+@app.route("/parse-archive", methods=["POST"])
+def parse_archive():
+    """Parse every statement in a ZIP upload, streaming one NDJSON line per entry"""
+    file = request.files.get("file")
+    if not file or not file.filename:
+        return jsonify({"error": "No file provided"}), 400
+
+    default_parser_id = request.form.get("parserId") or None
+    if default_parser_id and default_parser_id not in PARSER_MAP:
+        return jsonify({"error": f"Unknown parser: {default_parser_id}"}), 400
+
+    try:
+        content = compression.maybe_decompress(file.read())
+        if not is_zip(content):
+            return jsonify({"error": "Upload is not a ZIP archive"}), 400
+        entries = iter_entries(content)
+    except ArchiveTooLarge as e:
+        return jsonify({"error": str(e), "code": e.code}), 413
+    except ValueError as e:
+        return jsonify({"error": f"Invalid archive: {str(e)}"}), 400
+
+    filename = secure_filename(file.filename)
+    user = _request_user()
+    environ = request.environ
+
+    def generate():
+        summary = {"done": True, "filename": filename, "entries": 0, "parsed": 0, "failed": 0, "count": 0}
+
+        def line(future) -> str:
+            result = future.result()
+            summary["parsed" if result["success"] else "failed"] += 1
+            summary["count"] += result.get("count", 0)
+            return json.dumps(result) + "\n"
+
+        # Only a window of entries is inflated at once; finished ones stream out
+        # while the next entries are read
+        window = archive_workers()
+        with ThreadPoolExecutor(max_workers=window) as executor:
+            in_flight = set()
+            try:
+                for index, (name, data) in enumerate(entries):
+                    in_flight.add(
+                        executor.submit(
+                            _archive_entry_result, index, name, data, default_parser_id, user, environ
+                        )
+                    )
+                    summary["entries"] += 1
+                    if len(in_flight) >= window:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield line(future)
+            except ArchiveTooLarge as e:
+                # Entries already read still finish; nothing past the budget is inflated
+                summary.update({"error": str(e), "code": e.code})
+
+            for future in as_completed(in_flight):
+                yield line(future)
+        yield json.dumps(summary) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@app.route("/dedupe", methods=["POST"])
+def dedupe_transactions():
+    """Match a parsed batch against existing transaction fingerprints"""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a JSON body"}), 400
+
+    transactions = payload.get("transactions")
+    existing = payload.get("existing") or []
+    if not isinstance(transactions, list) or not isinstance(existing, list):
+        return jsonify({"error": "transactions and existing must be lists"}), 400
+
+    try:
+        date_window_days = int(payload.get("dateWindowDays", DEFAULT_NEAR_DATE_WINDOW_DAYS))
+    except (TypeError, ValueError):
+        return jsonify({"error": "dateWindowDays must be an integer"}), 400
+
+    result = find_duplicates(transactions, existing, date_window_days)
+    return jsonify({
+        "success": True,
+        **result,
+        "count": len(transactions),
+    })
+
+
+@app.route("/match-transfers", methods=["POST"])
+def match_transfer_pairs():
+    """Pair internal-transfer legs and refunds across the accounts in a batch"""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a JSON body"}), 400
+
+    transactions = payload.get("transactions")
+    if not isinstance(transactions, list):
+        return jsonify({"error": "transactions must be a list"}), 400
+
+    try:
+        transfer_window_days = int(payload.get("dateWindowDays", DEFAULT_TRANSFER_WINDOW_DAYS))
+        refund_window_days = int(payload.get("refundWindowDays", DEFAULT_REFUND_WINDOW_DAYS))
+        amount_tolerance_cents = int(
+            payload.get("amountToleranceCents", DEFAULT_AMOUNT_TOLERANCE_CENTS)
+        )
+    except (TypeError, ValueError):
+        return jsonify({"error": "window and tolerance options must be integers"}), 400
+
+    result = match_transfers(
+        transactions, transfer_window_days, refund_window_days, amount_tolerance_cents
+    )
+    return jsonify({
+        "success": True,
+        **result,
+        "count": len(transactions),
+    })
+
+
+@app.route("/match-funding", methods=["POST"])
+def match_trip_funding():
+    """Recommend the bank outflow that funded each trip wallet top-up"""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a JSON body"}), 400
+
+    topups = payload.get("topups")
+    bank_transactions = payload.get("bankTransactions")
+    exclude_bank_ids = payload.get("excludeBankIds") or []
+    if not all(isinstance(value, list) for value in (topups, bank_transactions, exclude_bank_ids)):
+        return jsonify({"error": "topups, bankTransactions and excludeBankIds must be lists"}), 400
+
+    try:
+        window_days = int(payload.get("dateWindowDays", DEFAULT_FUNDING_WINDOW_DAYS))
+        max_candidates = int(payload.get("maxCandidates", DEFAULT_MAX_CANDIDATES))
+    except (TypeError, ValueError):
+        return jsonify({"error": "dateWindowDays and maxCandidates must be integers"}), 400
+
+    result = match_funding(
+        topups,
+        bank_transactions,
+        home_currency=payload.get("homeCurrency") or DEFAULT_HOME_CURRENCY,
+        window_days=window_days,
+        parser_id=payload.get("parserId"),
+        max_candidates=max_candidates,
+        exclude_bank_ids=exclude_bank_ids,
+    )
+    return jsonify({
+        "success": True,
+        **result,
+        "count": len(result["matches"]),
+    })
+
+
+@app.route("/ledger", methods=["POST"])
+def trip_wallet_ledger():
+    """Replay a trip import into wallet balances, FIFO cost basis and home-currency spend"""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a JSON body"}), 400
+
+    transactions = payload.get("transactions")
+    if not isinstance(transactions, list):
+        return jsonify({"error": "transactions must be a list"}), 400
+
+    opening_balances = payload.get("openingBalances") or {}
+    if not isinstance(opening_balances, dict):
+        return jsonify({"error": "openingBalances must be an object"}), 400
+
+    home_currency = str(payload.get("homeCurrency") or DEFAULT_HOME_CURRENCY).upper()
+    key = batch_hash(request.get_data(), home_currency)
+    result, cached = cached_ledger(
+        key, lambda: build_ledger(transactions, home_currency, opening_balances)
+    )
+    return jsonify({
+        "success": True,
+        **result,
+        "importHash": key,
+        "cached": cached,
+        "count": len(transactions),
+    })
+
+
+@app.route("/categorize", methods=["POST"])
+def categorize_transactions():
+    """Apply a user's import rules to a parsed batch"""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a JSON body"}), 400
+
+    transactions = payload.get("transactions")
+    rules = payload.get("rules") or []
+    if not isinstance(transactions, list) or not isinstance(rules, list):
+        return jsonify({"error": "transactions and rules must be lists"}), 400
+
+    result = categorize(transactions, rules, payload.get("parserId"))
+    return jsonify({
+        "success": True,
+        **result,
+        "count": len(transactions),
+    })
+
+
+def _aggregate_batch(body: bytes, top_merchants: int) -> dict:
+    """Load a columnar (JSON or binary) or plain-row batch and aggregate it"""
+    if request.mimetype == COLUMNAR_BINARY_MIMETYPE:
+        columnar, envelope = decode_binary(body)
+    else:
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            raise ValueError("Expected a JSON body or a columnar binary batch")
+        envelope = payload
+        if payload.get("format") == "columnar":
+            columnar = payload
+        elif isinstance(payload.get("columnar"), dict):
+            columnar = payload["columnar"]
+        elif isinstance(payload.get("transactions"), list):
+            columnar = to_columnar(payload["transactions"])
+        else:
+            raise ValueError("Expected columnar or transactions in the batch")
+
+    opening_balances = envelope.get("openingBalances") or {}
+    if not isinstance(opening_balances, dict):
+        raise ValueError("openingBalances must be an object")
+    return aggregate(columnar, top_merchants, opening_balances)
+
+
+@app.route("/aggregate", methods=["POST"])
+def aggregate_transactions():
+    """Monthly, category and account rollups, running balances and top merchants"""
+    try:
+        top_merchants = int(request.args.get("top", 10))
+    except (TypeError, ValueError):
+        return jsonify({"error": "top must be an integer"}), 400
+
+    body = request.get_data()
+    key = batch_hash(body, request.mimetype, top_merchants)
+    try:
+        result, cached = cached_aggregate(key, lambda: _aggregate_batch(body, top_merchants))
+    except (ValueError, KeyError, struct.error) as e:
+        return jsonify({"error": f"Invalid batch: {str(e)}"}), 400
+
+    return jsonify({
+        "success": True,
+        **result,
+        "batchHash": key,
+        "cached": cached,
+    })
+
+
+@app.route("/profiles/<profile_id>", methods=["GET"])
+def get_profile(profile_id):
+    """A stored parse profile as JSON, or its collapsed stacks with ?format=folded"""
+    if not profiling.is_authorized(request.headers.get("X-Profile-Token")):
+        return jsonify({"error": "Profiling requires a valid X-Profile-Token"}), 403
+    report = profiling.store.get(profile_id)
+    if report is None:
+        return jsonify({"error": f"No profile {profile_id}"}), 404
+    if request.args.get("format") == "folded":
+        return Response(report["folded"] + "\n", mimetype="text/plain")
+    return jsonify(report)
+
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Admission queue depth, shed counts, slot usage, worker peak memory per parser, cache and profiling stats"""
+    return jsonify({
+        "admission": admission.controller.metrics(),
+        "merchantCache": cache_stats(),
+        "workerUsage": usage_stats.snapshot(),
+        "profiling": {"sampleEvery": profiling.sample_every(), "stored": len(profiling.store)},
+    })
+
+
 @app.route("/parsers", methods=["GET"])
 def get_parsers():
     """Get list of available parsers"""
@@ -0,0 +1,107 @@
+"""Canonical merchant keys for parsed descriptions.
+
+Reference numbers, card masks, dates, amounts with FX suffixes, payment-channel
+prefixes and trailing location tokens are stripped so the raw forms one merchant
+takes across statements collapse to a single key. Keys are interned and numbered:
+`merchantId` is an integer derived from a hash of the key, so later stages can
+group on it instead of comparing strings, and it is the same in every process and
+across restarts. It fits in 48 bits so JSON clients read it exactly.
+"""
+import hashlib
+import re
+import sys
+from functools import lru_cache
+
+from .env import env_int
+
+_MONTH = (
+    r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b"
+)
+
+# Applied in order to the lowercased description
+_STRIP_PATTERNS = tuple(
+    re.compile(pattern)
+    for pattern in (
+        # Card masks: 4111-xxxx-xxxx-1234, xxxx1234, **1234, *1234, card ending 1234
+        r"\b\d{4}[-\s]?(?:[x*]{4}[-\s]?){2}\d{4}\b",
+        r"(?:\bx{2,}|\*+)[-\s]?\d{2,}\b",
+        r"\bcard\s+(?:ending|no\.?)\s*\d+\b",
+        # Dates: 01/02/2024, 01-02-24, 2024-02-01, a trailing 01/02, 01 feb 2024, 01feb.
+        # A day/month pair without a year only counts at the end, so 7-11 and 24/7 stay
+        r"\b\d{4}-\d{2}-\d{2}\b",
+        r"\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b",
+        r"\b\d{1,2}/\d{1,2}\s*$",
+        rf"\b\d{{1,2}}\s*{_MONTH}(?:\s+\d{{4}})?",
+        # Amounts, optionally with a currency code on either side: usd 12.50, 1,200 jpy
+        r"\b(?:[a-z]{3}\s*)?(?:s\$|us\$|\$|¥|€|£)?\d[\d,]*\.\d{2}\b(?:\s*[a-z]{3}\b)?",
+        r"\b\d[\d,]*\s+(?:usd|eur|gbp|jpy|aud|myr|thb|idr|krw|hkd|cny|twd|vnd|php|inr)\b",
+        r"\bfx\s+rate\b.*$",
+        # References: ref 12345, ref: ab-1234, #12345, and any token with 4+ digits
+        r"\b(?:ref|reference|txn|trx|trn|inv|invoice|auth|approval)\b\.?\s*(?:no\.?)?\s*[:#]?\s*[a-z0-9-]*\d[a-z0-9-]*",
+        r"#\s*\w+",
+        r"\b[a-z]*\d[a-z]*\d{3,}[a-z0-9]*\b",
+    )
+)
+_CHANNEL_PREFIX_PATTERN = re.compile(
+    r"^(?:(?:card\s+payment|debit\s+card\s+transaction|pos|nets(?:\s+qr)?|paynow"
+    r"|fast\s+payment|giro|visa|mastercard|mst|purchase|payment)"
+    r"(?:\s+(?:to|at|from))?\s+)+"
+)
+# Two-letter codes that are also words ("us", "my", "ca") are left out
+_LOCATION_SUFFIXES = frozenset(
+    {
+        "sg", "sgp", "singapore", "mys", "malaysia", "kuala", "lumpur",
+        "jp", "jpn", "japan", "tokyo", "osaka", "kr", "kor", "korea", "seoul",
+        "th", "tha", "thailand", "bangkok", "hk", "hkg", "hong", "kong", "tw", "taipei",
+        "idn", "indonesia", "jakarta", "bali", "vn", "vietnam", "ph", "manila",
+        "au", "aus", "australia", "sydney", "uk", "gb", "gbr", "london",
+        "usa", "cn", "chn", "china", "fr", "france", "paris",
+    }
+)
+_NON_WORD_PATTERN = re.compile(r"[^0-9a-z&]+")
+
+
+@lru_cache(maxsize=max(env_int("MERCHANT_CACHE_SIZE", 50000), 1))
+def merchant_key(description: str) -> str:
+    """Return the interned canonical merchant key for a description."""
+    text = description.lower()
+    words = _NON_WORD_PATTERN.sub(" ", text).split()
+    for pattern in _STRIP_PATTERNS:
+        text = pattern.sub(" ", text)
+    text = " ".join(_NON_WORD_PATTERN.sub(" ", text).split())
+
+    stripped = _CHANNEL_PREFIX_PATTERN.sub("", text + " ").strip()
+    tokens = stripped.split() if stripped else text.split()
+    while len(tokens) > 1 and tokens[-1] in _LOCATION_SUFFIXES:
+        tokens.pop()
+
+    # Descriptions that are nothing but channel words or references keep their words
+    key = " ".join(tokens) or " ".join(words)
+    return sys.intern(key)
+
+
+@lru_cache(maxsize=max(env_int("MERCHANT_CACHE_SIZE", 50000), 1))
+def merchant_id(key: str) -> int:
+    """Return the stable integer id for a canonical merchant key."""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=6).digest(), "big")
+
+
+def attach_merchant_keys(transactions: list[dict]) -> list[dict]:
+    """Set `merchantKey` and `merchantId` on every row."""
+    for transaction in transactions:
+        key = merchant_key(str(transaction.get("description") or ""))
+        transaction["merchantKey"] = key
+        transaction["merchantId"] = merchant_id(key)
+    return transactions
+
+
+def cache_stats() -> dict:
+    info = merchant_key.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "maxSize": info.maxsize,
+        "merchants": merchant_id.cache_info().currsize,
+    }
@@ -0,0 +1,56 @@
+"""Compact internal transaction records shared by the parsers."""
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(slots=True)
+class Statement:
+    """Statement-level fields held once and referenced by every row of a document."""
+
+    metadata: dict
+    account_number: Optional[str] = None
+
+
+@dataclass(slots=True)
+class Transaction:
+    """One parsed row; `extra` only holds metadata that differs from row to row."""
+
+    date: str
+    description: str
+    statement: Statement
+    amount_in: Optional[float] = None
+    amount_out: Optional[float] = None
+    balance: Optional[float] = None
+    currency: Optional[str] = None
+    extra: Optional[dict] = None
+
+    @property
+    def row_metadata(self) -> dict:
+        if self.extra is None:
+            self.extra = {}
+        return self.extra
+
+    def to_dict(self) -> dict:
+        """Serialize to the /parse row shape, expanding shared statement metadata."""
+        transaction = {
+            "date": self.date,
+            "description": self.description,
+            "amountIn": self.amount_in,
+            "amountOut": self.amount_out,
+            "balance": self.balance,
+        }
+        if self.currency:
+            transaction["currency"] = self.currency
+        metadata = dict(self.statement.metadata)
+        if self.extra:
+            metadata.update(self.extra)
+        transaction["metadata"] = metadata
+        account_number = self.statement.account_number
+        if account_number:
+            transaction["accountNumber"] = account_number
+            transaction["accountIdentifier"] = account_number
+        return transaction
+
+
+def to_dicts(transactions: list[Transaction]) -> list[dict]:
+    return [transaction.to_dict() for transaction in transactions]
@@ -0,0 +1,102 @@
+"""Money token parsing into integer minor units (cents).
+
+Accepts the shapes statements and exports actually print: `1,234.56`, `1.234,56`,
+`-5.00`, `+5.00`, `(5.00)`, `5.00-`, and currency prefixes or suffixes such as
+`S$`, `US$`, `HK$`, `€` or `SGD`. Amount arithmetic and match keys run on the
+returned integers; `from_cents` converts back to the float amounts rows carry.
+"""
+import re
+from typing import Optional
+
+_NUMBER_PATTERN = re.compile(r"(?:[.,](?=\d))?\d(?:[\d,.']*\d)?")
+_SEPARATORS = str.maketrans("", "", ",.'")
+_MINUS_SIGNS = ("-", "\u2212")
+# A sign or bracket only counts when nothing but a currency marker stands between it
+# and the number, so words like "Top-up 5.00" stay positive
+_CURRENCY = r"(?:[A-Z]{0,3}[$€£¥]|[A-Z]{3})"
+_NEGATIVE_PREFIX_PATTERN = re.compile(rf"[-\u2212]\s*+{_CURRENCY}?\s*+$")
+_OPEN_BRACKET_PATTERN = re.compile(rf"\(\s*+{_CURRENCY}?\s*+[-\u2212]?\s*+$")
+_CLOSE_BRACKET_PATTERN = re.compile(rf"^\s*+{_CURRENCY}?\s*+\)")
+
+
+def _split_number(value) -> Optional[tuple[bool, str, str]]:
+    """Return (negative, integer digits, fraction digits) for a money token."""
+    text = str(value or "").strip()
+    match = _NUMBER_PATTERN.search(text)
+    if not match:
+        return None
+
+    prefix = text[: match.start()]
+    suffix = text[match.end() :]
+    negative = (
+        bool(_NEGATIVE_PREFIX_PATTERN.search(prefix))
+        or suffix.startswith(_MINUS_SIGNS)
+        or bool(_OPEN_BRACKET_PATTERN.search(prefix) and _CLOSE_BRACKET_PATTERN.match(suffix))
+    )
+
+    number = match.group(0)
+    last_dot = number.rfind(".")
+    last_comma = number.rfind(",")
+    if last_dot >= 0 and last_comma >= 0:
+        decimal_at = max(last_dot, last_comma)
+    elif last_comma >= 0:
+        # A lone comma followed by anything but three digits is a decimal comma (12,50)
+        is_decimal = number.count(",") == 1 and len(number) - last_comma - 1 != 3
+        decimal_at = last_comma if is_decimal else -1
+    elif last_dot >= 0:
+        decimal_at = last_dot if number.count(".") == 1 else -1
+    else:
+        decimal_at = -1
+
+    if decimal_at < 0:
+        return negative, number.translate(_SEPARATORS), ""
+    integer = number[:decimal_at].translate(_SEPARATORS)
+    fraction = number[decimal_at + 1 :].translate(_SEPARATORS)
+    return negative, integer or "0", fraction
+
+
+def parse_cents(value) -> Optional[int]:
+    """Parse a money token or number into signed integer cents; None if unparseable."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value * 100
+    if isinstance(value, float):
+        return int(round(value * 100))
+
+    parts = _split_number(value)
+    if parts is None:
+        return None
+    negative, integer, fraction = parts
+    cents = int(integer) * 100
+    if fraction:
+        cents += int(fraction[:2].ljust(2, "0"))
+        # Round half up on the third decimal
+        if len(fraction) > 2 and fraction[2] >= "5":
+            cents += 1
+    return -cents if negative else cents
+
+
+def to_cents(value) -> Optional[int]:
+    """`parse_cents` for values that may be empty strings, as in JSON request rows."""
+    if value == "":
+        return None
+    return parse_cents(value)
+
+
+def from_cents(cents: Optional[int]) -> Optional[float]:
+    return None if cents is None else cents / 100
+
+
+def parse_decimal(value) -> Optional[float]:
+    """Parse a number such as an FX rate or a generic CSV value, keeping every decimal place."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    parts = _split_number(value)
+    if parts is None:
+        return None
+    negative, integer, fraction = parts
+    number = float(f"{integer}.{fraction or '0'}")
+    return -number if negative else number
@@ -0,0 +1,232 @@
+"""Page-level caches for incremental re-parsing of overlapping uploads.
+
+A corrected statement or a longer date range mostly repeats pages that were parsed
+before. Each PDF page is hashed from its content streams and the resources they
+draw with (fonts, form XObjects, images), without running layout analysis, and
+two things are cached under that hash:
+
+- the page's extracted text, so an unchanged page skips pdfminer entirely, and
+- for parsers that walk pages as a state machine, the rows a page produced and
+  the parser state at its end, keyed by the page hash and the state it started
+  in, so unchanged pages splice in their rows instead of being parsed again.
+
+Entries live in a per-process LRU and, only when PAGE_CACHE_DIR is set, in files
+shared by every parse worker. Under the default PARSE_ISOLATION=process each parse
+runs in a one-shot worker whose LRU is discarded when it exits, so pages are only
+reused across uploads when PAGE_CACHE_DIR is set; the LRU alone helps inline parses
+and pages repeated within one parse. Those files hold statement text, so they are
+removed after PAGE_CACHE_MAX_AGE_HOURS and the oldest go first once the directory
+passes PAGE_CACHE_MAX_MB.
+"""
+import hashlib
+import itertools
+import json
+import os
+import re
+import time
+from typing import Any, Callable, Optional
+
+from pdfminer.pdftypes import PDFObjRef, PDFStream
+from pdfminer.psparser import PSLiteral
+
+from .env import env_int
+from .result_cache import ResultCache
+
+PAGE_CACHE_VERSION = 1
+
+_MAX_DEPTH = 12
+# Embedded font programs only draw glyphs; text comes from the encoding and ToUnicode
+_SKIPPED_KEYS = {"Parent", "FontFile", "FontFile2", "FontFile3", "Annots", "Metadata"}
+# Subset fonts get a random six-letter tag per generated file
+_SUBSET_TAG_PATTERN = re.compile(r"^[A-Z]{6}\+")
+
+# Writes between sweeps of the cache directory
+_SWEEP_EVERY = 64
+
+_texts = ResultCache("PAGE_CACHE_SIZE", 2048)
+_steps = ResultCache("PAGE_CACHE_SIZE", 2048)
+_writes = itertools.count(1)
+
+
+def cache_dir() -> Optional[str]:
+    return os.getenv("PAGE_CACHE_DIR") or None
+
+
+def max_age_seconds() -> int:
+    return max(env_int("PAGE_CACHE_MAX_AGE_HOURS", 24), 0) * 3600
+
+
+def max_bytes() -> int:
+    return max(env_int("PAGE_CACHE_MAX_MB", 256), 0) * 1024 * 1024
+
+
+def _feed(digest, value, depth: int, seen: set):
+    if depth > _MAX_DEPTH:
+        digest.update(b"<deep>")
+        return
+    if isinstance(value, PDFObjRef):
+        if value.objid in seen:
+            digest.update(f"<ref {value.objid}>".encode())
+            return
+        seen.add(value.objid)
+        try:
+            value = value.resolve()
+        except Exception:
+            digest.update(b"<unresolved>")
+            return
+    if isinstance(value, PDFStream):
+        _feed(digest, value.attrs, depth + 1, seen)
+        raw = value.get_rawdata()
+        digest.update(hashlib.sha256(raw if raw is not None else value.get_data()).digest())
+    elif isinstance(value, dict):
+        for key in sorted(value, key=str):
+            if key in _SKIPPED_KEYS:
+                continue
+            digest.update(f"/{key}".encode())
+            _feed(digest, value[key], depth + 1, seen)
+    elif isinstance(value, (list, tuple)):
+        digest.update(b"[")
+        for item in value:
+            _feed(digest, item, depth + 1, seen)
+        digest.update(b"]")
+    elif isinstance(value, PSLiteral):
+        digest.update(_SUBSET_TAG_PATTERN.sub("", str(value.name)).encode())
+    elif isinstance(value, bytes):
+        digest.update(_SUBSET_TAG_PATTERN.sub("", value.decode("latin-1")).encode("latin-1"))
+    else:
+        digest.update(repr(value).encode())
+
+
+def page_content_hash(page) -> Optional[str]:
+    """Hash of what a pdfplumber page draws, or None for pages without a PDF object."""
+    page_obj = getattr(page, "page_obj", None)
+    if page_obj is None:
+        return None
+    digest = hashlib.sha256(f"v{PAGE_CACHE_VERSION}".encode())
+    seen: set = set()
+    try:
+        _feed(digest, page_obj.contents, 0, seen)
+        _feed(digest, page_obj.resources, 0, seen)
+        _feed(digest, [page_obj.mediabox, page_obj.cropbox, page_obj.rotate], 0, seen)
+    except Exception as e:
+        print(f"Could not hash page content: {e}")
+        return None
+    return digest.hexdigest()
+
+
+def _path(kind: str, key: str) -> Optional[str]:
+    store_dir = cache_dir()
+    return os.path.join(store_dir, kind, f"{key}.json") if store_dir else None
+
+
+def _read(kind: str, key: str) -> Optional[Any]:
+    path = _path(kind, key)
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        if time.time() - os.path.getmtime(path) > max_age_seconds():
+            os.remove(path)
+            return None
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable page cache entry {path}: {e}")
+        return None
+
+
+def _write(kind: str, key: str, value):
+    path = _path(kind, key)
+    if not path:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(value, handle, separators=(",", ":"))
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"Failed to store page cache entry {path}: {e}")
+        return
+    if next(_writes) % _SWEEP_EVERY == 0:
+        sweep()
+
+
+def sweep(store_dir: Optional[str] = None) -> int:
+    """Remove expired entries, then the oldest ones past the size bound; returns the count."""
+    store_dir = store_dir or cache_dir()
+    if not store_dir:
+        return 0
+    entries = []
+    for kind in ("text", "steps"):
+        directory = os.path.join(store_dir, kind)
+        if not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    entries.sort()
+    now = time.time()
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for mtime, size, path in entries:
+        if now - mtime <= max_age_seconds() and total <= max_bytes():
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+def _cached(cache: ResultCache, kind: str, key: str, compute: Callable[[], Any]) -> tuple[Any, bool]:
+    stored = False
+
+    def load():
+        nonlocal stored
+        value = _read(kind, key)
+        if value is not None:
+            stored = True
+            return value
+        value = compute()
+        _write(kind, key, value)
+        return value
+
+    value, hit = cache.get_or_compute(key, load)
+    return value, hit or stored
+
+
+def page_text(page) -> tuple[str, Optional[str], bool]:
+    """Return (text, content hash, reused) for a page, extracting only on a cache miss."""
+    digest = page_content_hash(page)
+    if digest is None:
+        return page.extract_text() or "", None, False
+    text, reused = _cached(_texts, "text", digest, lambda: page.extract_text() or "")
+    return text, digest, reused
+
+
+def cached_step(
+    parser_key: str,
+    page_hash: Optional[str],
+    state: dict,
+    step: Callable[[], tuple[list, dict]],
+) -> tuple[list, dict, bool]:
+    """Return (rows, state after the page, reused) for one page of a page-walking parser.
+
+    `state` must be JSON-serializable; the page is only looked up when it has a hash.
+    """
+    if page_hash is None:
+        rows, state_out = step()
+        return rows, state_out, False
+    key = hashlib.sha256(
+        json.dumps([parser_key, page_hash, state], sort_keys=True, default=str).encode()
+    ).hexdigest()
+    value, reused = _cached(_steps, "steps", key, lambda: list(step()))
+    rows, state_out = value
+    return rows, state_out, reused
@@ -1,3 +1,4 @@
+from ..reconciliation import reconcile
 from . import csv_parser
 from . import dbs_paylah_parser
 from . import dbs_posb_parser
@@ -15,8 +16,52 @@ PARSER_MAP = {
     "youtrip_statement": youtrip_statement_parser.parse,
 }
 
+# Parsers that return (transactions, reconciliation report) for the same input
+REPORT_PARSER_MAP = {
+    "dbs_posb_consolidated": dbs_posb_parser.parse_with_report,
+}
+
+# Parsers whose rows form one running balance. PayLah prints no balances and merged
+# Revolut rows alternate between currency wallets, so a chain check would only
+# report false mismatches for them.
+BALANCE_CHAIN_PARSERS = {"dbs_posb_consolidated", "ocbc_frank_statement", "generic_csv"}
+
+
+def reconcile_for(parser_id: str, transactions: list):
+    """Balance-chain reconciliation for parsers with one balance chain, else None."""
+    if parser_id not in BALANCE_CHAIN_PARSERS:
+        return None
+    return reconcile(transactions)
+
+
+def run_parser(parser_id: str, content: bytes, supplemental_content=None):
+    """Dispatch to the parser for `parser_id`; returns (transactions, reconciliation)
+
+    The reconciliation is None for parsers without a single balance chain.
+    `supplemental_content` is one file or a list of files merged into a Revolut parse.
+    """
+    reconciliation = None
+    if parser_id == "revolut_statement" and supplemental_content:
+        transactions = revolut_statement_parser.parse_with_supplemental(
+            content, supplemental_content
+        )
+    elif parser_id in REPORT_PARSER_MAP:
+        transactions, reconciliation = REPORT_PARSER_MAP[parser_id](content)
+    else:
+        # All parsers now use the same interface
+        transactions = PARSER_MAP[parser_id](content)
+
+    if reconciliation is None:
+        reconciliation = reconcile_for(parser_id, transactions)
+    return transactions, reconciliation
+
+
 __all__ = [
     "PARSER_MAP",
+    "REPORT_PARSER_MAP",
+    "BALANCE_CHAIN_PARSERS",
+    "reconcile_for",
+    "run_parser",
     "csv_parser",
     "dbs_paylah_parser",
     "dbs_posb_parser",
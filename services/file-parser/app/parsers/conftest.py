@@ -0,0 +1,44 @@
+import pytest
+
+
+class FakePage:
+    def __init__(self, text, words=None):
+        self._text = text
+        self._words = words or []
+        self.words_extracted = False
+
+    def extract_text(self):
+        return self._text
+
+    def extract_words(self):
+        self.words_extracted = True
+        return self._words
+
+
+class FakePdf:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+@pytest.fixture
+def fake_pdf(monkeypatch):
+    """Make a parser module's `open_pdf` yield the given pages.
+
+    Each page is its text, or a (text, words) pair for parsers that read word
+    positions. The installed FakePage objects are returned.
+    """
+
+    def install(module, *pages):
+        fake_pages = [
+            FakePage(page) if isinstance(page, str) else FakePage(*page) for page in pages
+        ]
+        monkeypatch.setattr(module, "open_pdf", lambda *_: FakePdf(fake_pages))
+        return fake_pages
+
+    return install
@@ -4,9 +4,20 @@ from datetime import datetime
 from typing import Optional, Any
 from dateutil import parser as date_parser
 
+from ..deadlines import check_deadline
+from ..models import Statement, Transaction, to_dicts
+from ..money import parse_decimal
+
 
 def parse(content: bytes, parser_id: str = "generic_csv", config: Optional[dict] = None) -> list[dict]:
     """Parse CSV file and extract transactions."""
+    return to_dicts(parse_records(content, parser_id, config))
+
+
+def parse_records(
+    content: bytes, parser_id: str = "generic_csv", config: Optional[dict] = None
+) -> list[Transaction]:
+    """Parse CSV file into compact transaction records."""
     csv_text = content.decode("utf-8")
 
     # Default config
@@ -29,11 +40,13 @@ def parse(content: bytes, parser_id: str = "generic_csv", config: Optional[dict]
     column_mapping = parser_config.get("columnMapping", {})
     amount_transform = parser_config.get("amountTransform", {})
 
-    transactions = []
+    transactions: list[Transaction] = []
+    statement = Statement(metadata={"source": "csv", "parserId": parser_id})
 
     reader = csv.DictReader(io.StringIO(csv_text), delimiter=delimiter)
 
     for row in reader:
+        check_deadline()
         # Parse date
         date_str = row.get(column_mapping.get("date", "Date"), "")
         try:
@@ -53,7 +66,7 @@ def parse(content: bytes, parser_id: str = "generic_csv", config: Optional[dict]
             amount_col = amount_transform.get("column", "Amount")
             amount_str = row.get(amount_col, "")
             if amount_str:
-                amount = parse_amount(amount_str)
+                amount = parse_decimal(amount_str)
                 if amount > 0:
                     amount_in = amount
                 elif amount < 0:
@@ -64,22 +77,22 @@ def parse(content: bytes, parser_id: str = "generic_csv", config: Optional[dict]
             out_col = column_mapping.get("amountOut")
 
             if in_col and row.get(in_col):
-                amount_in = parse_amount(row.get(in_col, ""))
+                amount_in = parse_decimal(row.get(in_col, ""))
 
             if out_col and row.get(out_col):
-                amount_out = parse_amount(row.get(out_col, ""))
+                amount_out = parse_decimal(row.get(out_col, ""))
 
         # Parse balance
         balance = None
         balance_col = column_mapping.get("balance")
         if balance_col and row.get(balance_col):
-            balance = parse_amount(row.get(balance_col, ""))
+            balance = parse_decimal(row.get(balance_col, ""))
 
         # Get description
         description = row.get(column_mapping.get("description", "Description"), "")
 
         # Build metadata from remaining fields
-        metadata = {"source": "csv", "parserId": parser_id}
+        metadata = {}
         for key, value in row.items():
             if key not in [
                 column_mapping.get("date"),
@@ -91,26 +104,15 @@ def parse(content: bytes, parser_id: str = "generic_csv", config: Optional[dict]
                 metadata[key] = value
 
         if date_formatted and description:
-            transaction = {
-                "date": date_formatted,
-                "description": description,
-                "amountIn": amount_in,
-                "amountOut": amount_out,
-                "balance": balance,
-                "metadata": metadata,
-            }
+            transaction = Transaction(
+                date=date_formatted,
+                description=description,
+                statement=statement,
+                amount_in=amount_in,
+                amount_out=amount_out,
+                balance=balance,
+                extra=metadata,
+            )
             transactions.append(transaction)
 
     return transactions
-
-
-def parse_amount(value: str) -> Optional[float]:
-    """Parse amount string, handling currency symbols and commas."""
-    if not value:
-        return None
-    try:
-        # Remove currency symbols, commas, and whitespace
-        cleaned = value.replace("$", "").replace(",", "").strip()
-        return float(cleaned)
-    except (ValueError, TypeError):
-        return None
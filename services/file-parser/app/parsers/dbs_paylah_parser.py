@@ -2,18 +2,38 @@
 import re
 from datetime import datetime
 from dateutil import parser as date_parser
-import pdfplumber
-import io
+
+from ..deadlines import check_deadline
+from ..extraction import PDFIUM, open_pdf
+from ..line_limits import is_overlong
+from ..models import Statement, Transaction, to_dicts
+from ..money import from_cents, parse_cents
+
+# Only text lines are read, so PDFium's text layer is enough
+EXTRACTION_BACKEND = PDFIUM
+
+# Possessive quantifiers keep both patterns linear in the line length.
+_HEADER_PATTERN = re.compile(r"(\d{1,2}\s++\w++\s++(\d{4}))\s++\d{8,10}\s++(\d{16})")
+# pdfplumber format: "26 Nov MIRANA SIGN 4.40 DB" (date + description + amount + CR/DB)
+_TX_LINE_PATTERN = re.compile(
+    r"^(\d{1,2}\s++\w++)(?:\s++(.+?)(?<=\S)\s++|\s{3,}+)(\d++\.\d{2})\s++(CR|DB)$"
+)
 
 
 def parse(content: bytes) -> list[dict]:
-    """Parse DBS PayLah! statement using pdfplumber text."""
+    """Parse DBS PayLah! statement from its text lines."""
+    return to_dicts(parse_records(content))
+
+
+def parse_records(content: bytes) -> list[Transaction]:
+    """Parse DBS PayLah! statement into compact transaction records."""
     print("\n=== PayLah Statement Parser ===")
     transactions = []
 
-    with pdfplumber.open(io.BytesIO(content)) as pdf:
+    with open_pdf(content, EXTRACTION_BACKEND) as pdf:
         all_text = ""
         for page in pdf.pages:
+            check_deadline()
             all_text += page.extract_text() or ""
             all_text += "\n"
 
@@ -25,10 +45,7 @@ def parse(content: bytes) -> list[dict]:
         # Statement date - format: "22 Dec 2025 6593417426 888888002335658"
         # Note: accountNumber is extracted but not stored in metadata (use accountIdentifier field instead)
         account_number = None
-        match = re.search(
-            r"(\d{1,2}\s+\w+\s+(\d{4}))\s+\d{8,10}\s+(\d{16})",
-            all_text,
-        )
+        match = _HEADER_PATTERN.search(all_text)
         if match:
             account_metadata["statementDate"] = match.group(1)
             account_metadata["statementYear"] = int(match.group(2))
@@ -43,12 +60,25 @@ def parse(content: bytes) -> list[dict]:
             print(f"Statement Date: {match.group(1)}")
             print(f"Wallet Account: {account_number}")
 
+        statement = Statement(
+            metadata={
+                "source": "pdf",
+                "parserId": "dbs_paylah_statement",
+                "bank": "DBS",
+                "currency": "SGD",
+                **account_metadata,
+            },
+            account_number=account_number,
+        )
         current_year = account_metadata.get("statementYear", datetime.now().year)
         statement_month = account_metadata.get("statementMonth")
         in_section = False
 
         for i, line in enumerate(lines):
+            check_deadline()
             line = line.strip()
+            if is_overlong(line):
+                continue
 
             if "NEW TRANSACTIONS" in line:
                 in_section = True
@@ -66,14 +96,12 @@ def parse(content: bytes) -> list[dict]:
             if not line or "REF NO" in line:
                 continue
 
-            # pdfplumber format: "26 Nov MIRANA SIGN 4.40 DB"
-            # Pattern: date + description + amount + CR/DB
-            tx_match = re.match(r"^(\d{1,2}\s+\w+)\s+(.+?)\s+(\d+\.\d{2})\s+(CR|DB)$", line)
+            tx_match = _TX_LINE_PATTERN.match(line)
 
             if tx_match:
                 date_str = tx_match.group(1)
-                description = tx_match.group(2).strip()
-                amount = float(tx_match.group(3))
+                description = (tx_match.group(2) or "").strip()
+                amount = from_cents(parse_cents(tx_match.group(3)))
                 tx_type = tx_match.group(4)
 
                 try:
@@ -91,23 +119,14 @@ def parse(content: bytes) -> list[dict]:
                 except Exception:
                     date_formatted = date_str
 
-                transaction = {
-                    "date": date_formatted,
-                    "description": description,
-                    "amountIn": amount if tx_type == "CR" else None,
-                    "amountOut": amount if tx_type == "DB" else None,
-                    "metadata": {
-                        "source": "pdf",
-                        "parserId": "dbs_paylah_statement",
-                        "bank": "DBS",
-                        "currency": "SGD",
-                        "transactionType": "credit" if tx_type == "CR" else "debit",
-                        **account_metadata,
-                    },
-                }
-                if account_number:
-                    transaction["accountNumber"] = account_number
-                    transaction["accountIdentifier"] = account_number
+                transaction = Transaction(
+                    date=date_formatted,
+                    description=description,
+                    statement=statement,
+                    amount_in=amount if tx_type == "CR" else None,
+                    amount_out=amount if tx_type == "DB" else None,
+                    extra={"transactionType": "credit" if tx_type == "CR" else "debit"},
+                )
                 print(f"Found: {date_str} | {description} | {amount} {tx_type}")
                 transactions.append(transaction)
 
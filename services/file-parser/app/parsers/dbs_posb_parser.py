@@ -1,22 +1,52 @@
 """DBS/POSB Consolidated Statement Parser"""
+import copy
 import re
-import pdfplumber
-import io
 from typing import Optional
 
+from ..deadlines import check_deadline
+from ..extraction import PDFPLUMBER, open_pdf
+from ..line_limits import is_overlong
+from ..models import Statement, Transaction, to_dicts
+from ..money import from_cents, parse_cents
+from ..page_cache import cached_step, page_text
+from ..reconciliation import reconcile
+
+# The column fallback needs word geometry from pdfplumber
+EXTRACTION_BACKEND = PDFPLUMBER
+
+# Line patterns are written to run in linear time: possessive quantifiers never give
+# back part of a run of spaces or digits, and the lazy description is only tried
+# where a space run starts (?<=\S), so no suffix of the line is re-scanned more than
+# a constant number of times. The \s{3,} branch matches rows whose description is
+# blank, which the old backtracking pattern also accepted.
+_ACCOUNT_NUMBER_PATTERNS = [
+    re.compile(r"Account\s*+(?:No|Number|#|ID)\.?\s*+[:\-]?\s*+([0-9][0-9\-\s]{5,})", re.I),
+    re.compile(r"A\/C\s*+No\.?\s*+[:\-]?\s*+([0-9][0-9\-\s]{5,})", re.I),
+    re.compile(r"Acc(?:ount)?\s*+No\.?\s*+[:\-]?\s*+([0-9][0-9\-\s]{5,})", re.I),
+]
+_BROUGHT_FORWARD_PATTERN = re.compile(
+    r"Balance Brought Forward(?:\s++SGD)?\s++([\d,]++\.\d{2})", re.I
+)
+_FULL_TX_PATTERN = re.compile(
+    r"^(\d{2}/\d{2}/\d{4})(?:\s++(.+?)(?<=\S)\s++|\s{3,}+)([\d,]++\.\d{2})\s++([\d,]++\.\d{2})$"
+)
+_DATE_DESCRIPTION_PATTERN = re.compile(r"^(\d{2}/\d{2}/\d{4})\s*+(.*)$")
+_DATE_PREFIX_PATTERN = re.compile(r"^(\d{2}/\d{2}/\d{4})\b")
+_AMOUNT_PAIR_PATTERN = re.compile(r"^([\d,]++\.\d{2})\s++([\d,]++\.\d{2})\s*+$")
+_SINGLE_AMOUNT_PATTERN = re.compile(r"^([\d,]++\.\d{2})\s*+$")
+_AMOUNT_TOKEN_PATTERN = re.compile(r"(?<![\d,])[\d,]++\.\d{2}")
+
+# Bump when the text path changes so cached page rows from older logic are not reused
+_TEXT_STEP_KEY = "dbs_posb_consolidated:text:1"
+
 
 def _normalize_account_number(value: str) -> str:
     return re.sub(r"[^\d]", "", value)
 
 
 def _extract_account_number(text: str) -> Optional[str]:
-    patterns = [
-        r"Account\s*(?:No|Number|#|ID)\.?\s*[:\-]?\s*([0-9][0-9\-\s]{5,})",
-        r"A\/C\s*No\.?\s*[:\-]?\s*([0-9][0-9\-\s]{5,})",
-        r"Acc(?:ount)?\s*No\.?\s*[:\-]?\s*([0-9][0-9\-\s]{5,})",
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, text, re.I)
+    for pattern in _ACCOUNT_NUMBER_PATTERNS:
+        match = pattern.search(text)
         if match:
             normalized = _normalize_account_number(match.group(1))
             if normalized:
@@ -26,16 +56,43 @@ def _extract_account_number(text: str) -> Optional[str]:
 
 def parse(content: bytes) -> list[dict]:
     """Parse DBS/POSB consolidated statement using pdfplumber."""
-    print("\n=== POSB Statement Parser ===")
+    return to_dicts(parse_records(content))
+
+
+def parse_records(content: bytes) -> list[Transaction]:
+    """Parse DBS/POSB consolidated statement into compact transaction records."""
+    transactions, _ = parse_records_with_report(content)
+    return transactions
+
 
-    with pdfplumber.open(io.BytesIO(content)) as pdf:
-        all_text = ""
-        for page in pdf.pages:
-            all_text += page.extract_text() or ""
-            all_text += "\n"
+def parse_with_report(content: bytes) -> tuple[list[dict], dict]:
+    """Parse DBS/POSB consolidated statement and return rows with a reconciliation report."""
+    transactions, report = parse_records_with_report(content)
+    return to_dicts(transactions), report
 
-        transactions = []
-        lines = all_text.split("\n")
+
+def parse_records_with_report(content: bytes) -> tuple[list[Transaction], dict]:
+    """Parse a POSB statement along the cheapest path whose balances reconcile.
+
+    The line-based text path runs first. Pages containing rows that break the balance
+    chain, rows the chain cannot verify, and rows whose amount or balance the text
+    path could not tell apart are re-parsed with the word-position column path,
+    which needs the much more expensive word extraction.
+    """
+    print("\n=== POSB Statement Parser ===")
+
+    with open_pdf(content, EXTRACTION_BACKEND) as pdf:
+        page_texts = []
+        page_hashes = []
+        text_reused = []
+        for page_index, page in enumerate(pdf.pages):
+            check_deadline()
+            text, page_hash, reused = page_text(page)
+            page_texts.append(text)
+            page_hashes.append(page_hash)
+            if reused:
+                text_reused.append(page_index)
+        all_text = "".join(f"{text}\n" for text in page_texts)
 
         # Extract metadata
         account_metadata = {}
@@ -52,225 +109,343 @@ def parse(content: bytes) -> list[dict]:
             account_metadata["statementDate"] = match.group(1)
             print(f"Statement Date: {match.group(1)}")
 
-        in_section = False
-        pending_transaction = None
-        previous_balance = None
+        statement = Statement(
+            metadata={
+                "source": "pdf",
+                "parserId": "dbs_posb_consolidated",
+                "bank": "DBS/POSB",
+                "currency": "SGD",
+                **account_metadata,
+            },
+            account_number=account_number,
+        )
+        transactions, row_pages, opening_balance, rows_reused = _parse_with_text(
+            page_texts, statement, page_hashes
+        )
+        page_cache = {
+            "pages": len(page_texts),
+            "textReusedPages": text_reused,
+            "rowsReusedPages": rows_reused,
+        }
+        report = reconcile(transactions, opening_balance)
+        failing_pages = sorted(
+            {row_pages[index] for index in report["mismatchIndices"]}
+            | {row_pages[index] for index in report["unverifiedIndices"]}
+            | {row_pages[index] for index in _incomplete_indices(transactions)}
+        )
+        if transactions and not failing_pages:
+            print(f"Text path reconciled {len(transactions)} transactions")
+            return transactions, {
+                **report,
+                "path": "text",
+                "fallbackPages": [],
+                "pageCache": page_cache,
+            }
 
-        # Prefer column-based parsing when headers exist (more reliable for deposit/withdrawal)
         header_positions = _find_column_positions(pdf)
-        if header_positions:
-            print(
-                "Column positions - Withdrawal: "
-                f"{header_positions['withdrawal_x']}, "
-                f"Deposit: {header_positions['deposit_x']}, "
-                f"Balance: {header_positions['balance_x']}"
+        if not header_positions:
+            return transactions, {
+                **report,
+                "path": "text",
+                "fallbackPages": [],
+                "pageCache": page_cache,
+            }
+
+        print(
+            "Column positions - Withdrawal: "
+            f"{header_positions['withdrawal_x']}, "
+            f"Deposit: {header_positions['deposit_x']}, "
+            f"Balance: {header_positions['balance_x']}"
+        )
+        if not transactions:
+            transactions = _parse_with_columns(pdf, statement, header_positions)
+            report = reconcile(transactions, opening_balance)
+            return transactions, {
+                **report,
+                "path": "columns",
+                "fallbackPages": list(range(len(pdf.pages))),
+                "pageCache": page_cache,
+            }
+
+        print(f"Re-parsing pages {failing_pages} with column positions")
+        rows_by_page: dict[int, list[Transaction]] = {}
+        for transaction, page_index in zip(transactions, row_pages):
+            rows_by_page.setdefault(page_index, []).append(transaction)
+        for page_index in failing_pages:
+            column_rows = _parse_with_columns(
+                pdf, statement, header_positions, page_indices=[page_index]
             )
-            return _parse_with_columns(pdf, account_metadata, header_positions, account_number)
-
-        for i, line in enumerate(lines):
-            line = line.strip()
-
-            # Start of transaction section
-            if "Balance Brought Forward" in line or "Balance B/F" in line:
-                in_section = True
-                pending_transaction = None
-                bf_match = re.search(r"Balance Brought Forward(?:\s+SGD)?\s+([\d,]+\.\d{2})", line, re.I)
-                if bf_match:
-                    previous_balance = float(bf_match.group(1).replace(",", ""))
-                print(f"Found transactions section at line {i}")
-                continue
-
-            # Section breaks/page boundaries
-            if in_section and (
-                "Balance Carried Forward" in line
-                or "Total Balance Carried Forward" in line
-                or "Balance C/F" in line
-                or "Total Balance" in line
-                or line.startswith("Messages For")
-                or line.startswith("Transaction Details as of")
-                or "Page " in line
-            ):
-                # Process pending transaction if exists
-                if pending_transaction and pending_transaction.get("amounts"):
-                    tx, previous_balance = _finalize_transaction(
-                        pending_transaction,
-                        account_metadata,
-                        previous_balance,
-                        account_number,
-                    )
-                    transactions.append(tx)
-                elif pending_transaction:
-                    print(
-                        f"Pending at page break (incomplete): "
-                        f"{pending_transaction.get('description', 'N/A')}"
-                    )
-                in_section = False
-                pending_transaction = None
-                continue
+            if column_rows:
+                rows_by_page[page_index] = column_rows
+
+        transactions = [
+            transaction
+            for page_index in sorted(rows_by_page)
+            for transaction in rows_by_page[page_index]
+        ]
+        report = reconcile(transactions, opening_balance)
+        return transactions, {
+            **report,
+            "path": "text+columns",
+            "fallbackPages": failing_pages,
+            "pageCache": page_cache,
+        }
+
+
+def _incomplete_indices(transactions: list[Transaction]) -> list[int]:
+    """Rows missing an amount or a balance, whose in/out split the text path guessed.
+
+    A lone number is read as the balance and a row without one defaults to an
+    outflow, so these rows can still form a chain that reconciles by accident.
+    """
+    return [
+        index
+        for index, transaction in enumerate(transactions)
+        if transaction.balance is None
+        or (transaction.amount_in is None and transaction.amount_out is None)
+    ]
 
-            if not in_section:
-                continue
 
-            # Skip header lines
-            if not line or "DateDescription" in line or line.startswith("Withdrawal") or line.startswith("Deposit"):
-                continue
+def _parse_with_text(
+    page_texts: list[str], statement: Statement, page_hashes: Optional[list] = None
+) -> tuple[list[Transaction], list[int], Optional[float], list[int]]:
+    """Parse POSB statement lines page by page.
 
-            # Pattern 1: Full transaction on one line
-            full_tx_match = re.match(
-                r"^(\d{2}/\d{2}/\d{4})\s+(.+?)\s+([\d,]+\.\d{2})\s+([\d,]+\.\d{2})$",
-                line
-            )
-            if full_tx_match:
-                # Save pending if exists
-                if pending_transaction and pending_transaction.get("amounts"):
-                    tx, previous_balance = _finalize_transaction(
-                        pending_transaction, account_metadata, previous_balance, account_number
-                    )
-                    transactions.append(tx)
-                    pending_transaction = None
-
-                date_str = full_tx_match.group(1)
-                description = full_tx_match.group(2).strip()
-                amt = float(full_tx_match.group(3).replace(",", ""))
-                balance = float(full_tx_match.group(4).replace(",", ""))
-
-                date_parts = date_str.split("/")
-                date_formatted = f"{date_parts[2]}-{date_parts[1]}-{date_parts[0]}"
-
-                is_deposit = previous_balance is not None and balance > previous_balance
-
-                transaction = {
-                    "date": date_formatted,
-                    "description": description,
-                    "amountOut": None if is_deposit else amt,
-                    "amountIn": amt if is_deposit else None,
-                    "balance": balance,
-                    "metadata": {
-                        "source": "pdf",
-                        "parserId": "dbs_posb_consolidated",
-                        "bank": "DBS/POSB",
-                        "currency": "SGD",
-                        **account_metadata,
-                    },
-                }
-                if account_number:
-                    transaction["accountNumber"] = account_number
-                    transaction["accountIdentifier"] = account_number
+    Returns rows, the page of each row, the opening balance and the pages whose rows
+    were spliced in from the page cache instead of being parsed.
+    """
+    transactions = []
+    row_pages: list[int] = []
+    reused_pages: list[int] = []
+    state = {"inSection": False, "pending": None, "previousBalance": None, "openingBalance": None}
+    page_hashes = page_hashes or [None] * len(page_texts)
+
+    for page_index, (text, page_hash) in enumerate(zip(page_texts, page_hashes)):
+        rows, state_out, reused = cached_step(
+            _TEXT_STEP_KEY, page_hash, state, lambda: _parse_text_page(text, state)
+        )
+        if reused:
+            reused_pages.append(page_index)
+        for page_offset, fields in rows:
+            transactions.append(_transaction_from_fields(fields, statement))
+            row_pages.append(page_index + page_offset)
+        # A row still pending at the page end started this many pages before the next one
+        state = copy.deepcopy(state_out)
+        if state["pending"]:
+            state["pending"]["pageOffset"] -= 1
+
+    # Handle any remaining pending transaction
+    pending = state["pending"]
+    if pending and pending.get("amounts"):
+        fields, _ = _finalize_transaction(pending, state["previousBalance"])
+        transactions.append(_transaction_from_fields(fields, statement))
+        row_pages.append(len(page_texts) + pending["pageOffset"])
+
+    print(f"\nTotal transactions found: {len(transactions)}")
+    return transactions, row_pages, state["openingBalance"], reused_pages
+
+
+def _parse_text_page(text: str, state: dict) -> tuple[list, dict]:
+    """Run the text-path state machine over one page's lines.
+
+    `state` is the parser state at the start of the page and is not modified. Returns
+    ([(page offset, row fields)], state at the end of the page); a row's page offset
+    is 0 for this page and negative when it started on an earlier one.
+    """
+    rows = []
+    in_section = state["inSection"]
+    pending_transaction = copy.deepcopy(state["pending"])
+    previous_balance = state["previousBalance"]
+    opening_balance = state["openingBalance"]
+
+    def _finalize(pending: dict):
+        nonlocal previous_balance
+        fields, previous_balance = _finalize_transaction(pending, previous_balance)
+        rows.append((pending["pageOffset"], fields))
+
+    for line in f"{text}\n".split("\n"):
+        check_deadline()
+        line = line.strip()
+        if is_overlong(line):
+            continue
+
+        # Start of transaction section
+        if "Balance Brought Forward" in line or "Balance B/F" in line:
+            in_section = True
+            pending_transaction = None
+            bf_match = _BROUGHT_FORWARD_PATTERN.search(line)
+            if bf_match:
+                previous_balance = from_cents(parse_cents(bf_match.group(1)))
+                if opening_balance is None:
+                    opening_balance = previous_balance
+            print("Found transactions section")
+            continue
+
+        # Section breaks/page boundaries
+        if in_section and (
+            "Balance Carried Forward" in line
+            or "Total Balance Carried Forward" in line
+            or "Balance C/F" in line
+            or "Total Balance" in line
+            or line.startswith("Messages For")
+            or line.startswith("Transaction Details as of")
+            or "Page " in line
+        ):
+            # Process pending transaction if exists
+            if pending_transaction and pending_transaction.get("amounts"):
+                _finalize(pending_transaction)
+            elif pending_transaction:
                 print(
-                    f"Found: {date_str} | {description} | "
-                    f"{'In' if is_deposit else 'Out'}: {amt} | Bal: {balance}"
+                    f"Pending at page break (incomplete): "
+                    f"{pending_transaction.get('description', 'N/A')}"
                 )
-                transactions.append(transaction)
-                previous_balance = balance
-                continue
-
-            # Pattern 2: Date followed by description (start of multi-line)
-            date_desc_match = re.match(r"^(\d{2}/\d{2}/\d{4})\s*(.*)$", line)
-            if date_desc_match:
-                remainder = (date_desc_match.group(2) or "").strip()
-                if not remainder or re.match(r"^[\d,]+\.\d{2}$", remainder):
-                    continue
-                # Save pending transaction if exists
-                if pending_transaction and pending_transaction.get("amounts"):
-                    tx, previous_balance = _finalize_transaction(
-                        pending_transaction, account_metadata, previous_balance, account_number
-                    )
-                    transactions.append(tx)
-
-                pending_transaction = {
-                    "date": date_desc_match.group(1),
-                    "description": remainder,
-                    "amounts": None,
-                }
-                print(f"Started: {pending_transaction['date']} - {pending_transaction['description']}")
-                continue
+            in_section = False
+            pending_transaction = None
+            continue
+
+        if not in_section:
+            continue
+
+        # Skip header lines
+        if not line or "DateDescription" in line or line.startswith("Withdrawal") or line.startswith("Deposit"):
+            continue
+
+        # Pattern 1: Full transaction on one line
+        full_tx_match = _FULL_TX_PATTERN.match(line)
+        if full_tx_match:
+            # Save pending if exists
+            if pending_transaction and pending_transaction.get("amounts"):
+                _finalize(pending_transaction)
+                pending_transaction = None
 
-            # Pattern 3: Just amounts (completion of multi-line)
-            amount_match = re.match(r"^([\d,]+\.\d{2})\s+([\d,]+\.\d{2})\s*$", line)
-            single_amount_match = re.match(r"^([\d,]+\.\d{2})\s*$", line)
-
-            if (amount_match or single_amount_match) and pending_transaction:
-                if amount_match:
-                    pending_transaction["amounts"] = (
-                        float(amount_match.group(1).replace(",", "")),
-                        float(amount_match.group(2).replace(",", ""))
-                    )
-                else:
-                    pending_transaction["amounts"] = (
-                        None,
-                        float(single_amount_match.group(1).replace(",", ""))
-                    )
-                print(f"  Amounts: {pending_transaction['amounts']}")
-
-                # Finalize transaction
-                tx, previous_balance = _finalize_transaction(
-                    pending_transaction, account_metadata, previous_balance, account_number
+            date_str = full_tx_match.group(1)
+            description = (full_tx_match.group(2) or "").strip()
+            amt = from_cents(parse_cents(full_tx_match.group(3)))
+            balance = from_cents(parse_cents(full_tx_match.group(4)))
+
+            date_parts = date_str.split("/")
+            date_formatted = f"{date_parts[2]}-{date_parts[1]}-{date_parts[0]}"
+
+            is_deposit = previous_balance is not None and balance > previous_balance
+
+            rows.append(
+                (
+                    0,
+                    {
+                        "date": date_formatted,
+                        "description": description,
+                        "amountIn": amt if is_deposit else None,
+                        "amountOut": None if is_deposit else amt,
+                        "balance": balance,
+                    },
                 )
-                transactions.append(tx)
-                pending_transaction = None
+            )
+            print(
+                f"Found: {date_str} | {description} | "
+                f"{'In' if is_deposit else 'Out'}: {amt} | Bal: {balance}"
+            )
+            previous_balance = balance
+            continue
+
+        # Pattern 2: Date followed by description (start of multi-line)
+        date_desc_match = _DATE_DESCRIPTION_PATTERN.match(line)
+        if date_desc_match:
+            remainder = (date_desc_match.group(2) or "").strip()
+            if not remainder or _AMOUNT_TOKEN_PATTERN.fullmatch(remainder):
                 continue
+            # Save pending transaction if exists
+            if pending_transaction and pending_transaction.get("amounts"):
+                _finalize(pending_transaction)
+
+            pending_transaction = {
+                "date": date_desc_match.group(1),
+                "description": remainder,
+                "amounts": None,
+                "pageOffset": 0,
+            }
+            print(f"Started: {pending_transaction['date']} - {pending_transaction['description']}")
+            continue
+
+        # Pattern 3: Just amounts (completion of multi-line)
+        amount_match = _AMOUNT_PAIR_PATTERN.match(line)
+        single_amount_match = _SINGLE_AMOUNT_PATTERN.match(line)
+
+        if (amount_match or single_amount_match) and pending_transaction:
+            if amount_match:
+                pending_transaction["amounts"] = [
+                    from_cents(parse_cents(amount_match.group(1))),
+                    from_cents(parse_cents(amount_match.group(2))),
+                ]
+            else:
+                pending_transaction["amounts"] = [
+                    None,
+                    from_cents(parse_cents(single_amount_match.group(1))),
+                ]
+            print(f"  Amounts: {pending_transaction['amounts']}")
+
+            # Finalize transaction
+            _finalize(pending_transaction)
+            pending_transaction = None
+            continue
+
+        # Pattern 4: Description continuation
+        if pending_transaction and line and not re.match(r"^\d", line):
+            if pending_transaction["description"]:
+                pending_transaction["description"] += " " + line
+            else:
+                pending_transaction["description"] = line
+            print(f"  Appended: {line}")
+
+    return rows, {
+        "inSection": in_section,
+        "pending": pending_transaction,
+        "previousBalance": previous_balance,
+        "openingBalance": opening_balance,
+    }
 
-            # Pattern 4: Description continuation
-            if pending_transaction and line and not re.match(r"^\d", line):
-                if pending_transaction["description"]:
-                    pending_transaction["description"] += " " + line
-                else:
-                    pending_transaction["description"] = line
-                print(f"  Appended: {line}")
-
-        # Handle any remaining pending transaction
-        if pending_transaction and pending_transaction.get("amounts"):
-            tx, previous_balance = _finalize_transaction(
-                pending_transaction, account_metadata, previous_balance, account_number
-            )
-            transactions.append(tx)
 
-        print(f"\nTotal transactions found: {len(transactions)}")
-        return transactions
+def _transaction_from_fields(fields: dict, statement: Statement) -> Transaction:
+    return Transaction(
+        date=fields["date"],
+        description=fields["description"],
+        statement=statement,
+        amount_in=fields["amountIn"],
+        amount_out=fields["amountOut"],
+        balance=fields["balance"],
+    )
 
 
 def _finalize_transaction(
     pending: dict,
-    account_metadata: dict,
     previous_balance: Optional[float],
-    account_number: Optional[str] = None,
 ) -> tuple[dict, Optional[float]]:
-    """Convert pending POSB transaction to final format."""
+    """Convert pending POSB transaction to final row fields."""
     date_str = pending["date"]
     date_parts = date_str.split("/")
     date_formatted = f"{date_parts[2]}-{date_parts[1]}-{date_parts[0]}"
 
-    amounts = pending.get("amounts", (None, None))
-    amount = amounts[0] if amounts else None
-    balance = amounts[1] if amounts else None
+    amounts = pending.get("amounts") or (None, None)
+    amount = amounts[0]
+    balance = amounts[1]
 
     is_deposit = False
     if previous_balance is not None and balance is not None:
         is_deposit = balance > previous_balance
 
-    transaction = {
+    fields = {
         "date": date_formatted,
         "description": pending["description"],
-        "amountOut": None if is_deposit else amount,
         "amountIn": amount if is_deposit else None,
+        "amountOut": None if is_deposit else amount,
         "balance": balance,
-        "metadata": {
-            "source": "pdf",
-            "parserId": "dbs_posb_consolidated",
-            "bank": "DBS/POSB",
-            "currency": "SGD",
-            **account_metadata,
-        },
     }
-    if account_number:
-        transaction["accountNumber"] = account_number
-        transaction["accountIdentifier"] = account_number
-    return transaction, balance if balance is not None else previous_balance
+    return fields, balance if balance is not None else previous_balance
 
 
 def _find_column_positions(pdf) -> Optional[dict]:
     """Find withdrawal/deposit/balance column x positions from header row."""
     for page in pdf.pages:
+        check_deadline()
         # Ignore rotated/margin artefacts that often appear as random characters.
         words = [w for w in page.extract_words() if w.get("upright", True)]
         lines = {}
@@ -303,8 +478,11 @@ def _find_column_positions(pdf) -> Optional[dict]:
 
 
 def _parse_with_columns(
-    pdf, account_metadata: dict, header_positions: dict, account_number: Optional[str] = None
-) -> list[dict]:
+    pdf,
+    statement: Statement,
+    header_positions: dict,
+    page_indices: Optional[list[int]] = None,
+) -> list[Transaction]:
     """Parse POSB statement using word positions to map amounts to columns."""
     transactions = []
     withdrawal_x = header_positions["withdrawal_x"]
@@ -324,7 +502,13 @@ def _parse_with_columns(
             return True
         return False
 
-    for page in pdf.pages:
+    pages = (
+        pdf.pages
+        if page_indices is None
+        else [pdf.pages[index] for index in page_indices]
+    )
+    for page in pages:
+        check_deadline()
         # Ignore rotated/margin artefacts that often appear as random characters.
         words = [w for w in page.extract_words() if w.get("upright", True)]
         # Group words by line using top coordinate
@@ -334,23 +518,20 @@ def _parse_with_columns(
             lines.setdefault(top_key, []).append(word)
 
         for top in sorted(lines.keys()):
+            check_deadline()
             line_words = sorted(lines[top], key=lambda w: w["x0"])
             line_text = " ".join(w["text"] for w in line_words).strip()
 
-            if not line_text:
+            if not line_text or is_overlong(line_text):
                 continue
 
             # Section starts
             if "Balance Brought Forward" in line_text or "Balance B/F" in line_text:
                 in_section = True
                 pending_tx = None
-                bf_match = re.search(
-                    r"Balance Brought Forward(?:\s+SGD)?\s+([\d,]+\.\d{2})",
-                    line_text,
-                    re.I,
-                )
+                bf_match = _BROUGHT_FORWARD_PATTERN.search(line_text)
                 if bf_match:
-                    previous_balance = float(bf_match.group(1).replace(",", ""))
+                    previous_balance = from_cents(parse_cents(bf_match.group(1)))
                 continue
 
             # Section ends
@@ -363,7 +544,7 @@ def _parse_with_columns(
                 or line_text.startswith("Transaction Details as of")
             ):
                 if _has_meaningful_pending(pending_tx):
-                    tx = _build_transaction(pending_tx, account_metadata, account_number)
+                    tx = _build_transaction(pending_tx, statement)
                     transactions.append(tx)
                     previous_balance = pending_tx.get("balance")
                 in_section = False
@@ -374,10 +555,10 @@ def _parse_with_columns(
                 continue
 
             # Detect new transaction line by date token at start
-            date_match = re.match(r"^(\d{2}/\d{2}/\d{4})\b", line_text)
+            date_match = _DATE_PREFIX_PATTERN.match(line_text)
             if date_match:
                 if _has_meaningful_pending(pending_tx):
-                    tx = _build_transaction(pending_tx, account_metadata, account_number)
+                    tx = _build_transaction(pending_tx, statement)
                     transactions.append(tx)
                     previous_balance = pending_tx.get("balance")
 
@@ -394,15 +575,15 @@ def _parse_with_columns(
                 for w in line_words:
                     if w["text"] == date_match.group(1):
                         continue
-                    if w["x0"] < withdrawal_x - 5 and not re.match(r"^[\d,]+\.\d{2}$", w["text"]):
+                    if w["x0"] < withdrawal_x - 5 and not _AMOUNT_TOKEN_PATTERN.fullmatch(w["text"]):
                         desc_words.append(w["text"])
                 pending_tx["description"] = " ".join(desc_words).strip()
 
                 # Map numeric words to columns
                 for w in line_words:
-                    if not re.match(r"^[\d,]+\.\d{2}$", w["text"]):
+                    if not _AMOUNT_TOKEN_PATTERN.fullmatch(w["text"]):
                         continue
-                    amount = float(w["text"].replace(",", ""))
+                    amount = from_cents(parse_cents(w["text"]))
                     if withdrawal_x - 5 <= w["x0"] < deposit_x - 5:
                         pending_tx["amountOut"] = amount
                     elif deposit_x - 5 <= w["x0"] < balance_x - 5:
@@ -413,7 +594,7 @@ def _parse_with_columns(
 
             # Description continuation lines (no date, no amounts)
             if pending_tx:
-                has_amount = any(re.match(r"^[\d,]+\.\d{2}$", w["text"]) for w in line_words)
+                has_amount = any(_AMOUNT_TOKEN_PATTERN.fullmatch(w["text"]) for w in line_words)
                 if not has_amount:
                     extra_desc = [
                         w["text"] for w in line_words if w["x0"] < withdrawal_x - 5
@@ -424,7 +605,7 @@ def _parse_with_columns(
                         )
 
         if in_section and _has_meaningful_pending(pending_tx):
-            tx = _build_transaction(pending_tx, account_metadata, account_number)
+            tx = _build_transaction(pending_tx, statement)
             transactions.append(tx)
             previous_balance = pending_tx.get("balance")
             pending_tx = None
@@ -432,25 +613,15 @@ def _parse_with_columns(
     return transactions
 
 
-def _build_transaction(pending: dict, account_metadata: dict, account_number: Optional[str] = None) -> dict:
+def _build_transaction(pending: dict, statement: Statement) -> Transaction:
     """Build transaction from pending data."""
     date_parts = pending["date"].split("/")
     date_formatted = f"{date_parts[2]}-{date_parts[1]}-{date_parts[0]}"
-    transaction = {
-        "date": date_formatted,
-        "description": pending["description"],
-        "amountOut": pending.get("amountOut"),
-        "amountIn": pending.get("amountIn"),
-        "balance": pending.get("balance"),
-        "metadata": {
-            "source": "pdf",
-            "parserId": "dbs_posb_consolidated",
-            "bank": "DBS/POSB",
-            "currency": "SGD",
-            **account_metadata,
-        },
-    }
-    if account_number:
-        transaction["accountNumber"] = account_number
-        transaction["accountIdentifier"] = account_number
-    return transaction
+    return Transaction(
+        date=date_formatted,
+        description=pending["description"],
+        statement=statement,
+        amount_in=pending.get("amountIn"),
+        amount_out=pending.get("amountOut"),
+        balance=pending.get("balance"),
+    )
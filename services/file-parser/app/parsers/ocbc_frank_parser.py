@@ -2,19 +2,37 @@
 import re
 from datetime import datetime
 from dateutil import parser as date_parser
-import pdfplumber
-import io
+
+from ..deadlines import check_deadline
+from ..extraction import PDFPLUMBER, open_pdf
+from ..line_limits import is_overlong
+from ..models import Statement, Transaction, to_dicts
+from ..money import from_cents, parse_cents
+
+# Rows are read from word geometry, which needs pdfplumber
+EXTRACTION_BACKEND = PDFPLUMBER
+
+# Word-level patterns, always applied with fullmatch to a single extracted word
+_AMOUNT_TOKEN_PATTERN = re.compile(r"(?<![\d,])[\d,]++\.\d{2}")
+_DAY_TOKEN_PATTERN = re.compile(r"\d{1,2}")
+_MONTH_TOKEN_PATTERN = re.compile(r"[A-Z]{3}", re.I)
 
 
 def parse(content: bytes) -> list[dict]:
     """Parse OCBC FRANK statement using pdfplumber."""
+    return to_dicts(parse_records(content))
+
+
+def parse_records(content: bytes) -> list[Transaction]:
+    """Parse OCBC FRANK statement into compact transaction records."""
     print("\n=== OCBC Statement Parser ===")
 
-    with pdfplumber.open(io.BytesIO(content)) as pdf:
+    with open_pdf(content, EXTRACTION_BACKEND) as pdf:
         all_text = ""
         all_words = []
 
         for page in pdf.pages:
+            check_deadline()
             all_text += page.extract_text() or ""
             all_text += "\n"
             # Get words with position info
@@ -48,6 +66,7 @@ def parse(content: bytes) -> list[dict]:
         balance_x = None
 
         for page in pdf.pages:
+            check_deadline()
             page_words = page.extract_words()
             for word in page_words:
                 text_lower = word["text"].lower()
@@ -62,27 +81,36 @@ def parse(content: bytes) -> list[dict]:
 
         print(f"Column positions - Withdrawal: {withdrawal_x}, Deposit: {deposit_x}, Balance: {balance_x}")
 
+        statement = Statement(
+            metadata={
+                "source": "pdf",
+                "parserId": "ocbc_frank_statement",
+                "bank": "OCBC",
+                "currency": "SGD",
+                **account_metadata,
+            },
+            account_number=account_number,
+        )
+
         # Parse using column positions
         return _parse_with_columns(
             pdf,
-            account_metadata,
+            statement,
             current_year,
             {
                 "withdrawal_x": withdrawal_x,
                 "deposit_x": deposit_x,
                 "balance_x": balance_x,
             },
-            account_number,
         )
 
 
 def _parse_with_columns(
     pdf,
-    account_metadata: dict,
+    statement: Statement,
     current_year: int,
     header_positions: dict,
-    account_number: str = None,
-) -> list[dict]:
+) -> list[Transaction]:
     """Parse OCBC statement using word positions to map amounts to columns."""
     transactions = []
     withdrawal_x = header_positions["withdrawal_x"]
@@ -94,6 +122,7 @@ def _parse_with_columns(
     pre_description = []
 
     for page in pdf.pages:
+        check_deadline()
         words = page.extract_words()
         # Cluster words into lines using a small top tolerance to merge OCR splits
         sorted_words = sorted(words, key=lambda w: w["top"])
@@ -105,10 +134,11 @@ def _parse_with_columns(
                 clustered_lines[-1]["words"].append(word)
 
         for line in clustered_lines:
+            check_deadline()
             line_words = sorted(line["words"], key=lambda w: w["x0"])
             line_text = " ".join(w["text"] for w in line_words).strip()
 
-            if not line_text:
+            if not line_text or is_overlong(line_text):
                 continue
 
             if "BALANCE B/F" in line_text:
@@ -120,7 +150,7 @@ def _parse_with_columns(
             if in_section and "BALANCE C/F" in line_text:
                 if pending_tx:
                     transactions.append(
-                        _finalize_transaction(pending_tx, account_metadata, current_year, account_number)
+                        _finalize_transaction(pending_tx, statement, current_year)
                     )
                     pending_tx = None
                 in_section = False
@@ -134,15 +164,15 @@ def _parse_with_columns(
             date_tokens = []
             date_token_indices = set()
             for idx, w in enumerate(line_words[:-1]):
-                if re.match(r"^\d{1,2}$", w["text"]):
+                if _DAY_TOKEN_PATTERN.fullmatch(w["text"]):
                     next_word = line_words[idx + 1]["text"]
-                    if re.match(r"^[A-Z]{3}$", next_word, re.I):
+                    if _MONTH_TOKEN_PATTERN.fullmatch(next_word):
                         date_tokens.append(f"{w['text']} {next_word}")
                         date_token_indices.update({idx, idx + 1})
             if len(date_tokens) >= 2:
                 if pending_tx:
                     transactions.append(
-                        _finalize_transaction(pending_tx, account_metadata, current_year, account_number)
+                        _finalize_transaction(pending_tx, statement, current_year)
                     )
                     pending_tx = None
 
@@ -163,7 +193,7 @@ def _parse_with_columns(
                 for idx, w in enumerate(line_words):
                     if idx in date_token_indices:
                         continue
-                    if w["x0"] < withdrawal_x - 5 and not re.match(r"^[\d,]+\.\d{2}$", w["text"]):
+                    if w["x0"] < withdrawal_x - 5 and not _AMOUNT_TOKEN_PATTERN.fullmatch(w["text"]):
                         desc_words.append(w["text"])
                 if pre_description:
                     pending_tx["description"] = " ".join(pre_description).strip()
@@ -175,9 +205,9 @@ def _parse_with_columns(
 
                 # Map numeric words to columns
                 for w in line_words:
-                    if not re.match(r"^[\d,]+\.\d{2}$", w["text"]):
+                    if not _AMOUNT_TOKEN_PATTERN.fullmatch(w["text"]):
                         continue
-                    amount = float(w["text"].replace(",", ""))
+                    amount = from_cents(parse_cents(w["text"]))
                     if withdrawal_x - 5 <= w["x0"] < deposit_x - 5:
                         pending_tx["amountOut"] = amount
                     elif deposit_x - 5 <= w["x0"] < balance_x - 5:
@@ -189,7 +219,7 @@ def _parse_with_columns(
 
             # Description continuation lines
             if pending_tx:
-                has_amount = any(re.match(r"^[\d,]+\.\d{2}$", w["text"]) for w in line_words)
+                has_amount = any(_AMOUNT_TOKEN_PATTERN.fullmatch(w["text"]) for w in line_words)
                 if not has_amount:
                     extra_desc = [
                         w["text"] for w in line_words if w["x0"] < withdrawal_x - 5
@@ -200,16 +230,16 @@ def _parse_with_columns(
                         )
             else:
                 # Capture description lines that appear before the transaction line
-                has_amount = any(re.match(r"^[\d,]+\.\d{2}$", w["text"]) for w in line_words)
+                has_amount = any(_AMOUNT_TOKEN_PATTERN.fullmatch(w["text"]) for w in line_words)
                 has_date = any(
-                    re.match(r"^\d{1,2}$", w["text"]) for w in line_words
-                ) and any(re.match(r"^[A-Z]{3}$", w["text"], re.I) for w in line_words)
+                    _DAY_TOKEN_PATTERN.fullmatch(w["text"]) for w in line_words
+                ) and any(_MONTH_TOKEN_PATTERN.fullmatch(w["text"]) for w in line_words)
                 if not has_amount and not has_date:
                     pre_description.extend([w["text"] for w in line_words])
 
         if in_section and pending_tx:
             transactions.append(
-                _finalize_transaction(pending_tx, account_metadata, current_year, account_number)
+                _finalize_transaction(pending_tx, statement, current_year)
             )
             pending_tx = None
 
@@ -219,10 +249,9 @@ def _parse_with_columns(
 
 def _finalize_transaction(
     pending_tx: dict,
-    account_metadata: dict,
+    statement: Statement,
     current_year: int,
-    account_number: str = None,
-) -> dict:
+) -> Transaction:
     """Convert pending OCBC transaction to final format without balance inference."""
     trans_date = pending_tx["trans_date"]
 
@@ -232,21 +261,11 @@ def _finalize_transaction(
     except:
         date_formatted = trans_date
 
-    transaction = {
-        "date": date_formatted,
-        "description": pending_tx["description"].strip(),
-        "amountOut": pending_tx.get("amountOut"),
-        "amountIn": pending_tx.get("amountIn"),
-        "balance": pending_tx.get("balance"),
-        "metadata": {
-            "source": "pdf",
-            "parserId": "ocbc_frank_statement",
-            "bank": "OCBC",
-            "currency": "SGD",
-            **account_metadata,
-        },
-    }
-    if account_number:
-        transaction["accountNumber"] = account_number
-        transaction["accountIdentifier"] = account_number
-    return transaction
+    return Transaction(
+        date=date_formatted,
+        description=pending_tx["description"].strip(),
+        statement=statement,
+        amount_in=pending_tx.get("amountIn"),
+        amount_out=pending_tx.get("amountOut"),
+        balance=pending_tx.get("balance"),
+    )
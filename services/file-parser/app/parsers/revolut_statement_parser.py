@@ -1,31 +1,57 @@
 """Revolut statement parser for trip workflows."""
 import csv
+import heapq
 import io
 import re
+from bisect import bisect_left, bisect_right
+from collections import deque
+from datetime import date
+from functools import lru_cache
 from typing import Optional
 
-import pdfplumber
 from dateutil import parser as date_parser
 
-
-def _parse_money(value: str) -> Optional[float]:
-    cleaned = re.sub(r"[^0-9.]", "", value or "")
-    if not cleaned:
-        return None
-    try:
-        return float(cleaned)
-    except ValueError:
-        return None
-
-
-def _parse_signed_money(value: str) -> Optional[float]:
-    cleaned = re.sub(r"[^0-9.\-]", "", value or "")
-    if not cleaned or cleaned in {"-", ".", "-."}:
-        return None
-    try:
-        return float(cleaned)
-    except ValueError:
-        return None
+from ..deadlines import check_deadline
+from ..extraction import PDFIUM, open_pdf
+from ..line_limits import is_overlong
+from ..models import Statement, Transaction, to_dicts
+from ..money import from_cents, parse_cents, parse_decimal, to_cents
+
+# The PDF path only reads text lines, so PDFium's text layer is enough
+EXTRACTION_BACKEND = PDFIUM
+
+# Linear-time line patterns. Possessive quantifiers and atomic groups keep runs of
+# spaces or digits from being re-scanned, and the lookbehinds stop amount tokens
+# from being retried at every position inside a long run of digits.
+_DATE_PREFIX_PATTERN = re.compile(r"^(\d{1,2}\s++[A-Za-z]{3,9}\s++\d{4})\s++(.+)$")
+_AMOUNT_TOKEN_PATTERN = re.compile(
+    r"(?:[A-Z]{3}\s*+)?(?:S\$|US\$|HK\$|\$|¥|€|£)?(?:(?<!\s)\s++)?(?<!\d)(?<!\d,)(\d[\d,]*+\.\d{2})"
+)
+_FOOTER_PATTERN = re.compile(
+    r"^(Report lost|Get help directly|Scan the QR code|©\s+\d{4}\s+Revolut)",
+    re.I,
+)
+_FEE_PATTERN = re.compile(
+    r"\bfee\b(?:[^0-9A-Z.]|\.(?:(?!\d)|(?=[\d,]*+\.\d{2})))*+(?:S\$\s*+)?([\d,]*+\.\d{2})(?:\s*+([A-Z]{3}))?",
+    re.I,
+)
+_RATE_PATTERN = re.compile(r"Revolut Rate\s++S\$1\.00\s*+=\s*+((?>[\d,]*\.?\d+))\s*+([A-Z]{3})")
+_TRAILING_FOREIGN_AMOUNT_PATTERN = re.compile(r"(?<![\d,])((?>[\d,]*\.?\d+))\s*+([A-Z]{3})\s*+$")
+
+# Tolerances for the second PDF/CSV merge pass. Rows that miss the exact key can still
+# pair up when the completed dates differ by a timezone shift, the PDF description is
+# truncated, or fee rounding moves the amount by a few cents.
+FUZZY_MATCH_DEFAULTS = {
+    "enabled": True,
+    "dateWindowDays": 2,
+    "amountTolerance": 0.05,
+    "minDescriptionSimilarity": 0.6,
+}
+
+
+def _money_field_cents(value) -> int:
+    """Cents for an amount already on a row or in metadata, treating blanks as zero."""
+    return abs(to_cents(value) or 0)
 
 
 def _infer_direction(description: str) -> str:
@@ -85,6 +111,7 @@ def _try_parse_date(value: str) -> str:
         return value
 
 
+@lru_cache(maxsize=8192)
 def _normalize_ymd(value: str) -> Optional[str]:
     if not value:
         return None
@@ -98,27 +125,27 @@ def _normalize_description(value: str) -> str:
     return re.sub(r"\s+", " ", value or "").strip().lower()
 
 
-def _statement_direction_amount(transaction: dict) -> Optional[tuple[str, float]]:
-    amount_in = _parse_money(str(transaction.get("amountIn") or ""))
-    amount_out = _parse_money(str(transaction.get("amountOut") or ""))
-    if amount_in and amount_in > 0:
-        return ("in", round(amount_in, 2))
-    if amount_out and amount_out > 0:
-        return ("out", round(amount_out, 2))
+def _statement_direction_amount(transaction: dict) -> Optional[tuple[str, int]]:
+    """Return (direction, amount in cents) for a parsed row."""
+    amount_in = _money_field_cents(transaction.get("amountIn"))
+    if amount_in > 0:
+        return ("in", amount_in)
+    amount_out = _money_field_cents(transaction.get("amountOut"))
+    if amount_out > 0:
+        return ("out", amount_out)
     return None
 
 
-def _apply_embedded_fee_amount(transaction: dict) -> dict:
-    metadata_raw = transaction.get("metadata")
-    metadata = metadata_raw if isinstance(metadata_raw, dict) else {}
+def _apply_embedded_fee_amount(transaction: Transaction) -> Transaction:
+    metadata = transaction.row_metadata
     if metadata.get("feeEmbeddedApplied"):
         return transaction
 
-    fee_amount = _parse_money(str(metadata.get("feeAmount") or ""))
-    source_tag = str(metadata.get("source") or "").lower()
-    amount_in = _parse_money(str(transaction.get("amountIn") or ""))
-    amount_out = _parse_money(str(transaction.get("amountOut") or ""))
-    if not (fee_amount and fee_amount > 0):
+    fee_cents = _money_field_cents(metadata.get("feeAmount"))
+    source_tag = str(transaction.statement.metadata.get("source") or "").lower()
+    amount_in = _money_field_cents(transaction.amount_in)
+    amount_out = _money_field_cents(transaction.amount_out)
+    if fee_cents <= 0:
         return transaction
 
     # Fee embedding rules requested for Revolut:
@@ -127,17 +154,22 @@ def _apply_embedded_fee_amount(transaction: dict) -> dict:
     #   * outgoing rows: fee is additional outflow => add fee to amountOut
     #   * incoming/topup rows: fee reduces credited value => subtract fee from amountIn
     if source_tag == "csv":
-        if amount_out and amount_out > 0:
-            transaction["amountOut"] = round(amount_out + fee_amount, 4)
-        if amount_in and amount_in > 0:
-            transaction["amountIn"] = round(max(amount_in - fee_amount, 0), 4)
+        if amount_out > 0:
+            transaction.amount_out = from_cents(amount_out + fee_cents)
+        if amount_in > 0:
+            transaction.amount_in = from_cents(max(amount_in - fee_cents, 0))
 
     metadata["feeEmbeddedApplied"] = True
-    transaction["metadata"] = metadata
     return transaction
 
 
-def _pdf_match_key(transaction: dict) -> Optional[tuple[str, str, float, str]]:
+def _row_currency(transaction: dict) -> str:
+    """Wallet currency of a row: each PDF covers one currency, CSV rows carry their own."""
+    metadata = transaction.get("metadata") if isinstance(transaction.get("metadata"), dict) else {}
+    return str(transaction.get("currency") or metadata.get("currency") or "").upper()
+
+
+def _pdf_match_key(transaction: dict) -> Optional[tuple[str, str, str, int, str]]:
     direction_amount = _statement_direction_amount(transaction)
     if not direction_amount:
         return None
@@ -146,10 +178,10 @@ def _pdf_match_key(transaction: dict) -> Optional[tuple[str, str, float, str]]:
     if not date_value or not description:
         return None
     direction, amount = direction_amount
-    return (date_value, direction, amount, description)
+    return (_row_currency(transaction), date_value, direction, amount, description)
 
 
-def _csv_match_key(transaction: dict) -> Optional[tuple[str, str, float, str]]:
+def _csv_match_key(transaction: dict) -> Optional[tuple[str, str, str, int, str]]:
     metadata = (
         transaction.get("metadata")
         if isinstance(transaction.get("metadata"), dict)
@@ -161,18 +193,22 @@ def _csv_match_key(transaction: dict) -> Optional[tuple[str, str, float, str]]:
     if not completed_date or not direction_amount or not description:
         return None
     direction, amount = direction_amount
-    return (completed_date, direction, amount, description)
+    return (_row_currency(transaction), completed_date, direction, amount, description)
 
 
-def _parse_pdf_transactions(content: bytes) -> list[dict]:
-    """Parse Revolut PDF statement into normalized transaction rows."""
-    transactions = []
+def _parse_pdf_transactions(content: bytes) -> list[Transaction]:
+    """Parse Revolut PDF statement into normalized transaction records."""
+    transactions: list[Transaction] = []
     lines: list[str] = []
 
-    with pdfplumber.open(io.BytesIO(content)) as pdf:
+    with open_pdf(content, EXTRACTION_BACKEND) as pdf:
         for page in pdf.pages:
+            check_deadline()
             text = page.extract_text() or ""
-            lines.extend([line.strip() for line in text.split("\n") if line.strip()])
+            for line in text.split("\n"):
+                line = line.strip()
+                if line and not is_overlong(line):
+                    lines.append(line)
 
     all_text = "\n".join(lines)
     account_identifier = None
@@ -186,31 +222,33 @@ def _parse_pdf_transactions(content: bytes) -> list[dict]:
     if currency_match:
         currency = currency_match.group(1)
 
-    date_prefix_pattern = re.compile(r"^(\d{1,2}\s+[A-Za-z]{3,9}\s+\d{4})\s+(.+)$")
-    amount_token_pattern = re.compile(
-        r"(?:[A-Z]{3}\s*)?(?:S\$|US\$|HK\$|\$|¥|€|£)?\s*(\d[\d,]*\.\d{2})"
-    )
-    footer_pattern = re.compile(
-        r"^(Report lost|Get help directly|Scan the QR code|©\s+\d{4}\s+Revolut)",
-        re.I,
-    )
+    statement_metadata = {
+        "source": "pdf",
+        "parserId": "revolut_statement",
+        "provider": "Revolut",
+        "currency": currency,
+    }
+    if account_identifier:
+        statement_metadata["accountIdentifier"] = account_identifier
+    statement = Statement(metadata=statement_metadata, account_number=account_identifier)
 
     current_tx = None
 
     def finalize_current():
         if current_tx:
-            transactions.append(current_tx.copy())
+            transactions.append(current_tx)
 
     for line in lines:
-        if footer_pattern.match(line):
+        check_deadline()
+        if _FOOTER_PATTERN.match(line):
             continue
         if line in {"Date Description Money out Money in Balance"}:
             continue
 
-        tx_match = date_prefix_pattern.match(line)
+        tx_match = _DATE_PREFIX_PATTERN.match(line)
         if tx_match:
             remainder = tx_match.group(2).strip()
-            amount_tokens = list(amount_token_pattern.finditer(remainder))
+            amount_tokens = list(_AMOUNT_TOKEN_PATTERN.finditer(remainder))
             if not amount_tokens:
                 continue
 
@@ -225,151 +263,139 @@ def _parse_pdf_transactions(content: bytes) -> list[dict]:
             finalize_current()
 
             date_text = tx_match.group(1)
-            amount = _parse_money(amount_token.group(1)) or 0
-            balance = _parse_money(balance_token.group(1) if balance_token else "")
+            amount = from_cents(parse_cents(amount_token.group(1)) or 0)
+            balance = from_cents(parse_cents(balance_token.group(1)) if balance_token else None)
 
             direction = _infer_direction(description)
             amount_in = amount if direction == "in" else None
             amount_out = amount if direction == "out" else None
 
-            metadata = {
-                "source": "pdf",
-                "parserId": "revolut_statement",
-                "provider": "Revolut",
-                "currency": currency,
-                "transactionType": _transaction_type(description),
-                "statementAmount": amount,
-                "completedDate": _try_parse_date(date_text),
-            }
-            if account_identifier:
-                metadata["accountIdentifier"] = account_identifier
-
-            current_tx = {
-                "date": _try_parse_date(date_text),
-                "description": description,
-                "amountIn": amount_in,
-                "amountOut": amount_out,
-                "balance": balance,
-                "currency": currency,
-                "metadata": metadata,
-            }
-            if account_identifier:
-                current_tx["accountIdentifier"] = account_identifier
-                current_tx["accountNumber"] = account_identifier
+            current_tx = Transaction(
+                date=_try_parse_date(date_text),
+                description=description,
+                statement=statement,
+                amount_in=amount_in,
+                amount_out=amount_out,
+                balance=balance,
+                currency=currency,
+                extra={
+                    "transactionType": _transaction_type(description),
+                    "statementAmount": amount,
+                    "completedDate": _try_parse_date(date_text),
+                },
+            )
             continue
 
         if not current_tx:
             continue
 
-        fee_match = re.search(
-            r"\bfee\b[^0-9A-Z]*(?:S\$|¥|\$)?\s*([\d,]*\.\d{2})(?:\s*([A-Z]{3}))?",
-            line,
-            re.I,
-        )
+        fee_match = _FEE_PATTERN.search(line)
         if fee_match:
-            current_tx["metadata"]["feeAmount"] = _parse_money(fee_match.group(1))
-            current_tx["metadata"]["feeCurrency"] = (
+            current_tx.row_metadata["feeAmount"] = from_cents(parse_cents(fee_match.group(1)))
+            current_tx.row_metadata["feeCurrency"] = (
                 fee_match.group(2).upper() if fee_match.group(2) else currency
             )
             continue
 
         if line.startswith("Revolut Rate"):
-            rate_match = re.search(
-                r"Revolut Rate\s+S\$1\.00\s*=\s*([\d,]*\.?\d+)\s*([A-Z]{3})",
-                line,
-            )
-            foreign_match = re.search(r"([\d,]*\.?\d+)\s*([A-Z]{3})\s*$", line)
+            rate_match = _RATE_PATTERN.search(line)
+            foreign_match = _TRAILING_FOREIGN_AMOUNT_PATTERN.search(line)
             if rate_match:
-                current_tx["metadata"]["fxRate"] = _parse_money(rate_match.group(1))
+                current_tx.row_metadata["fxRate"] = parse_decimal(rate_match.group(1))
                 rate_currency = rate_match.group(2)
-                if current_tx["metadata"].get("transactionType") == "conversion":
-                    current_tx["metadata"]["foreignCurrency"] = rate_currency
+                if current_tx.row_metadata.get("transactionType") == "conversion":
+                    current_tx.row_metadata["foreignCurrency"] = rate_currency
                 else:
-                    current_tx["metadata"]["merchantCurrency"] = rate_currency
+                    current_tx.row_metadata["merchantCurrency"] = rate_currency
             if foreign_match:
-                foreign_amount = _parse_money(foreign_match.group(1))
+                foreign_amount = from_cents(parse_cents(foreign_match.group(1)))
                 foreign_currency = foreign_match.group(2)
-                current_tx["metadata"]["foreignAmount"] = foreign_amount
+                current_tx.row_metadata["foreignAmount"] = foreign_amount
                 # Keep conversion rows using foreignCurrency for wallet transfer logic.
                 # For non-conversion rows, preserve merchant currency separately so
                 # statement wallet currency remains authoritative.
-                if current_tx["metadata"].get("transactionType") == "conversion":
-                    current_tx["metadata"]["foreignCurrency"] = foreign_currency
+                if current_tx.row_metadata.get("transactionType") == "conversion":
+                    current_tx.row_metadata["foreignCurrency"] = foreign_currency
                 else:
-                    current_tx["metadata"]["merchantCurrency"] = foreign_currency
-            if current_tx["metadata"].get("transactionType") == "conversion":
-                statement_amount = _parse_money(
-                    str(current_tx["metadata"].get("statementAmount") or "")
-                ) or 0
-                foreign_amount = _parse_money(
-                    str(current_tx["metadata"].get("foreignAmount") or "")
-                ) or 0
-                statement_currency = current_tx["metadata"].get("currency") or currency
-                foreign_currency = current_tx["metadata"].get("foreignCurrency")
+                    current_tx.row_metadata["merchantCurrency"] = foreign_currency
+            if current_tx.row_metadata.get("transactionType") == "conversion":
+                statement_amount = from_cents(
+                    _money_field_cents(current_tx.row_metadata.get("statementAmount"))
+                )
+                foreign_amount = from_cents(
+                    _money_field_cents(current_tx.row_metadata.get("foreignAmount"))
+                )
+                statement_currency = currency
+                foreign_currency = current_tx.row_metadata.get("foreignCurrency")
                 if foreign_amount > 0 and foreign_currency:
                     # Revolut exchange rows are represented as one statement amount and one foreign amount.
                     # We normalize them so the importer can create internal wallet transfer entries.
-                    if current_tx.get("amountOut"):
-                        current_tx["metadata"]["fromAmount"] = statement_amount
-                        current_tx["metadata"]["fromCurrency"] = statement_currency
-                        current_tx["metadata"]["toAmount"] = foreign_amount
-                        current_tx["metadata"]["toCurrency"] = foreign_currency
-                    elif current_tx.get("amountIn"):
-                        current_tx["metadata"]["fromAmount"] = foreign_amount
-                        current_tx["metadata"]["fromCurrency"] = foreign_currency
-                        current_tx["metadata"]["toAmount"] = statement_amount
-                        current_tx["metadata"]["toCurrency"] = statement_currency
+                    if current_tx.amount_out:
+                        current_tx.row_metadata["fromAmount"] = statement_amount
+                        current_tx.row_metadata["fromCurrency"] = statement_currency
+                        current_tx.row_metadata["toAmount"] = foreign_amount
+                        current_tx.row_metadata["toCurrency"] = foreign_currency
+                    elif current_tx.amount_in:
+                        current_tx.row_metadata["fromAmount"] = foreign_amount
+                        current_tx.row_metadata["fromCurrency"] = foreign_currency
+                        current_tx.row_metadata["toAmount"] = statement_amount
+                        current_tx.row_metadata["toCurrency"] = statement_currency
             continue
 
         if line.startswith("From:"):
-            current_tx["metadata"]["from"] = line.replace("From:", "", 1).strip()
+            current_tx.row_metadata["from"] = line.replace("From:", "", 1).strip()
             continue
 
         if line.startswith("To:"):
-            current_tx["metadata"]["to"] = line.replace("To:", "", 1).strip()
+            current_tx.row_metadata["to"] = line.replace("To:", "", 1).strip()
             continue
 
         if line.startswith("Reference:"):
-            current_tx["metadata"]["reference"] = line.replace("Reference:", "", 1).strip()
+            current_tx.row_metadata["reference"] = line.replace("Reference:", "", 1).strip()
             continue
 
     finalize_current()
     return [_apply_embedded_fee_amount(transaction) for transaction in transactions]
 
 
-def _parse_csv_transactions(content: bytes) -> list[dict]:
-    """Parse Revolut CSV export into normalized transaction rows."""
+def _parse_csv_transactions(content: bytes) -> list[Transaction]:
+    """Parse Revolut CSV export into normalized transaction records."""
     try:
         text = content.decode("utf-8-sig")
     except UnicodeDecodeError:
         text = content.decode("latin-1")
 
     reader = csv.DictReader(io.StringIO(text))
-    transactions: list[dict] = []
+    transactions: list[Transaction] = []
+    statement = Statement(
+        metadata={
+            "source": "csv",
+            "parserId": "revolut_statement",
+            "provider": "Revolut",
+        }
+    )
 
     for row in reader:
+        check_deadline()
         description = (row.get("Description") or "").strip() or "Revolut Transaction"
         currency = (row.get("Currency") or "SGD").strip().upper() or "SGD"
-        amount_signed = _parse_signed_money(str(row.get("Amount") or ""))
-        if amount_signed is None:
+        amount_cents = parse_cents(row.get("Amount"))
+        if amount_cents is None:
             continue
 
-        amount_abs = abs(amount_signed)
-        amount_in = amount_abs if amount_signed > 0 else None
-        amount_out = amount_abs if amount_signed < 0 else None
+        amount_abs = from_cents(abs(amount_cents))
+        amount_in = amount_abs if amount_cents > 0 else None
+        amount_out = amount_abs if amount_cents < 0 else None
 
         started_date_raw = str(row.get("Started Date") or "").strip()
         completed_date_raw = str(row.get("Completed Date") or "").strip()
-        balance = _parse_signed_money(str(row.get("Balance") or ""))
-        fee_amount = _parse_signed_money(str(row.get("Fee") or ""))
+        balance = from_cents(parse_cents(row.get("Balance")))
+        fee_cents = parse_cents(row.get("Fee"))
         csv_type = str(row.get("Type") or "").strip()
         csv_state = str(row.get("State") or "").strip()
         transaction_date = _try_parse_date(started_date_raw or completed_date_raw)
 
         metadata = {
-            "source": "csv",
-            "parserId": "revolut_statement",
-            "provider": "Revolut",
             "currency": currency,
             "transactionType": _transaction_type_from_csv_type(csv_type, description),
             "csvType": csv_type,
@@ -377,96 +403,254 @@ def _parse_csv_transactions(content: bytes) -> list[dict]:
             "startedDate": started_date_raw,
             "completedDate": completed_date_raw,
         }
-        if fee_amount is not None:
-            metadata["feeAmount"] = abs(fee_amount)
+        if fee_cents is not None:
+            metadata["feeAmount"] = from_cents(abs(fee_cents))
             metadata["feeCurrency"] = currency
 
         transactions.append(
-            {
-                "date": transaction_date,
-                "description": description,
-                "amountIn": amount_in,
-                "amountOut": amount_out,
-                "balance": balance,
-                "currency": currency,
-                "metadata": metadata,
-            }
+            Transaction(
+                date=transaction_date,
+                description=description,
+                statement=statement,
+                amount_in=amount_in,
+                amount_out=amount_out,
+                balance=balance,
+                currency=currency,
+                extra=metadata,
+            )
         )
 
     return [_apply_embedded_fee_amount(transaction) for transaction in transactions]
 
 
+def _merge_matched_pair(pdf_tx: dict, csv_tx: dict) -> dict:
+    """Combine a matched PDF row with its CSV counterpart, preferring PDF values."""
+    merged_tx = dict(pdf_tx)
+
+    merged_metadata: dict = {}
+    pdf_metadata = pdf_tx.get("metadata")
+    if isinstance(pdf_metadata, dict):
+        merged_metadata.update(pdf_metadata)
+    csv_metadata = csv_tx.get("metadata")
+    if isinstance(csv_metadata, dict):
+        for field in (
+            "csvType",
+            "csvState",
+            "startedDate",
+            "completedDate",
+            "feeAmount",
+            "feeCurrency",
+        ):
+            value = csv_metadata.get(field)
+            if value not in (None, ""):
+                merged_metadata[field] = value
+
+    merged_metadata["source"] = "pdf+csv"
+    started_date = (
+        csv_metadata.get("startedDate")
+        if isinstance(csv_metadata, dict)
+        else None
+    )
+    if started_date:
+        merged_tx["date"] = _try_parse_date(str(started_date))
+
+    if merged_tx.get("balance") is None and csv_tx.get("balance") is not None:
+        merged_tx["balance"] = csv_tx.get("balance")
+    if merged_tx.get("amountIn") is None:
+        merged_tx["amountIn"] = csv_tx.get("amountIn")
+    if merged_tx.get("amountOut") is None:
+        merged_tx["amountOut"] = csv_tx.get("amountOut")
+    if not merged_tx.get("currency") and csv_tx.get("currency"):
+        merged_tx["currency"] = csv_tx.get("currency")
+
+    merged_tx["metadata"] = merged_metadata
+    return merged_tx
+
+
+def _description_similarity(left: str, right: str) -> float:
+    """Dice coefficient over character bigrams; truncated prefixes count as a full match."""
+    if left == right:
+        return 1.0
+    if not left or not right:
+        return 0.0
+    shorter, longer = (left, right) if len(left) <= len(right) else (right, left)
+    if len(shorter) >= 8 and longer.startswith(shorter):
+        return 1.0
+    if len(left) < 2 or len(right) < 2:
+        return 0.0
+
+    left_bigrams: dict[str, int] = {}
+    for index in range(len(left) - 1):
+        bigram = left[index : index + 2]
+        left_bigrams[bigram] = left_bigrams.get(bigram, 0) + 1
+    overlap = 0
+    for index in range(len(right) - 1):
+        bigram = right[index : index + 2]
+        remaining = left_bigrams.get(bigram, 0)
+        if remaining:
+            left_bigrams[bigram] = remaining - 1
+            overlap += 1
+    return (2.0 * overlap) / ((len(left) - 1) + (len(right) - 1))
+
+
+def _fuzzy_match_fields(transaction: dict, date_value: Optional[str]) -> Optional[tuple[str, int, int, str]]:
+    """Return (direction, amount cents, date ordinal, normalized description) for fuzzy indexing."""
+    direction_amount = _statement_direction_amount(transaction)
+    if not direction_amount or not date_value:
+        return None
+    direction, amount_cents = direction_amount
+    date_ordinal = date.fromisoformat(date_value).toordinal()
+    description = _normalize_description(str(transaction.get("description") or ""))
+    return (direction, amount_cents, date_ordinal, description)
+
+
+def _fuzzy_match_pairs(
+    pdf_transactions: list[dict],
+    csv_transactions: list[dict],
+    pdf_indices: list[int],
+    csv_indices: list[int],
+    match_config: dict,
+) -> list[tuple[int, int, float]]:
+    """Pair leftover PDF/CSV rows through a (currency, direction, amount, date) sorted index.
+
+    Candidates are found by bisecting the amount range per currency and direction,
+    then bisecting the date window within each amount, so many same-amount rows
+    (recurring fares, subscriptions) are never walked one by one. They are accepted
+    greedily in order of ascending cost so each row is used at most once.
+    """
+    date_window = int(match_config["dateWindowDays"])
+    amount_tolerance = abs(to_cents(match_config["amountTolerance"]) or 0)
+    min_similarity = float(match_config["minDescriptionSimilarity"])
+
+    index_by_direction: dict[tuple[str, str], dict[int, list[tuple[int, int]]]] = {}
+    csv_fields: dict[int, tuple[str, int, int, str]] = {}
+    for csv_index in csv_indices:
+        csv_tx = csv_transactions[csv_index]
+        metadata = csv_tx.get("metadata") if isinstance(csv_tx.get("metadata"), dict) else {}
+        fields = _fuzzy_match_fields(
+            csv_tx, _normalize_ymd(str(metadata.get("completedDate") or ""))
+        )
+        if not fields:
+            continue
+        csv_fields[csv_index] = fields
+        direction, amount_cents, date_ordinal, _ = fields
+        index_by_direction.setdefault((_row_currency(csv_tx), direction), {}).setdefault(
+            amount_cents, []
+        ).append((date_ordinal, csv_index))
+    amounts_by_direction = {key: sorted(by_amount) for key, by_amount in index_by_direction.items()}
+    days_by_amount = {}
+    for key, by_amount in index_by_direction.items():
+        for amount_cents, entries in by_amount.items():
+            entries.sort()
+            days_by_amount[(key, amount_cents)] = [entry[0] for entry in entries]
+
+    candidates: list[tuple[float, int, int]] = []
+    for pdf_index in pdf_indices:
+        check_deadline()
+        pdf_tx = pdf_transactions[pdf_index]
+        fields = _fuzzy_match_fields(pdf_tx, _normalize_ymd(str(pdf_tx.get("date") or "")))
+        if not fields:
+            continue
+        direction, amount_cents, date_ordinal, description = fields
+        key = (_row_currency(pdf_tx), direction)
+        amounts = amounts_by_direction.get(key)
+        if not amounts:
+            continue
+
+        low = bisect_left(amounts, amount_cents - amount_tolerance)
+        high = bisect_right(amounts, amount_cents + amount_tolerance)
+        for csv_amount in amounts[low:high]:
+            days = days_by_amount[(key, csv_amount)]
+            first = bisect_left(days, date_ordinal - date_window)
+            last = bisect_right(days, date_ordinal + date_window)
+            for csv_date, csv_index in index_by_direction[key][csv_amount][first:last]:
+                similarity = _description_similarity(description, csv_fields[csv_index][3])
+                if similarity < min_similarity:
+                    continue
+                cost = (
+                    abs(csv_date - date_ordinal) / (date_window + 1)
+                    + abs(csv_amount - amount_cents) / (amount_tolerance + 1)
+                    + (1.0 - similarity)
+                )
+                candidates.append((cost, pdf_index, csv_index))
+
+    candidates.sort()
+    used_pdf: set[int] = set()
+    used_csv: set[int] = set()
+    pairs: list[tuple[int, int, float]] = []
+    for cost, pdf_index, csv_index in candidates:
+        if pdf_index in used_pdf or csv_index in used_csv:
+            continue
+        used_pdf.add(pdf_index)
+        used_csv.add(csv_index)
+        pairs.append((pdf_index, csv_index, cost))
+    return pairs
+
+
 def _merge_pdf_and_csv_transactions(
-    pdf_transactions: list[dict], csv_transactions: list[dict]
+    pdf_transactions: list[dict],
+    csv_transactions: list[dict],
+    match_config: Optional[dict] = None,
 ) -> list[dict]:
-    """Merge Revolut PDF + CSV rows by completed date, in/out, and description."""
-    csv_by_key: dict[tuple[str, str, float, str], list[int]] = {}
+    """Merge Revolut PDF + CSV rows by completed date, in/out, and description.
+
+    Rows that do not match exactly get a second, tolerance-based pass (see
+    FUZZY_MATCH_DEFAULTS) so timezone date shifts, truncated descriptions and fee
+    rounding do not leave both copies in the result.
+    """
+    config = {**FUZZY_MATCH_DEFAULTS, **(match_config or {})}
+
+    csv_by_key: dict[tuple[str, str, str, int, str], deque[int]] = {}
     for index, csv_tx in enumerate(csv_transactions):
         key = _csv_match_key(csv_tx)
         if not key:
             continue
-        csv_by_key.setdefault(key, []).append(index)
+        csv_by_key.setdefault(key, deque()).append(index)
 
     unmatched_csv = set(range(len(csv_transactions)))
-    merged_transactions: list[dict] = []
+    csv_match_by_pdf: dict[int, int] = {}
 
-    for pdf_tx in pdf_transactions:
+    for pdf_index, pdf_tx in enumerate(pdf_transactions):
         key = _pdf_match_key(pdf_tx)
-        csv_match_index = None
-
-        if key:
-            candidate_indices = csv_by_key.get(key) or []
-            while candidate_indices:
-                candidate = candidate_indices.pop(0)
-                if candidate in unmatched_csv:
-                    csv_match_index = candidate
-                    break
+        if not key:
+            continue
+        candidate_indices = csv_by_key.get(key)
+        while candidate_indices:
+            candidate = candidate_indices.popleft()
+            if candidate in unmatched_csv:
+                csv_match_by_pdf[pdf_index] = candidate
+                unmatched_csv.discard(candidate)
+                break
+
+    fuzzy_costs: dict[int, float] = {}
+    if config.get("enabled", True) and unmatched_csv:
+        unmatched_pdf = [
+            index for index in range(len(pdf_transactions)) if index not in csv_match_by_pdf
+        ]
+        for pdf_index, csv_index, cost in _fuzzy_match_pairs(
+            pdf_transactions,
+            csv_transactions,
+            unmatched_pdf,
+            sorted(unmatched_csv),
+            config,
+        ):
+            csv_match_by_pdf[pdf_index] = csv_index
+            unmatched_csv.discard(csv_index)
+            fuzzy_costs[pdf_index] = cost
 
+    merged_transactions: list[dict] = []
+    for pdf_index, pdf_tx in enumerate(pdf_transactions):
+        csv_match_index = csv_match_by_pdf.get(pdf_index)
         if csv_match_index is None:
             merged_transactions.append(pdf_tx)
             continue
 
-        unmatched_csv.discard(csv_match_index)
-        csv_tx = csv_transactions[csv_match_index]
-        merged_tx = dict(pdf_tx)
-
-        merged_metadata: dict = {}
-        pdf_metadata = pdf_tx.get("metadata")
-        if isinstance(pdf_metadata, dict):
-            merged_metadata.update(pdf_metadata)
-        csv_metadata = csv_tx.get("metadata")
-        if isinstance(csv_metadata, dict):
-            for field in (
-                "csvType",
-                "csvState",
-                "startedDate",
-                "completedDate",
-                "feeAmount",
-                "feeCurrency",
-            ):
-                value = csv_metadata.get(field)
-                if value not in (None, ""):
-                    merged_metadata[field] = value
-
-        merged_metadata["source"] = "pdf+csv"
-        started_date = (
-            csv_metadata.get("startedDate")
-            if isinstance(csv_metadata, dict)
-            else None
-        )
-        if started_date:
-            merged_tx["date"] = _try_parse_date(str(started_date))
-
-        if merged_tx.get("balance") is None and csv_tx.get("balance") is not None:
-            merged_tx["balance"] = csv_tx.get("balance")
-        if merged_tx.get("amountIn") is None:
-            merged_tx["amountIn"] = csv_tx.get("amountIn")
-        if merged_tx.get("amountOut") is None:
-            merged_tx["amountOut"] = csv_tx.get("amountOut")
-        if not merged_tx.get("currency") and csv_tx.get("currency"):
-            merged_tx["currency"] = csv_tx.get("currency")
-
-        merged_tx["metadata"] = merged_metadata
+        merged_tx = _merge_matched_pair(pdf_tx, csv_transactions[csv_match_index])
+        if pdf_index in fuzzy_costs:
+            merged_tx["metadata"]["mergeMatch"] = "fuzzy"
+            merged_tx["metadata"]["mergeCost"] = round(fuzzy_costs[pdf_index], 4)
+        else:
+            merged_tx["metadata"]["mergeMatch"] = "exact"
         merged_transactions.append(merged_tx)
 
     for index, csv_tx in enumerate(csv_transactions):
@@ -482,56 +666,105 @@ def _detect_format(content: bytes) -> str:
     return "csv"
 
 
-def _sort_transactions_by_date(transactions: list[dict]) -> list[dict]:
-    decorated: list[tuple[tuple[int, int, int], int, dict]] = []
-    for index, transaction in enumerate(transactions):
-        normalized_date = _normalize_ymd(str(transaction.get("date") or ""))
-        if normalized_date:
-            year, month, day = normalized_date.split("-")
-            sort_key = (0, int(year), int(month), int(day))
-        else:
-            sort_key = (1, 0, 0, 0)
-        decorated.append((sort_key, index, transaction))
+def _date_sort_key(transaction: dict) -> tuple[int, str]:
+    normalized_date = _normalize_ymd(str(transaction.get("date") or ""))
+    return (0, normalized_date) if normalized_date else (1, "")
+
+
+def _merge_sorted_streams(streams: list[list[dict]]) -> list[dict]:
+    """Date-ordered rows of all streams; ties keep stream order, then row order.
 
-    decorated.sort(key=lambda item: (item[0], item[1]))
-    return [item[2] for item in decorated]
+    Each stream is keyed once and sorted on its own (statement rows are nearly in
+    date order already, so this is close to linear), then the streams are combined
+    with a k-way heap merge. The result equals a stable date sort of the streams
+    concatenated in order, and rows without a date go last.
+    """
+    keyed_streams = []
+    for stream_index, stream in enumerate(streams):
+        keyed = [
+            (_date_sort_key(transaction), stream_index, position, transaction)
+            for position, transaction in enumerate(stream)
+        ]
+        keyed.sort(key=lambda item: item[:3])
+        keyed_streams.append(keyed)
+    return [item[3] for item in heapq.merge(*keyed_streams, key=lambda item: item[:3])]
 
 
 def parse(content: bytes) -> list[dict]:
     """Parse single Revolut statement file (PDF or CSV)."""
+    return to_dicts(parse_records(content))
+
+
+def parse_records(content: bytes) -> list[Transaction]:
+    """Parse single Revolut statement file (PDF or CSV) into compact transaction records."""
     file_format = _detect_format(content)
     if file_format == "pdf":
         return _parse_pdf_transactions(content)
     return _parse_csv_transactions(content)
 
 
-def parse_with_supplemental(primary_content: bytes, supplemental_content: bytes) -> list[dict]:
-    """Parse Revolut primary + supplemental files and merge PDF + CSV rows when possible."""
-    primary_transactions = parse(primary_content)
-    supplemental_transactions = parse(supplemental_content)
+def _source(transaction: dict) -> str:
+    metadata = transaction.get("metadata") if isinstance(transaction.get("metadata"), dict) else {}
+    return str(metadata.get("source") or "").lower()
+
+
+def merge_documents(documents: list[list[dict]], match_config: Optional[dict] = None) -> list[dict]:
+    """Merge the parsed rows of any number of Revolut PDFs and CSV exports.
+
+    PDF rows from every document and CSV rows from every export go through one
+    indexed PDF/CSV match, keyed by each row's own wallet currency so the per-currency
+    PDFs pair with the right CSV rows. Each document's rows then form one date-sorted
+    stream for a k-way merge, with unmatched CSV rows after the PDF documents.
+    """
+    pdf_documents: list[list[dict]] = []
+    csv_documents: list[list[dict]] = []
+    passthrough: list[dict] = []
+    for document in documents:
+        pdf_rows, csv_rows = [], []
+        for transaction in document:
+            source = _source(transaction)
+            if source.startswith("pdf"):
+                pdf_rows.append(transaction)
+            elif source == "csv":
+                csv_rows.append(transaction)
+            else:
+                passthrough.append(transaction)
+        pdf_documents.append(pdf_rows)
+        csv_documents.append(csv_rows)
+
+    pdf_rows = [row for rows in pdf_documents for row in rows]
+    csv_rows = [row for rows in csv_documents for row in rows]
+    if not pdf_rows or not csv_rows:
+        return _merge_sorted_streams(documents)
+
+    merged = _merge_pdf_and_csv_transactions(pdf_rows, csv_rows, match_config)
+
+    # The merge keeps PDF rows in order, one per input row, then appends unmatched CSV rows
+    streams: list[list[dict]] = []
+    offset = 0
+    for rows in pdf_documents:
+        if rows:
+            streams.append(merged[offset : offset + len(rows)])
+        offset += len(rows)
+    unmatched = {id(row) for row in merged[offset:]}
+    streams.extend(
+        [row for row in rows if id(row) in unmatched] for rows in csv_documents if rows
+    )
+    streams.append(passthrough)
+    return _merge_sorted_streams(streams)
 
-    pdf_transactions: list[dict] = []
-    csv_transactions: list[dict] = []
-    passthrough_transactions: list[dict] = []
 
-    for transaction in [*primary_transactions, *supplemental_transactions]:
-        metadata = (
-            transaction.get("metadata")
-            if isinstance(transaction.get("metadata"), dict)
-            else {}
-        )
-        source = str(metadata.get("source") or "").lower()
-        if source.startswith("pdf"):
-            pdf_transactions.append(transaction)
-        elif source == "csv":
-            csv_transactions.append(transaction)
-        else:
-            passthrough_transactions.append(transaction)
+def parse_many(contents: list[bytes], match_config: Optional[dict] = None) -> list[dict]:
+    """Parse several Revolut PDFs and CSV exports and merge them into one ledger."""
+    return merge_documents([parse(content) for content in contents], match_config)
 
-    if pdf_transactions and csv_transactions:
-        return _sort_transactions_by_date([
-            *_merge_pdf_and_csv_transactions(pdf_transactions, csv_transactions),
-            *passthrough_transactions,
-        ])
 
-    return _sort_transactions_by_date([*primary_transactions, *supplemental_transactions])
+def parse_with_supplemental(
+    primary_content: bytes,
+    supplemental_content,
+    match_config: Optional[dict] = None,
+) -> list[dict]:
+    """Parse Revolut primary + supplemental file(s) and merge PDF + CSV rows when possible."""
+    if isinstance(supplemental_content, (bytes, bytearray)):
+        supplemental_content = [supplemental_content]
+    return parse_many([primary_content, *supplemental_content], match_config)
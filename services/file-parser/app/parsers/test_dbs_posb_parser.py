@@ -0,0 +1,133 @@
+from app.parsers import dbs_posb_parser as parser
+
+
+def _word(text, x0, top):
+    return {"text": text, "x0": x0, "top": top, "upright": True}
+
+
+def test_reconciled_text_path_skips_word_extraction(fake_pdf):
+    (page,) = fake_pdf(
+        parser,
+        "\n".join(
+            [
+                "Balance Brought Forward SGD 100.00",
+                "01/01/2024 Salary 50.00 150.00",
+                "02/01/2024 Coffee 5.00 145.00",
+                "Balance Carried Forward",
+            ]
+        ),
+    )
+
+    rows, report = parser.parse_with_report(b"fake pdf bytes")
+
+    assert [(row["amountIn"], row["amountOut"]) for row in rows] == [(50.0, None), (None, 5.0)]
+    assert report["path"] == "text"
+    assert report["reconciled"] is True
+    assert page.words_extracted is False
+
+
+def test_failing_page_falls_back_to_column_path(fake_pdf):
+    # The text path sees one amount only, so in/out is ambiguous and the chain breaks.
+    header_and_rows = [
+        _word("Date", 10, 10),
+        _word("Description", 60, 10),
+        _word("Withdrawal", 300, 10),
+        _word("Deposit", 380, 10),
+        _word("Balance", 460, 10),
+        _word("Balance", 10, 20),
+        _word("Brought", 60, 20),
+        _word("Forward", 110, 20),
+        _word("100.00", 460, 20),
+        _word("01/01/2024", 10, 30),
+        _word("Refund", 60, 30),
+        _word("20.00", 380, 30),
+        _word("120.00", 460, 30),
+        _word("Balance", 10, 40),
+        _word("Carried", 60, 40),
+        _word("Forward", 110, 40),
+    ]
+    fake_pdf(
+        parser,
+        (
+            "\n".join(
+                [
+                    "Balance Brought Forward",
+                    "01/01/2024 Refund 20.00 120.00",
+                    "Balance Carried Forward",
+                ]
+            ),
+            header_and_rows,
+        ),
+    )
+
+    rows, report = parser.parse_with_report(b"fake pdf bytes")
+
+    assert rows[0]["amountIn"] == 20.0
+    assert report["path"] == "text+columns"
+    assert report["fallbackPages"] == [0]
+
+
+def test_row_that_reconciles_by_accident_is_reparsed_by_columns(fake_pdf):
+    # The lone 100.00 is the deposit, but the text path reads it as an unchanged balance
+    (page,) = fake_pdf(
+        parser,
+        (
+            "\n".join(
+                [
+                    "Balance Brought Forward SGD 100.00",
+                    "01/01/2024 Salary",
+                    "100.00",
+                    "Balance Carried Forward",
+                ]
+            ),
+            [
+                _word("Date", 10, 10),
+                _word("Description", 60, 10),
+                _word("Withdrawal", 300, 10),
+                _word("Deposit", 380, 10),
+                _word("Balance", 460, 10),
+                _word("Balance", 10, 20),
+                _word("Brought", 60, 20),
+                _word("Forward", 110, 20),
+                _word("100.00", 460, 20),
+                _word("01/01/2024", 10, 30),
+                _word("Salary", 60, 30),
+                _word("100.00", 380, 30),
+                _word("Balance", 10, 40),
+                _word("Carried", 60, 40),
+                _word("Forward", 110, 40),
+            ],
+        ),
+    )
+
+    rows, report = parser.parse_with_report(b"fake pdf bytes")
+
+    assert (rows[0]["amountIn"], rows[0]["balance"]) == (100.0, None)
+    assert report["path"] == "text+columns"
+    assert report["fallbackPages"] == [0]
+    assert page.words_extracted is True
+
+
+def test_unchanged_pages_splice_in_cached_rows(monkeypatch, fake_pdf):
+    from app import page_cache
+    from app.result_cache import ResultCache
+
+    monkeypatch.setattr(page_cache, "_texts", ResultCache("PAGE_CACHE_SIZE", 16))
+    monkeypatch.setattr(page_cache, "_steps", ResultCache("PAGE_CACHE_SIZE", 16))
+    monkeypatch.setattr(page_cache, "page_content_hash", lambda page: page._text)
+    first = "Balance Brought Forward SGD 100.00\n01/01/2024 Salary 50.00 150.00\nPage 1"
+    # The second row continues onto the next page
+    second = "Balance B/F 150.00\n02/01/2024 Coffee at"
+    fake_pdf(parser, first, second, "the corner\n5.00 145.00\nBalance Carried Forward")
+    parser.parse_with_report(b"january")
+
+    fake_pdf(parser, first, second, "the corner\n6.00 144.00\nBalance Carried Forward")
+    rows, report = parser.parse_with_report(b"january corrected")
+
+    assert report["pageCache"]["rowsReusedPages"] == [0, 1]
+    assert report["pageCache"]["textReusedPages"] == [0, 1]
+    assert [(row["description"], row["amountOut"]) for row in rows] == [
+        ("Salary", None),
+        ("Coffee at the corner", 6.0),
+    ]
+    assert report["reconciled"] is True
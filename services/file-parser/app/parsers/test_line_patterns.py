@@ -0,0 +1,98 @@
+import re
+import time
+
+from app import line_limits
+from app.parsers import (
+    dbs_paylah_parser,
+    dbs_posb_parser,
+    ocbc_frank_parser,
+    revolut_statement_parser,
+    youtrip_statement_parser,
+)
+
+_MODULES = (
+    dbs_paylah_parser,
+    dbs_posb_parser,
+    ocbc_frank_parser,
+    revolut_statement_parser,
+    youtrip_statement_parser,
+)
+
+
+def _line_patterns():
+    for module in _MODULES:
+        for name, value in vars(module).items():
+            if isinstance(value, re.Pattern):
+                yield f"{module.__name__}.{name}", value
+            elif isinstance(value, tuple) and value and all(
+                isinstance(item, re.Pattern) for item in value
+            ):
+                for index, item in enumerate(value):
+                    yield f"{module.__name__}.{name}[{index}]", item
+
+
+def _adversarial_lines(n):
+    # Shapes that made the old patterns backtrack: long digit or separator runs with
+    # no closing decimal, space runs after a date prefix, and repeated keywords.
+    return [
+        "1" * n,
+        "1," * (n // 2),
+        "01/01/2024" + " " * n + "x",
+        "01 Jan 2024" + " " * n + "1.00",
+        "01 Jan" + " a" * (n // 2) + " 1.0",
+        "$" + " " * n + "1",
+        "fee " + "1." * (n // 2),
+        "fee" + " ." * (n // 2),
+        "1.00 " * (n // 5) + "x",
+        "S$1.00 = " + "1," * (n // 2),
+        "Revolut Rate S$1.00 = " + "1" * n + " ",
+        "1 " * (n // 2) + "SGD x",
+    ]
+
+
+def _exercise(pattern, lines):
+    for line in lines:
+        pattern.match(line)
+        pattern.search(line)
+        for _ in pattern.finditer(line):
+            pass
+
+
+def _best_of_three(pattern, lines):
+    best = None
+    for _ in range(3):
+        started = time.perf_counter()
+        _exercise(pattern, lines)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def test_line_patterns_scale_linearly_on_adversarial_lines():
+    small, big = _adversarial_lines(1000), _adversarial_lines(32000)
+    for name, pattern in _line_patterns():
+        small_time = _best_of_three(pattern, small)
+        big_time = _best_of_three(pattern, big)
+        # 32x the input takes ~32x the time when linear and ~1000x when quadratic;
+        # the bound sits far from both so a loaded machine does not flip it
+        assert big_time <= max(small_time * 200, 0.1), name
+
+
+def test_overlong_lines_are_skipped(monkeypatch, fake_pdf):
+    monkeypatch.setattr(line_limits, "MAX_LINE_LENGTH", 60)
+    fake_pdf(
+        dbs_posb_parser,
+        "\n".join(
+            [
+                "Balance Brought Forward SGD 100.00",
+                "01/01/2024 Salary 50.00 150.00",
+                "02/01/2024 " + "x" * 80 + " 1.00 151.00",
+                "03/01/2024 Coffee 5.00 145.00",
+                "Balance Carried Forward",
+            ]
+        ),
+    )
+
+    rows, _ = dbs_posb_parser.parse_with_report(b"fake pdf bytes")
+
+    assert [row["description"] for row in rows] == ["Salary", "Coffee"]
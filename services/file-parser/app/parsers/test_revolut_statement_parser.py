@@ -0,0 +1,111 @@
+from app.parsers import revolut_statement_parser as parser
+
+
+def _pdf_row(date, description, amount_out):
+    return {
+        "date": date,
+        "description": description,
+        "amountIn": None,
+        "amountOut": amount_out,
+        "balance": None,
+        "currency": "SGD",
+        "metadata": {"source": "pdf", "completedDate": date},
+    }
+
+
+def _csv_row(completed_date, description, amount_out):
+    return {
+        "date": completed_date[:10],
+        "description": description,
+        "amountIn": None,
+        "amountOut": amount_out,
+        "balance": 50.0,
+        "currency": "SGD",
+        "metadata": {
+            "source": "csv",
+            "startedDate": completed_date,
+            "completedDate": completed_date,
+        },
+    }
+
+
+def test_exact_key_rows_are_merged():
+    merged = parser._merge_pdf_and_csv_transactions(
+        [_pdf_row("2024-01-02", "Coffee Shop", 4.5)],
+        [_csv_row("2024-01-02 10:00:00", "Coffee Shop", 4.5)],
+    )
+
+    assert len(merged) == 1
+    assert merged[0]["metadata"]["source"] == "pdf+csv"
+    assert merged[0]["metadata"]["mergeMatch"] == "exact"
+    assert merged[0]["balance"] == 50.0
+
+
+def test_fuzzy_pass_merges_shifted_date_truncated_description_and_fee_rounding():
+    merged = parser._merge_pdf_and_csv_transactions(
+        [_pdf_row("2024-01-03", "Tokyo Metro Shinjuku", 12.34)],
+        [_csv_row("2024-01-02 23:50:00", "Tokyo Metro Shinjuku Station", 12.36)],
+    )
+
+    assert len(merged) == 1
+    assert merged[0]["metadata"]["mergeMatch"] == "fuzzy"
+    assert merged[0]["amountOut"] == 12.34
+
+
+def test_fuzzy_pass_prefers_lowest_cost_candidate():
+    merged = parser._merge_pdf_and_csv_transactions(
+        [_pdf_row("2024-01-03", "Lawson Shibuya", 5.00)],
+        [
+            _csv_row("2024-01-01 09:00:00", "Lawson Shibuya", 5.00),
+            _csv_row("2024-01-02 23:00:00", "Lawson Shibuya", 5.00),
+        ],
+    )
+
+    assert len(merged) == 2
+    assert merged[0]["metadata"]["startedDate"] == "2024-01-02 23:00:00"
+    assert merged[1]["metadata"]["source"] == "csv"
+
+
+def test_fuzzy_pass_respects_configured_tolerances():
+    merged = parser._merge_pdf_and_csv_transactions(
+        [_pdf_row("2024-01-03", "Tokyo Metro", 12.34)],
+        [_csv_row("2024-01-02 23:50:00", "Tokyo Metro", 12.34)],
+        {"dateWindowDays": 0},
+    )
+
+    assert len(merged) == 2
+
+
+def _in_currency(row, currency):
+    return {**row, "currency": currency}
+
+
+def test_documents_merge_per_currency_in_date_order():
+    sgd_pdf = [_pdf_row("2024-01-05", "Exchanged to JPY", 10.0), _pdf_row("2024-01-02", "Grab", 8.0)]
+    jpy_pdf = [_in_currency(_pdf_row("2024-01-05", "Exchanged to JPY", 10.0), "JPY")]
+    export = [
+        _in_currency(_csv_row("2024-01-05 09:00:00", "Exchanged to JPY", 10.0), "JPY"),
+        _csv_row("2024-01-01 08:00:00", "Coffee", 3.0),
+    ]
+
+    merged = parser.merge_documents([sgd_pdf, jpy_pdf, export])
+
+    assert [(row["date"], row["currency"], row["metadata"]["source"]) for row in merged] == [
+        ("2024-01-01", "SGD", "csv"),
+        ("2024-01-02", "SGD", "pdf"),
+        ("2024-01-05", "SGD", "pdf"),
+        ("2024-01-05", "JPY", "pdf+csv"),
+    ]
+
+
+def test_k_way_merge_matches_a_stable_sort_of_the_concatenated_streams():
+    streams = [
+        [{"date": "2024-01-03", "n": 0}, {"date": "2024-01-01", "n": 1}, {"date": "", "n": 2}],
+        [{"date": "2024-01-01", "n": 3}, {"date": "3 Jan 2024", "n": 4}],
+        [],
+        [{"date": "not a date", "n": 5}, {"date": "2023-12-31", "n": 6}],
+    ]
+    concatenated = [row for stream in streams for row in stream]
+    expected = sorted(concatenated, key=parser._date_sort_key)
+
+    assert [row["n"] for row in parser._merge_sorted_streams(streams)] == [row["n"] for row in expected]
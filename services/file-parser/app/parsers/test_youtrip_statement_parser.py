@@ -1,41 +1,22 @@
 from app.parsers import youtrip_statement_parser as parser
 
 
-class _FakePage:
-    def __init__(self, text):
-        self._text = text
-
-    def extract_text(self):
-        return self._text
-
-
-class _FakePdf:
-    def __init__(self, text):
-        self.pages = [_FakePage(text)]
-
-    def __enter__(self):
-        return self
-
-    def __exit__(self, exc_type, exc, traceback):
-        return False
-
-
-def _parse_text(monkeypatch, text):
-    monkeypatch.setattr(parser.pdfplumber, "open", lambda _: _FakePdf(text))
+def _parse_text(fake_pdf, text):
+    fake_pdf(parser, text)
     return parser.parse(b"fake pdf bytes")
 
 
-def test_parse_money_preserves_leading_negative_sign():
-    assert parser._parse_money("-$12.34") == -12.34
+def test_parse_cents_preserves_leading_negative_sign():
+    assert parser.parse_cents("-$12.34") == -1234
 
 
-def test_parse_money_preserves_parenthetical_negative_notation():
-    assert parser._parse_money("($12.34)") == -12.34
+def test_parse_cents_preserves_parenthetical_negative_notation():
+    assert parser.parse_cents("($12.34)") == -1234
 
 
-def test_known_incoming_markers_are_inflow(monkeypatch):
+def test_known_incoming_markers_are_inflow(fake_pdf):
     rows = _parse_text(
-        monkeypatch,
+        fake_pdf,
         "\n".join(
             [
                 "My SGD Statement",
@@ -51,9 +32,9 @@ def test_known_incoming_markers_are_inflow(monkeypatch):
     assert [row["amountOut"] for row in rows] == [None, None, None]
 
 
-def test_normal_card_payment_is_outflow(monkeypatch):
+def test_normal_card_payment_is_outflow(fake_pdf):
     rows = _parse_text(
-        monkeypatch,
+        fake_pdf,
         "\n".join(
             [
                 "My SGD Statement",
@@ -67,9 +48,9 @@ def test_normal_card_payment_is_outflow(monkeypatch):
     assert rows[0]["amountOut"] == 12.34
 
 
-def test_signed_negative_amount_is_outflow_for_ambiguous_description(monkeypatch):
+def test_signed_negative_amount_is_outflow_for_ambiguous_description(fake_pdf):
     rows = _parse_text(
-        monkeypatch,
+        fake_pdf,
         "\n".join(
             [
                 "My SGD Statement",
@@ -83,9 +64,9 @@ def test_signed_negative_amount_is_outflow_for_ambiguous_description(monkeypatch
     assert rows[0]["amountOut"] == 12.34
 
 
-def test_signed_positive_amount_with_plus_marker_is_inflow(monkeypatch):
+def test_signed_positive_amount_with_plus_marker_is_inflow(fake_pdf):
     rows = _parse_text(
-        monkeypatch,
+        fake_pdf,
         "\n".join(
             [
                 "My SGD Statement",
@@ -99,9 +80,9 @@ def test_signed_positive_amount_with_plus_marker_is_inflow(monkeypatch):
     assert rows[0]["amountOut"] is None
 
 
-def test_conversion_metadata_parsing_is_preserved(monkeypatch):
+def test_conversion_metadata_parsing_is_preserved(fake_pdf):
     rows = _parse_text(
-        monkeypatch,
+        fake_pdf,
         "\n".join(
             [
                 "My SGD Statement",
@@ -1,23 +1,51 @@
 """YouTrip statement parser for trip workflows."""
-import io
 import re
 from typing import Optional
 
-import pdfplumber
 from dateutil import parser as date_parser
 
-
-def _parse_money(value: str) -> Optional[float]:
-    raw_value = (value or "").strip()
-    is_negative = bool(re.match(r"^-", raw_value)) or bool(re.match(r"^\(.*\)$", raw_value))
-    cleaned = re.sub(r"[^0-9.]", "", raw_value)
-    if not cleaned:
-        return None
-    try:
-        amount = float(cleaned)
-        return -amount if is_negative else amount
-    except ValueError:
-        return None
+from ..deadlines import check_deadline
+from ..extraction import PDFIUM, open_pdf
+from ..line_limits import is_overlong
+from ..models import Statement, Transaction, to_dicts
+from ..money import from_cents, parse_cents, parse_decimal, to_cents
+
+# Only text lines are read, so PDFium's text layer is enough
+EXTRACTION_BACKEND = PDFIUM
+
+# Written like the POSB row pattern: possessive runs and a description that can only
+# end at the start of a space run, so matching stays linear in the line length.
+_DATE = r"\d{1,2}\s++[A-Za-z]{3,9}\s++\d{4}"
+_MONEY = r"((?:[-+]?+\s*+\$[\d,]*+\.\d{2})|(?:\(\$[\d,]*+\.\d{2}\)))"
+_TX_WITH_DESCRIPTION_PATTERN = re.compile(
+    rf"^({_DATE})(?:\s++(.+?)(?<=\S)\s++|\s{{3,}}+){_MONEY}\s++{_MONEY}$"
+)
+_TX_WITHOUT_DESCRIPTION_PATTERN = re.compile(rf"^({_DATE})\s++{_MONEY}\s++{_MONEY}$")
+_DATE_LINE_PATTERN = re.compile(rf"^{_DATE}\b")
+_DATE_RANGE_PATTERN = re.compile(rf"^{_DATE}\s++to\s++{_DATE}$")
+_CREDIT_MARKER_PATTERN = re.compile(r"(^|\s)\+|\b(?:credit|cr)\b")
+_FEE_PATTERN = re.compile(
+    r"\bfee\b(?:[^0-9A-Z.]|\.(?:(?!\d)|(?=[\d,]*+\.\d{2})))*+([\d,]*+\.\d{2})(?:\s*+([A-Z]{3}))?",
+    re.I,
+)
+_CONVERSION_PATTERN = re.compile(
+    r"\$([\d,]*+\.\d{2})\s++([A-Z]{3})\s++to\s++\$([\d,]*+\.\d{2})\s++([A-Z]{3})",
+    re.I,
+)
+_PARENTHETICAL_AMOUNT_PATTERN = re.compile(
+    r"\((?:¥|\$)?([\d,]*+\.\d{2})\s*+([A-Z]{3})\)",
+    re.I,
+)
+_FX_RATE_PATTERNS = (
+    re.compile(
+        r"FX rate:\s*+\$1\s++([A-Z]{3})\s*+=\s*+\$([\d,]*+\.\d++)\s*+([A-Z]{3})",
+        re.I,
+    ),
+    re.compile(
+        r"FX rate:\s*+\$1\s++([A-Z]{3})\s*+=\s*+(?:¥|\$)?([\d,]*+\.\d++)\s*+([A-Z]{3})",
+        re.I,
+    ),
+)
 
 
 def _try_parse_date(value: str) -> str:
@@ -32,7 +60,7 @@ def _infer_direction(description: str, amount: Optional[float] = None, raw_text:
         return "out"
 
     raw_lower = raw_text.lower()
-    if amount is not None and amount > 0 and re.search(r"(^|\s)\+|\b(?:credit|cr)\b", raw_lower):
+    if amount is not None and amount > 0 and _CREDIT_MARKER_PATTERN.search(raw_lower):
         return "in"
 
     desc = description.lower()
@@ -53,41 +81,48 @@ def _transaction_type(description: str) -> str:
     return "card_payment"
 
 
-def _apply_embedded_fee_amount(transaction: dict) -> dict:
-    metadata_raw = transaction.get("metadata")
-    metadata = metadata_raw if isinstance(metadata_raw, dict) else {}
+def _apply_embedded_fee_amount(transaction: Transaction) -> Transaction:
+    metadata = transaction.row_metadata
     if metadata.get("feeEmbeddedApplied"):
         return transaction
 
-    fee_amount = _parse_money(str(metadata.get("feeAmount") or ""))
-    source_tag = str(metadata.get("source") or "").lower()
-    amount_in = _parse_money(str(transaction.get("amountIn") or ""))
-    amount_out = _parse_money(str(transaction.get("amountOut") or ""))
-    if not (fee_amount and fee_amount > 0):
+    fee_cents = to_cents(metadata.get("feeAmount")) or 0
+    source_tag = str(transaction.statement.metadata.get("source") or "").lower()
+    amount_in = to_cents(transaction.amount_in) or 0
+    amount_out = to_cents(transaction.amount_out) or 0
+    if fee_cents <= 0:
         return transaction
 
-    if amount_out and amount_out > 0:
-        transaction["amountOut"] = round(amount_out + fee_amount, 4)
+    if amount_out > 0:
+        transaction.amount_out = from_cents(amount_out + fee_cents)
 
-    if amount_in and amount_in > 0:
+    if amount_in > 0:
         if source_tag == "pdf":
-            transaction["amountIn"] = round(amount_in + fee_amount, 4)
-        if not (amount_out and amount_out > 0):
-            transaction["amountOut"] = fee_amount
+            transaction.amount_in = from_cents(amount_in + fee_cents)
+        if amount_out <= 0:
+            transaction.amount_out = from_cents(fee_cents)
     metadata["feeEmbeddedApplied"] = True
-    transaction["metadata"] = metadata
     return transaction
 
 
 def parse(content: bytes) -> list[dict]:
     """Parse YouTrip statement into normalized transaction rows."""
-    transactions = []
+    return to_dicts(parse_records(content))
+
+
+def parse_records(content: bytes) -> list[Transaction]:
+    """Parse YouTrip statement into compact transaction records."""
+    transactions: list[Transaction] = []
     lines: list[str] = []
 
-    with pdfplumber.open(io.BytesIO(content)) as pdf:
+    with open_pdf(content, EXTRACTION_BACKEND) as pdf:
         for page in pdf.pages:
+            check_deadline()
             text = page.extract_text() or ""
-            lines.extend([line.strip() for line in text.split("\n") if line.strip()])
+            for line in text.split("\n"):
+                line = line.strip()
+                if line and not is_overlong(line):
+                    lines.append(line)
 
     all_text = "\n".join(lines)
     account_identifier = None
@@ -101,14 +136,15 @@ def parse(content: bytes) -> list[dict]:
     if currency_match:
         statement_currency = currency_match.group(1)
 
-    money_pattern = r"((?:[-+]?\s*\$[\d,]*\.\d{2})|(?:\(\$[\d,]*\.\d{2}\)))"
-    tx_pattern_with_desc = re.compile(
-        rf"^(\d{{1,2}}\s+[A-Za-z]{{3,9}}\s+\d{{4}})\s+(.+?)\s+{money_pattern}\s+{money_pattern}$"
-    )
-    tx_pattern_without_desc = re.compile(
-        rf"^(\d{{1,2}}\s+[A-Za-z]{{3,9}}\s+\d{{4}})\s+{money_pattern}\s+{money_pattern}$"
-    )
-    date_line_pattern = re.compile(r"^\d{1,2}\s+[A-Za-z]{3,9}\s+\d{4}\b")
+    statement_metadata = {
+        "source": "pdf",
+        "parserId": "youtrip_statement",
+        "provider": "YouTrip",
+        "currency": statement_currency,
+    }
+    if account_identifier:
+        statement_metadata["accountIdentifier"] = account_identifier
+    statement = Statement(metadata=statement_metadata, account_number=account_identifier)
 
     skip_prefixes = (
         "Transactions",
@@ -125,82 +161,59 @@ def parse(content: bytes) -> list[dict]:
 
     def finalize_current():
         if current_tx:
-            transactions.append(current_tx.copy())
+            transactions.append(current_tx)
 
     for line in lines:
+        check_deadline()
         if not line or line.startswith(skip_prefixes):
             previous_line = line
             continue
-        if " to " in line and re.match(r"^\d{1,2}\s+[A-Za-z]{3,9}\s+\d{4}\s+to\s+\d{1,2}\s+[A-Za-z]{3,9}\s+\d{4}$", line):
+        if " to " in line and _DATE_RANGE_PATTERN.match(line):
             previous_line = line
             continue
 
-        match = tx_pattern_with_desc.match(line)
+        match = _TX_WITH_DESCRIPTION_PATTERN.match(line)
         if match:
             finalize_current()
             date_text = match.group(1)
-            description = match.group(2).strip()
-            amount = _parse_money(match.group(3)) or 0
-            balance = _parse_money(match.group(4))
+            description = (match.group(2) or "").strip()
+            amount = from_cents(parse_cents(match.group(3))) or 0
+            balance = from_cents(parse_cents(match.group(4)))
             direction = _infer_direction(description, amount, line)
             amount_magnitude = abs(amount)
 
-            metadata = {
-                "source": "pdf",
-                "parserId": "youtrip_statement",
-                "provider": "YouTrip",
-                "currency": statement_currency,
-                "transactionType": _transaction_type(description),
-            }
-            if account_identifier:
-                metadata["accountIdentifier"] = account_identifier
-
-            current_tx = {
-                "date": _try_parse_date(date_text),
-                "description": description,
-                "amountIn": amount_magnitude if direction == "in" else None,
-                "amountOut": amount_magnitude if direction == "out" else None,
-                "balance": balance,
-                "metadata": metadata,
-            }
-            if account_identifier:
-                current_tx["accountIdentifier"] = account_identifier
-                current_tx["accountNumber"] = account_identifier
+            current_tx = Transaction(
+                date=_try_parse_date(date_text),
+                description=description,
+                statement=statement,
+                amount_in=amount_magnitude if direction == "in" else None,
+                amount_out=amount_magnitude if direction == "out" else None,
+                balance=balance,
+                extra={"transactionType": _transaction_type(description)},
+            )
 
             previous_line = line
             continue
 
-        match = tx_pattern_without_desc.match(line)
+        match = _TX_WITHOUT_DESCRIPTION_PATTERN.match(line)
         if match:
             finalize_current()
             date_text = match.group(1)
-            amount = _parse_money(match.group(2)) or 0
-            balance = _parse_money(match.group(3))
+            amount = from_cents(parse_cents(match.group(2))) or 0
+            balance = from_cents(parse_cents(match.group(3)))
             description = previous_line if previous_line else "YouTrip Transaction"
             direction = _infer_direction(description, amount, line)
             amount_magnitude = abs(amount)
 
-            metadata = {
-                "source": "pdf",
-                "parserId": "youtrip_statement",
-                "provider": "YouTrip",
-                "currency": statement_currency,
-                "transactionType": _transaction_type(description),
-            }
-            if account_identifier:
-                metadata["accountIdentifier"] = account_identifier
-
-            current_tx = {
-                "date": _try_parse_date(date_text),
-                "description": description,
-                "amountIn": amount_magnitude if direction == "in" else None,
-                "amountOut": amount_magnitude if direction == "out" else None,
-                "balance": balance,
-                "metadata": metadata,
-            }
-            if account_identifier:
-                current_tx["accountIdentifier"] = account_identifier
-                current_tx["accountNumber"] = account_identifier
+            current_tx = Transaction(
+                date=_try_parse_date(date_text),
+                description=description,
+                statement=statement,
+                amount_in=amount_magnitude if direction == "in" else None,
+                amount_out=amount_magnitude if direction == "out" else None,
+                balance=balance,
+                extra={"transactionType": _transaction_type(description)},
+            )
 
             previous_line = line
             continue
@@ -209,64 +222,46 @@ def parse(content: bytes) -> list[dict]:
             previous_line = line
             continue
 
-        fee_match = re.search(
-            r"\bfee\b[^0-9A-Z]*(?:¥|\$)?\s*([\d,]*\.\d{2})(?:\s*([A-Z]{3}))?",
-            line,
-            re.I,
-        )
+        fee_match = _FEE_PATTERN.search(line)
         if fee_match:
-            current_tx["metadata"]["feeAmount"] = _parse_money(fee_match.group(1))
-            current_tx["metadata"]["feeCurrency"] = (
+            current_tx.row_metadata["feeAmount"] = from_cents(parse_cents(fee_match.group(1)))
+            current_tx.row_metadata["feeCurrency"] = (
                 fee_match.group(2).upper() if fee_match.group(2) else statement_currency
             )
             previous_line = line
             continue
 
-        if date_line_pattern.match(line):
+        if _DATE_LINE_PATTERN.match(line):
             finalize_current()
             current_tx = None
             previous_line = line
             continue
 
-        conversion_match = re.search(
-            r"\$([\d,]*\.\d{2})\s+([A-Z]{3})\s+to\s+\$([\d,]*\.\d{2})\s+([A-Z]{3})",
-            line,
-            re.I,
-        )
+        conversion_match = _CONVERSION_PATTERN.search(line)
         if conversion_match:
-            current_tx["metadata"]["fromAmount"] = _parse_money(conversion_match.group(1))
-            current_tx["metadata"]["fromCurrency"] = conversion_match.group(2).upper()
-            current_tx["metadata"]["toAmount"] = _parse_money(conversion_match.group(3))
-            current_tx["metadata"]["toCurrency"] = conversion_match.group(4).upper()
+            current_tx.row_metadata["fromAmount"] = from_cents(
+                parse_cents(conversion_match.group(1))
+            )
+            current_tx.row_metadata["fromCurrency"] = conversion_match.group(2).upper()
+            current_tx.row_metadata["toAmount"] = from_cents(parse_cents(conversion_match.group(3)))
+            current_tx.row_metadata["toCurrency"] = conversion_match.group(4).upper()
             previous_line = line
             continue
 
-        parenthetical_match = re.search(
-            r"\((?:¥|\$)?([\d,]*\.\d{2})\s*([A-Z]{3})\)",
-            line,
-            re.I,
-        )
+        parenthetical_match = _PARENTHETICAL_AMOUNT_PATTERN.search(line)
         if parenthetical_match:
-            current_tx["metadata"]["foreignAmount"] = _parse_money(parenthetical_match.group(1))
-            current_tx["metadata"]["foreignCurrency"] = parenthetical_match.group(2).upper()
+            current_tx.row_metadata["foreignAmount"] = from_cents(
+                parse_cents(parenthetical_match.group(1))
+            )
+            current_tx.row_metadata["foreignCurrency"] = parenthetical_match.group(2).upper()
             previous_line = line
             continue
 
-        fx_match_a = re.search(
-            r"FX rate:\s*\$1\s+([A-Z]{3})\s*=\s*\$([\d,]*\.\d+)\s*([A-Z]{3})",
-            line,
-            re.I,
-        )
-        fx_match_b = re.search(
-            r"FX rate:\s*\$1\s+([A-Z]{3})\s*=\s*(?:¥|\$)?([\d,]*\.\d+)\s*([A-Z]{3})",
-            line,
-            re.I,
-        )
-        fx_match = fx_match_a or fx_match_b
+        fx_match = _FX_RATE_PATTERNS[0].search(line) or _FX_RATE_PATTERNS[1].search(line)
         if fx_match:
-            current_tx["metadata"]["fxBaseCurrency"] = fx_match.group(1).upper()
-            current_tx["metadata"]["fxRate"] = _parse_money(fx_match.group(2))
-            current_tx["metadata"]["fxQuoteCurrency"] = fx_match.group(3).upper()
+            current_tx.row_metadata["fxBaseCurrency"] = fx_match.group(1).upper()
+            current_tx.row_metadata["fxRate"] = parse_decimal(fx_match.group(2))
+            current_tx.row_metadata["fxQuoteCurrency"] = fx_match.group(3).upper()
             previous_line = line
             continue
 
@@ -0,0 +1,215 @@
+"""Opt-in profiling of single parse requests.
+
+A caller holding PROFILE_TOKEN can ask for one parse to be profiled with the
+`X-Profile` header or `?profile=` query flag: `deterministic` runs cProfile for
+exact call counts and times, `sampling` only records stacks. Either way a stack
+sampler runs alongside, so every report has collapsed stacks that flamegraph
+tools read directly. With PROFILE_SAMPLE_EVERY=N, one in N parse requests is
+also profiled by the sampler alone, which costs a stack walk every few
+milliseconds. Reports are kept in a small in-memory store under an id.
+"""
+import cProfile
+import hmac
+import itertools
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Callable, Optional
+
+from .env import env_float, env_int
+
+DETERMINISTIC = "deterministic"
+SAMPLING = "sampling"
+MODES = (DETERMINISTIC, SAMPLING)
+
+_MODE_ALIASES = {
+    "1": DETERMINISTIC,
+    "true": DETERMINISTIC,
+    "cprofile": DETERMINISTIC,
+    "sample": SAMPLING,
+}
+_MAX_STACK_DEPTH = 128
+
+
+class ProfilingForbidden(Exception):
+    """Raised when a request asks for a profile without a valid token."""
+
+    code = "PROFILE_FORBIDDEN"
+
+
+def sample_every() -> int:
+    return max(env_int("PROFILE_SAMPLE_EVERY", 0), 0)
+
+
+def sample_interval_seconds() -> float:
+    return max(env_float("PROFILE_SAMPLE_INTERVAL_MS", 5), 1) / 1000
+
+
+def is_authorized(token: Optional[str]) -> bool:
+    expected = os.getenv("PROFILE_TOKEN") or ""
+    return bool(expected) and hmac.compare_digest(str(token or ""), expected)
+
+
+def requested_mode(flag: Optional[str], token: Optional[str]) -> Optional[str]:
+    """Profiler mode asked for by a request flag, or None; raises ProfilingForbidden."""
+    value = str(flag or "").strip().lower()
+    if not value or value in ("0", "false", "off"):
+        return None
+    mode = _MODE_ALIASES.get(value, value)
+    if mode not in MODES:
+        raise ValueError(f"Unknown profile mode: {flag}")
+    if not is_authorized(token):
+        raise ProfilingForbidden("Profiling requires a valid X-Profile-Token")
+    return mode
+
+
+_request_counter = itertools.count(1)
+
+
+def sample_this_request() -> bool:
+    """True for one in every PROFILE_SAMPLE_EVERY calls."""
+    every = sample_every()
+    return bool(every) and next(_request_counter) % every == 0
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    marker = f"{os.sep}app{os.sep}"
+    if marker in filename:
+        filename = "app/" + filename.rsplit(marker, 1)[1].replace(os.sep, "/")
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+class StackSampler:
+    """Records the stack of one thread at a fixed interval from a daemon thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None and len(labels) < _MAX_STACK_DEPTH:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if labels:
+                self.stacks[";".join(reversed(labels))] += 1
+
+    def folded(self) -> str:
+        """Collapsed stacks, one `root;...;leaf count` line per distinct stack."""
+        return "\n".join(f"{stack} {count}" for stack, count in sorted(self.stacks.items()))
+
+    def hot_functions(self, limit: int) -> list[dict]:
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        samples = sum(self.stacks.values()) or 1
+        return [
+            {
+                "function": function,
+                "selfSamples": own[function],
+                "totalSamples": total[function],
+                "selfPercent": round(100 * own[function] / samples, 1),
+            }
+            for function in sorted(total, key=lambda name: (-own[name], -total[name], name))[:limit]
+        ]
+
+
+def _cprofile_hot_functions(profiler: cProfile.Profile, limit: int) -> list[dict]:
+    stats = pstats.Stats(profiler).stats
+    ranked = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    return [
+        {
+            "function": f"{name} ({os.path.basename(filename)}:{line})",
+            "calls": calls,
+            "selfSeconds": round(own, 6),
+            "totalSeconds": round(cumulative, 6),
+        }
+        for (filename, line, name), (_, calls, own, cumulative, _) in ranked
+    ]
+
+
+def run_profiled(mode: str, func: Callable, *args):
+    """Run `func(*args)` under the profiler for `mode`; returns (result, report).
+
+    If `func` raises, the partial report is attached to the exception as `profile`.
+    """
+    limit = max(env_int("PROFILE_TOP_FUNCTIONS", 30), 1)
+    sampler = StackSampler(threading.get_ident(), sample_interval_seconds())
+    profiler = cProfile.Profile() if mode == DETERMINISTIC else None
+    started = time.perf_counter()
+    sampler.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        result = func(*args)
+    except BaseException as e:
+        e.profile = _report(mode, started, sampler, profiler, limit)
+        raise
+    return result, _report(mode, started, sampler, profiler, limit)
+
+
+def _report(mode, started, sampler, profiler, limit) -> dict:
+    if profiler is not None:
+        profiler.disable()
+    sampler.stop()
+    return {
+        "mode": mode,
+        "seconds": round(time.perf_counter() - started, 4),
+        "samples": sum(sampler.stacks.values()),
+        "sampleIntervalMs": round(sampler.interval * 1000, 3),
+        "hotFunctions": (
+            _cprofile_hot_functions(profiler, limit)
+            if profiler is not None
+            else sampler.hot_functions(limit)
+        ),
+        "folded": sampler.folded(),
+    }
+
+
+class ProfileStore:
+    """The most recent reports by id; the size is read from PROFILE_STORE_SIZE."""
+
+    def __init__(self):
+        self._reports: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, report: dict, **context) -> str:
+        profile_id = uuid.uuid4().hex[:16]
+        with self._lock:
+            self._reports[profile_id] = {"id": profile_id, **context, **report}
+            while len(self._reports) > max(env_int("PROFILE_STORE_SIZE", 50), 1):
+                self._reports.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._reports.get(profile_id)
+
+    def __len__(self) -> int:
+        return len(self._reports)
+
+
+store = ProfileStore()
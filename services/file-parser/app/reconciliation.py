@@ -0,0 +1,88 @@
+"""Balance-chain reconciliation for parsed statement rows."""
+from typing import Optional
+
+import numpy as np
+
+from .models import Transaction
+from .money import to_cents
+
+_RECORD_FIELDS = {"amountIn": "amount_in", "amountOut": "amount_out", "balance": "balance"}
+
+
+def _cents_array(transactions: list, field: str) -> tuple[np.ndarray, np.ndarray]:
+    """Return (values in cents, known mask) for one amount field of rows or records."""
+    values = np.zeros(len(transactions), dtype=np.int64)
+    known = np.zeros(len(transactions), dtype=bool)
+    record_field = _RECORD_FIELDS[field]
+    for index, transaction in enumerate(transactions):
+        if isinstance(transaction, Transaction):
+            value = getattr(transaction, record_field)
+        else:
+            value = transaction.get(field)
+        cents = to_cents(value)
+        if cents is None:
+            continue
+        values[index] = cents
+        known[index] = True
+    return values, known
+
+
+def reconcile(transactions: list, opening_balance: Optional[float] = None) -> dict:
+    """Check balance[i-1] + in - out == balance[i] across a whole result.
+
+    Works on cumulative sums: every row with a printed balance implies an opening
+    balance of `balance - cumsum(in - out)`. Consecutive balance rows must agree on
+    it, which also covers rows without a balance in between. A row whose implied
+    opening differs from the previous balance row is reported as a mismatch; rows
+    that cannot be checked either way are reported as unverified.
+    """
+    count = len(transactions)
+    if not count:
+        return {
+            "reconciled": True,
+            "checked": 0,
+            "mismatched": 0,
+            "unverified": 0,
+            "mismatchIndices": [],
+            "unverifiedIndices": [],
+        }
+
+    amount_in, _ = _cents_array(transactions, "amountIn")
+    amount_out, _ = _cents_array(transactions, "amountOut")
+    balance, has_balance = _cents_array(transactions, "balance")
+
+    implied_opening = balance - np.cumsum(amount_in - amount_out)
+    balance_rows = np.flatnonzero(has_balance)
+    row_opening = implied_opening[balance_rows]
+
+    if opening_balance is not None:
+        previous_opening = np.empty(len(balance_rows), dtype=np.int64)
+        previous_opening[:1] = to_cents(opening_balance)
+        previous_opening[1:] = row_opening[:-1]
+        checked_rows = balance_rows
+        checked_mismatch = row_opening != previous_opening
+    else:
+        # Without an opening balance the first balance row can only anchor the chain.
+        checked_rows = balance_rows[1:]
+        checked_mismatch = row_opening[1:] != row_opening[:-1]
+
+    mismatch_indices = checked_rows[checked_mismatch]
+    balance_ok = np.zeros(count, dtype=bool)
+    balance_ok[checked_rows[~checked_mismatch]] = True
+
+    # Rows without a printed balance are covered by the next balance row that checks out.
+    covering_position = np.searchsorted(balance_rows, np.arange(count), side="left")
+    has_cover = covering_position < len(balance_rows)
+    verified = np.zeros(count, dtype=bool)
+    verified[has_cover] = balance_ok[balance_rows[covering_position[has_cover]]]
+    verified[mismatch_indices] = True
+    unverified_indices = np.flatnonzero(~verified)
+
+    return {
+        "reconciled": bool(len(mismatch_indices) == 0 and len(unverified_indices) == 0),
+        "checked": int(len(checked_rows)),
+        "mismatched": int(len(mismatch_indices)),
+        "unverified": int(len(unverified_indices)),
+        "mismatchIndices": [int(index) for index in mismatch_indices],
+        "unverifiedIndices": [int(index) for index in unverified_indices],
+    }
@@ -0,0 +1,43 @@
+"""Small thread-safe LRU caches for results derived from a request body or rule set."""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+from .env import env_int
+
+
+def batch_hash(body: bytes, *options) -> str:
+    """Hash a request body together with the options that change its result."""
+    digest = hashlib.sha256(body)
+    for option in options:
+        digest.update(b"\0" + repr(option).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """LRU of computed results; the size is read from `size_env` on every insert."""
+
+    def __init__(self, size_env: str, default_size: int):
+        self.size_env = size_env
+        self.default_size = default_size
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> tuple[Any, bool]:
+        """Return (result, cache hit), running `compute` outside the lock on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key], True
+
+        result = compute()
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > max(env_int(self.size_env, self.default_size), 1):
+                self._entries.popitem(last=False)
+        return result, False
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,145 @@
+"""Stitch consecutive bank statements for one account into a continuous ledger."""
+import re
+from typing import Iterable, Iterator, Optional
+
+from dateutil import parser as date_parser
+
+from .money import to_cents
+
+STITCHABLE_PARSER_IDS = {"dbs_posb_consolidated", "ocbc_frank_statement"}
+
+
+class AccountMismatch(ValueError):
+    """Raised when the statements to stitch belong to different accounts."""
+
+    code = "ACCOUNT_MISMATCH"
+
+
+def _parse_period_date(value) -> Optional[str]:
+    if not value:
+        return None
+    try:
+        return date_parser.parse(str(value)).strftime("%Y-%m-%d")
+    except Exception:
+        return None
+
+
+def statement_period(transactions: list[dict]) -> tuple[Optional[str], Optional[str]]:
+    """Return (start, end) for a parsed statement from its metadata, falling back to row dates."""
+    metadata: dict = {}
+    for transaction in transactions:
+        if isinstance(transaction.get("metadata"), dict):
+            metadata = transaction["metadata"]
+            break
+
+    start = _parse_period_date(metadata.get("statementPeriodStart"))
+    end = _parse_period_date(metadata.get("statementPeriodEnd")) or _parse_period_date(
+        metadata.get("statementDate")
+    )
+    row_dates = sorted(str(tx.get("date")) for tx in transactions if tx.get("date"))
+    if not start and row_dates:
+        start = row_dates[0]
+    if not end and row_dates:
+        end = row_dates[-1]
+    return start, end
+
+
+def statement_account(transactions: list[dict]) -> Optional[str]:
+    """The account a parsed statement belongs to, ignoring separators, or None."""
+    for transaction in transactions:
+        identifier = transaction.get("accountIdentifier")
+        if identifier:
+            return re.sub(r"[\s\-]", "", str(identifier)).upper()
+    return None
+
+
+def _row_key(transaction: dict) -> tuple:
+    return (
+        transaction.get("date"),
+        to_cents(transaction.get("amountIn")),
+        to_cents(transaction.get("amountOut")),
+        to_cents(transaction.get("balance")),
+        " ".join(str(transaction.get("description") or "").split()).lower(),
+    )
+
+
+def _stitch_rows(statements: Iterable[tuple[int, list[dict]]], report: dict) -> Iterator[dict]:
+    """Yield ledger rows in one pass, dropping boundary overlap and flagging balance gaps."""
+    running_balance: Optional[int] = None
+    previous_keys: set[tuple] = set()
+
+    for statement_index, transactions in statements:
+        current_keys: set[tuple] = set()
+        in_overlap = bool(previous_keys)
+
+        for transaction in transactions:
+            key = _row_key(transaction)
+            # Overlap can only appear at the start of a statement: once a row is new,
+            # everything after it belongs to this statement.
+            if in_overlap and key in previous_keys:
+                report["overlapsRemoved"] += 1
+                continue
+            in_overlap = False
+            current_keys.add(key)
+
+            amount_in = to_cents(transaction.get("amountIn")) or 0
+            amount_out = to_cents(transaction.get("amountOut")) or 0
+            balance = to_cents(transaction.get("balance"))
+
+            if running_balance is not None and balance is not None:
+                expected = running_balance + amount_in - amount_out
+                if expected != balance:
+                    report["gaps"].append(
+                        {
+                            "statementIndex": statement_index,
+                            "date": transaction.get("date"),
+                            "expectedBalance": expected / 100,
+                            "actualBalance": balance / 100,
+                            "difference": (balance - expected) / 100,
+                        }
+                    )
+
+            if balance is not None:
+                running_balance = balance
+            elif running_balance is not None:
+                running_balance += amount_in - amount_out
+            yield transaction
+
+        previous_keys = current_keys
+
+
+def stitch_statements(statements: list[list[dict]]) -> dict:
+    """Order parsed statements by period and merge them into one continuous ledger.
+
+    Raises AccountMismatch when statements name different accounts; statements
+    without an account number are stitched on trust.
+    """
+    accounts = {account for account in map(statement_account, statements) if account}
+    if len(accounts) > 1:
+        raise AccountMismatch(
+            f"Statements belong to different accounts: {', '.join(sorted(accounts))}"
+        )
+
+    periods = [statement_period(transactions) for transactions in statements]
+    order = sorted(
+        range(len(statements)),
+        key=lambda index: (periods[index][0] or "", periods[index][1] or "", index),
+    )
+
+    report = {"overlapsRemoved": 0, "gaps": []}
+    ledger = list(_stitch_rows(((index, statements[index]) for index in order), report))
+
+    return {
+        "transactions": ledger,
+        "statements": [
+            {
+                "index": index,
+                "periodStart": periods[index][0],
+                "periodEnd": periods[index][1],
+                "count": len(statements[index]),
+            }
+            for index in order
+        ],
+        "overlapsRemoved": report["overlapsRemoved"],
+        "gaps": report["gaps"],
+    }
@@ -0,0 +1,150 @@
+import io
+
+from app import admission
+from app.admission import BULK, INTERACTIVE, AdmissionController, Overloaded
+
+
+def _grant_order(controller, tickets):
+    order = []
+    pending = list(tickets)
+    while pending:
+        granted = [ticket for ticket in pending if ticket.granted]
+        assert len(granted) == 1
+        order.append((granted[0].lane, granted[0].user))
+        pending.remove(granted[0])
+        controller._release(granted[0], 0.0)
+    return order
+
+
+def test_users_are_served_round_robin_within_a_lane():
+    controller = AdmissionController(concurrency=1, memory_budget=10**9)
+    holder = controller._enqueue("holder", INTERACTIVE, 1)
+    tickets = [controller._enqueue("alice", BULK, 1) for _ in range(3)]
+    tickets.append(controller._enqueue("bob", BULK, 1))
+    controller._release(holder, 0.0)
+
+    assert _grant_order(controller, tickets) == [
+        (BULK, "alice"),
+        (BULK, "bob"),
+        (BULK, "alice"),
+        (BULK, "alice"),
+    ]
+
+
+def test_interactive_lane_goes_first_but_bulk_still_gets_a_share():
+    controller = AdmissionController(concurrency=1, memory_budget=10**9, interactive_burst=2)
+    holder = controller._enqueue("holder", BULK, 1)
+    tickets = [controller._enqueue("bulk-user", BULK, 1)]
+    tickets += [controller._enqueue(f"user-{i}", INTERACTIVE, 1) for i in range(3)]
+    controller._release(holder, 0.0)
+
+    lanes = [lane for lane, _ in _grant_order(controller, tickets)]
+    assert lanes == [INTERACTIVE, INTERACTIVE, BULK, INTERACTIVE]
+
+
+def test_full_queue_and_memory_budget_are_shed_with_retry_after():
+    controller = AdmissionController(
+        concurrency=1, memory_budget=100, max_queue={INTERACTIVE: 1, BULK: 1}
+    )
+    controller._enqueue("a", INTERACTIVE, 10)
+    controller._enqueue("b", INTERACTIVE, 10)
+
+    try:
+        controller._enqueue("c", INTERACTIVE, 10)
+    except Overloaded as e:
+        assert e.retry_after >= 1
+    else:
+        raise AssertionError("expected Overloaded")
+
+    try:
+        controller._enqueue("d", BULK, 500)
+    except Overloaded:
+        pass
+    else:
+        raise AssertionError("expected Overloaded")
+
+    metrics = controller.metrics()
+    assert metrics["queueDepth"] == {INTERACTIVE: 1, BULK: 0}
+    assert metrics["shed"][INTERACTIVE]["queue"] == 1
+    assert metrics["shed"][BULK]["memory"] == 1
+
+
+def test_queued_request_times_out_and_releases_its_reservation():
+    controller = AdmissionController(concurrency=1, memory_budget=10**9, queue_timeout=0.05)
+    holder = controller._enqueue("a", INTERACTIVE, 10)
+    try:
+        with controller.admit("b", INTERACTIVE, 20):
+            raise AssertionError("should not be admitted")
+    except Overloaded:
+        pass
+    controller._release(holder, 0.0)
+
+    metrics = controller.metrics()
+    assert metrics["reservedBytes"] == 0
+    assert metrics["shed"][INTERACTIVE]["timeout"] == 1
+
+
+def test_pdf_page_count_and_lane_choice():
+    pdf = b"%PDF-1.4\n<< /Type /Pages /Count 2 >>\n<< /Type /Page >>\n<< /Type/Page >>"
+
+    assert admission.estimate_page_count(pdf) == 2
+    assert admission.choose_lane(None, 1, 2) == INTERACTIVE
+    assert admission.choose_lane(None, 3, 2) == BULK
+    assert admission.choose_lane("bulk", 1, 1) == BULK
+
+
+def test_parse_endpoint_returns_429_when_shed(monkeypatch):
+    from app.main import app
+
+    monkeypatch.setattr(
+        admission,
+        "controller",
+        AdmissionController(concurrency=1, memory_budget=10**9, max_queue={INTERACTIVE: 0, BULK: 0}),
+    )
+    response = app.test_client().post(
+        "/parse",
+        data={"parserId": "generic_csv", "file": (io.BytesIO(b"Date,Amount\n"), "a.csv")},
+    )
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response.get_json()["code"] == "OVERLOADED"
+
+
+def test_concurrent_document_parses_each_take_a_slot(monkeypatch):
+    import io
+    import threading
+    import time
+
+    from app import main
+
+    monkeypatch.setenv("PARSE_ISOLATION", "inline")
+    controller = AdmissionController(concurrency=2, memory_budget=10**9)
+    monkeypatch.setattr(main.admission, "controller", controller)
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def fake_parse(content):
+        with lock:
+            running.append(content)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(content)
+        return []
+
+    monkeypatch.setitem(main.PARSER_MAP, "revolut_statement", fake_parse)
+    response = main.app.test_client().post(
+        "/parse",
+        data={
+            "parserId": "revolut_statement",
+            "file": (io.BytesIO(b"a"), "sgd.pdf"),
+            "supplementalFile": [(io.BytesIO(name.encode()), f"{name}.csv") for name in "bcd"],
+        },
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 200
+    assert len(peak) == 4
+    assert max(peak) == 2
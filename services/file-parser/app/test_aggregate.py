@@ -0,0 +1,91 @@
+from app.aggregate import aggregate
+from app.columnar import encode_binary, to_columnar
+
+
+def _row(date, amount_in=None, amount_out=None, category=None, account="A", description="Shop"):
+    return {
+        "date": date,
+        "description": description,
+        "amountIn": amount_in,
+        "amountOut": amount_out,
+        "categoryId": category,
+        "accountIdentifier": account,
+        "metadata": {},
+    }
+
+
+ROWS = [
+    _row("2024-01-03", amount_out=10.10, category="food", description="Starbucks SINGAPORE SG"),
+    _row("2024-01-03", amount_out=5.20, category="food", description="STARBUCKS"),
+    _row("2024-01-15", amount_in=100.0, description="Salary"),
+    _row("2024-02-01T00:00:00.000Z", amount_out=40.0, category="travel", account="B",
+         description="GRAB 4111-XXXX-XXXX-1234"),
+    {
+        **_row("2024-02-02", amount_out=30.0, category="food", description="Dinner"),
+        "linkage": {"reimbursedByAllocations": [{"amount": 20.0}]},
+    },
+    _row("not a date", amount_out=999.0),
+]
+
+
+def test_monthly_category_and_account_rollups():
+    result = aggregate(to_columnar(ROWS))
+
+    assert result["totals"] == {"totalIn": 100.0, "totalOut": 65.3, "net": 34.7, "count": 5}
+    assert result["monthly"] == [
+        {"month": "2024-01", "totalIn": 100.0, "totalOut": 15.3, "net": 84.7, "count": 3},
+        {"month": "2024-02", "totalIn": 0.0, "totalOut": 50.0, "net": -50.0, "count": 2},
+    ]
+    assert [(c["categoryId"], c["totalOut"]) for c in result["categories"]] == [
+        ("travel", 40.0),
+        ("food", 25.3),
+        ("uncategorized", 0.0),
+    ]
+    assert [(a["account"], a["net"]) for a in result["accounts"]] == [("A", 74.7), ("B", -40.0)]
+
+
+def test_dates_with_an_offset_are_bucketed_by_their_local_date():
+    rows = [
+        _row("2025-03-01T00:30+08:00", amount_out=5.0),
+        _row("2025-02-28T23:30:00-05:00", amount_out=7.0),
+    ]
+
+    result = aggregate(to_columnar(rows))
+
+    assert [(m["month"], m["totalOut"]) for m in result["monthly"]] == [
+        ("2025-02", 7.0),
+        ("2025-03", 5.0),
+    ]
+
+
+def test_running_balances_and_top_merchants():
+    result = aggregate(to_columnar(ROWS), top_merchants=2, opening_balances={"A": "50.00"})
+
+    assert result["runningBalances"]["A"] == [
+        {"date": "2024-01-03", "net": -15.3, "balance": 34.7},
+        {"date": "2024-01-15", "net": 100.0, "balance": 134.7},
+        {"date": "2024-02-02", "net": -10.0, "balance": 124.7},
+    ]
+    assert result["runningBalances"]["B"][-1]["balance"] == -40.0
+    assert result["topMerchants"] == [
+        {"merchantKey": "grab", "totalOut": 40.0, "count": 1},
+        {"merchantKey": "starbucks", "totalOut": 15.3, "count": 2},
+    ]
+
+
+def test_aggregate_endpoint_accepts_binary_batches_and_caches_by_hash():
+    from app.main import app
+
+    client = app.test_client()
+    body = encode_binary(to_columnar(ROWS), {"openingBalances": {"A": 50}})
+    headers = {"Content-Type": "application/vnd.file-parser.columnar"}
+
+    first = client.post("/aggregate", data=body, headers=headers).get_json()
+    second = client.post("/aggregate", data=body, headers=headers).get_json()
+
+    assert first["cached"] is False
+    assert second["cached"] is True
+    assert second["runningBalances"]["A"][-1]["balance"] == 124.7
+    plain = client.post("/aggregate", json={"transactions": ROWS}).get_json()
+    assert plain["monthly"] == first["monthly"]
+    assert client.post("/aggregate", json={"rows": []}).status_code == 400
@@ -0,0 +1,147 @@
+import io
+import json
+import zipfile
+
+from app import archives
+from app.main import app
+
+GENERIC_CSV = b"Date,Description,Credit,Debit,Balance\n01/02/2024,Coffee,,4.50,95.50\n"
+REVOLUT_CSV = (
+    b"Type,Product,Started Date,Completed Date,Description,Amount,Fee,Currency,State,Balance\n"
+    b"CARD_PAYMENT,Current,2024-03-01 10:00:00,2024-03-02 09:00:00,Cafe,-4.50,0.00,SGD,COMPLETED,95.50\n"
+)
+
+
+def _zip(entries: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in entries.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def test_parser_is_detected_from_entry_content(monkeypatch):
+    pages = {
+        b"%PDF-1 a": "DBS PayLah! Statement\nNEW TRANSACTIONS",
+        b"%PDF-1 b": "POSB eSavings Account\nBalance Brought Forward 1,000.00",
+        b"%PDF-1 c": "Quarterly summary",
+        b"%PDF-1 d": "POSB eSavings Account\nBalance Brought Forward 100.00\n"
+        "01/01/2024 TOP-UP TO PAYLAH! 10.00 90.00",
+        b"%PDF-1 e": "OCBC FRANK Account\nBALANCE B/F 500.00\n"
+        "03 JAN 03 JAN FAST PAYMENT TO REVOLUT 25.00 475.00",
+        b"%PDF-1 f": "Account No. 6871234567\nBALANCE B/F 500.00\nTOP UP PAYLAH 25.00 475.00",
+    }
+    monkeypatch.setattr(archives, "_first_page_text", lambda content: pages[content])
+
+    assert archives.detect_parser("a.pdf", b"%PDF-1 a") == "dbs_paylah_statement"
+    assert archives.detect_parser("b.pdf", b"%PDF-1 b") == "dbs_posb_consolidated"
+    assert archives.detect_parser("c.pdf", b"%PDF-1 c", "ocbc_frank_statement") == "ocbc_frank_statement"
+    assert archives.detect_parser("d.pdf", b"%PDF-1 d") == "dbs_posb_consolidated"
+    assert archives.detect_parser("e.pdf", b"%PDF-1 e") == "ocbc_frank_statement"
+    assert archives.detect_parser("f.pdf", b"%PDF-1 f") == "ocbc_frank_statement"
+    assert archives.detect_parser("export.csv", REVOLUT_CSV) == "revolut_statement"
+    assert archives.detect_parser("bank.csv", GENERIC_CSV) == "generic_csv"
+    assert archives.detect_parser("notes.txt", b"hello", "generic_csv") == "generic_csv"
+    assert archives.detect_parser("notes.txt", b"hello") is None
+
+
+def test_declared_size_past_the_budget_is_rejected_before_inflating(monkeypatch):
+    monkeypatch.setenv("MAX_ARCHIVE_UNCOMPRESSED_BYTES", "10000")
+    bomb = _zip({"a.csv": b"0" * 6000, "b.csv": b"0" * 6000})
+
+    try:
+        archives.iter_entries(bomb)
+    except archives.ArchiveTooLarge as e:
+        assert e.code == "ARCHIVE_TOO_LARGE"
+    else:
+        raise AssertionError("expected ArchiveTooLarge")
+
+
+def test_inflated_bytes_are_counted_against_the_budget_while_reading():
+    archive = zipfile.ZipFile(io.BytesIO(_zip({"a.csv": b"0" * 6000, "b.csv": b"0" * 6000})))
+
+    entries = archives._entries(archive, archive.infolist(), 10000)
+
+    assert next(entries)[0] == "a.csv"
+    try:
+        next(entries)
+    except archives.ArchiveTooLarge:
+        pass
+    else:
+        raise AssertionError("expected ArchiveTooLarge")
+
+
+def test_parse_archive_streams_one_line_per_entry_and_a_summary(monkeypatch):
+    monkeypatch.setenv("PARSE_ISOLATION", "inline")
+    content = _zip(
+        {
+            "2024/bank.csv": GENERIC_CSV,
+            "2024/revolut.csv": REVOLUT_CSV,
+            "__MACOSX/._bank.csv": b"junk",
+            "readme.txt": b"not a statement",
+        }
+    )
+
+    response = app.test_client().post(
+        "/parse-archive",
+        data={"file": (io.BytesIO(content), "statements.zip")},
+        content_type="multipart/form-data",
+    )
+
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    summary = lines.pop()
+    by_name = {line["filename"]: line for line in lines}
+    assert by_name["2024/bank.csv"]["parserId"] == "generic_csv"
+    assert by_name["2024/bank.csv"]["transactions"][0]["merchantKey"]
+    assert by_name["2024/revolut.csv"]["parserId"] == "revolut_statement"
+    assert by_name["readme.txt"]["success"] is False
+    assert summary == {
+        "done": True,
+        "filename": "statements.zip",
+        "entries": 3,
+        "parsed": 2,
+        "failed": 1,
+        "count": summary["count"],
+    }
+    assert summary["count"] == sum(line.get("count", 0) for line in lines)
+
+
+def test_parse_archive_streams_results_before_reading_every_entry(monkeypatch):
+    from app import main
+
+    monkeypatch.setenv("PARSE_ISOLATION", "inline")
+    monkeypatch.setenv("ARCHIVE_PARSE_WORKERS", "1")
+    read = []
+
+    def entries(content):
+        for index in range(5):
+            read.append(index)
+            yield f"{index}.csv", GENERIC_CSV
+
+    monkeypatch.setattr(main, "iter_entries", entries)
+
+    response = app.test_client().post(
+        "/parse-archive",
+        data={"file": (io.BytesIO(_zip({"a.csv": GENERIC_CSV})), "statements.zip")},
+        content_type="multipart/form-data",
+        buffered=False,
+    )
+    chunks = iter(response.response)
+    first = json.loads(next(chunks))
+    read_before_first = len(read)
+    rest = [json.loads(chunk) for chunk in chunks]
+
+    assert first["success"] is True
+    assert read_before_first == 1
+    assert len(rest) == 5 and rest[-1]["entries"] == 5
+
+
+def test_parse_archive_rejects_non_zip_uploads():
+    response = app.test_client().post(
+        "/parse-archive",
+        data={"file": (io.BytesIO(GENERIC_CSV), "bank.csv")},
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 400
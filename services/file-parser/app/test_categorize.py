@@ -0,0 +1,101 @@
+import random
+
+from app.categorize import CompiledRules, categorize
+
+
+def _rule(rule_id, needle, **fields):
+    return {"id": rule_id, "matchType": "description_contains", "matchValue": needle, **fields}
+
+
+def test_automaton_matches_the_substring_loop():
+    rng = random.Random(7)
+    needles = ["".join(rng.choice("abAB ") for _ in range(rng.randint(1, 4))) for _ in range(60)]
+    rules = [
+        _rule(i, needle, caseSensitive=rng.random() < 0.5) for i, needle in enumerate(needles)
+    ]
+    compiled = CompiledRules(rules)
+
+    for _ in range(200):
+        text = "".join(rng.choice("abAB c") for _ in range(rng.randint(0, 30)))
+        expected = []
+        for index, rule in enumerate(rules):
+            needle = rule["matchValue"].strip()
+            if not needle:
+                continue
+            if rule["caseSensitive"]:
+                found = needle in text
+            else:
+                found = needle.lower() in text.lower()
+            if found:
+                expected.append(index)
+        assert compiled.matching_rules(text) == expected, text
+
+
+def test_first_label_and_category_win_and_internal_blocks_category():
+    rules = [
+        _rule("grab", "grab", setLabel="Transport", setCategoryName="Transport"),
+        _rule("food", "GrabFood", caseSensitive=True, setCategoryName="Food"),
+        _rule("self", "to own account", markInternal=True, setCategoryName="Internal"),
+        {"id": "all", "matchType": "always", "setLabel": "Imported"},
+        _rule("off", "coffee", enabled=False, setLabel="Coffee"),
+        _rule("ocbc", "coffee", parserId="ocbc_frank", setLabel="OCBC coffee"),
+    ]
+    transactions = [
+        {"description": "GRABFOOD SG"},
+        {"description": "GrabFood delivery", "categoryId": "cat-1"},
+        {"description": "Transfer to own account"},
+        {"description": "Coffee", "label": "Mine"},
+    ]
+
+    result = categorize(transactions, rules, "dbs_posb_consolidated")
+    suggestions = result["suggestions"]
+
+    assert suggestions[0] == {
+        "categoryName": "Transport",
+        "label": "Transport",
+        "markInternal": False,
+        "matchedRuleIds": ["grab", "all"],
+    }
+    assert suggestions[1]["categoryName"] is None
+    assert suggestions[1]["matchedRuleIds"] == ["grab", "food", "all"]
+    assert suggestions[2]["markInternal"] is True
+    assert suggestions[2]["categoryName"] is None
+    assert suggestions[2]["label"] == "Imported"
+    assert suggestions[3] == {
+        "categoryName": None,
+        "label": None,
+        "markInternal": False,
+        "matchedRuleIds": ["all"],
+    }
+
+
+def test_compiled_rule_sets_are_cached_by_hash():
+    rules = [_rule("r1", "netflix", setCategoryName="Subscriptions")]
+
+    first = categorize([{"description": "NETFLIX.COM"}], rules)
+    second = categorize([{"description": "netflix"}], [dict(rules[0])])
+    changed = categorize([{"description": "netflix"}], [_rule("r1", "spotify")])
+
+    assert second["cached"] is True
+    assert second["ruleSetHash"] == first["ruleSetHash"]
+    assert changed["ruleSetHash"] != first["ruleSetHash"]
+    assert changed["suggestions"][0]["matchedRuleIds"] == []
+
+
+def test_categorize_endpoint():
+    from app.main import app
+
+    response = app.test_client().post(
+        "/categorize",
+        json={
+            "parserId": "generic_csv",
+            "rules": [_rule("r1", "salary", setCategoryName="Income")],
+            "transactions": [{"description": "SALARY JAN"}, {"description": "Rent"}],
+        },
+    )
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body["count"] == 2
+    assert [s["categoryName"] for s in body["suggestions"]] == ["Income", None]
+    assert app.test_client().post("/categorize", json={"rules": []}).status_code == 400
@@ -0,0 +1,97 @@
+import json
+import time
+
+from app import cli, workers
+
+GENERIC_CSV = b"Date,Description,Credit,Debit,Balance\n01/02/2024,Coffee,,4.50,95.50\n"
+
+
+def _lines(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_parse_directory_writes_one_line_per_file_and_resumes(tmp_path, capsys):
+    statements = tmp_path / "statements"
+    (statements / "2024").mkdir(parents=True)
+    (statements / "2024" / "jan.csv").write_bytes(GENERIC_CSV)
+    (statements / "feb.csv").write_bytes(GENERIC_CSV)
+    (statements / "broken.pdf").write_bytes(b"%PDF-1.4 not really")
+    (statements / "notes.txt").write_text("ignored")
+    output = tmp_path / "out.ndjson"
+    summary_path = tmp_path / "summary.json"
+
+    code = cli.main(
+        ["parse", str(statements), "-o", str(output), "--workers", "2", "--summary", str(summary_path)]
+    )
+
+    records = {record["path"]: record for record in _lines(output)}
+    assert code == 1
+    assert sorted(records) == ["2024/jan.csv", "broken.pdf", "feb.csv"]
+    assert records["feb.csv"]["parserId"] == "generic_csv"
+    assert records["feb.csv"]["transactions"][0]["description"] == "Coffee"
+    assert records["broken.pdf"]["success"] is False
+    summary = json.loads(summary_path.read_text())
+    assert summary["parsed"] == 2
+    assert summary["rows"] == 2
+    assert summary["failuresByParser"] == {"undetected": 1}
+    assert len(summary["slowest"]) == 3
+    assert "pages/s" in capsys.readouterr().err
+
+    (statements / "mar.csv").write_bytes(GENERIC_CSV)
+    cli.main(["parse", str(statements), "-o", str(output), "--resume", "--format", "columnar"])
+
+    # Only files that parsed were checkpointed, so the broken one is retried
+    resumed = {record["path"]: record for record in _lines(output)[3:]}
+    assert sorted(resumed) == ["broken.pdf", "mar.csv"]
+    assert resumed["mar.csv"]["columnar"]["count"] == 1
+
+
+def test_resume_without_a_checkpoint_is_an_error(tmp_path, capsys):
+    (tmp_path / "feb.csv").write_bytes(GENERIC_CSV)
+
+    code = cli.main(["parse", str(tmp_path), "--resume"])
+
+    assert code == 2
+    assert "--resume needs" in capsys.readouterr().err
+
+
+def _stuck(task):
+    time.sleep(30)
+
+
+def test_file_stuck_without_deadline_checks_is_killed(tmp_path, monkeypatch):
+    monkeypatch.setenv("PARSE_ISOLATION", "process")
+    monkeypatch.setenv("PARSE_KILL_GRACE_SECONDS", "0.2")
+    if workers.isolation_mode() != "process":
+        return
+    monkeypatch.setattr(cli, "parse_file", _stuck)
+    (tmp_path / "feb.csv").write_bytes(GENERIC_CSV)
+    output = tmp_path / "out.ndjson"
+
+    started = time.monotonic()
+    code = cli.main(["parse", str(tmp_path), "-o", str(output), "--timeout", "0.2"])
+
+    assert code == 1
+    assert time.monotonic() - started < 5
+    assert _lines(output)[0]["code"] == "PARSE_TIMEOUT"
+
+
+def test_compare_backends_reports_files_whose_rows_differ(tmp_path, monkeypatch, capsys):
+    from app import extraction
+
+    (tmp_path / "a.pdf").write_bytes(b"%PDF-1.4 a")
+    (tmp_path / "b.pdf").write_bytes(b"%PDF-1.4 b")
+
+    def fake_parse_on_each_backend(parser_func, content):
+        rows = [{"description": "Coffee"}]
+        other = rows if content.endswith(b"a") else [{"description": "Cof fee"}]
+        return {extraction.PDFPLUMBER: rows, extraction.PDFIUM: other}
+
+    monkeypatch.setattr(extraction, "parse_on_each_backend", fake_parse_on_each_backend)
+
+    code = cli.main(["compare-backends", str(tmp_path), "--parser-id", "dbs_paylah_statement"])
+
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert code == 1
+    assert [record["identical"] for record in records] == [True, False]
+    assert records[1]["firstDifference"][extraction.PDFIUM] == {"description": "Cof fee"}
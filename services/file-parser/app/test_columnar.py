@@ -0,0 +1,61 @@
+from app.columnar import decode_binary, encode_binary, from_columnar, negotiate_format, to_columnar
+
+
+def _rows():
+    statement = {"source": "pdf", "parserId": "youtrip_statement", "currency": "SGD"}
+    return [
+        {
+            "date": "2024-01-01",
+            "description": "Grocery store",
+            "amountIn": None,
+            "amountOut": 12.84,
+            "balance": 100.0,
+            "accountNumber": "Y-1",
+            "metadata": {**statement, "feeAmount": 0.5, "transactionType": "card_payment"},
+        },
+        {
+            "date": "2024-01-02",
+            "description": "Top up",
+            "amountIn": 20.0,
+            "amountOut": None,
+            "balance": 120.0,
+            "accountNumber": "Y-1",
+            "metadata": {**statement, "transactionType": "topup"},
+        },
+    ]
+
+
+def test_statement_values_move_to_header_and_optional_metadata_is_sparse():
+    columnar = to_columnar(_rows())
+
+    assert columnar["header"]["fields"] == {"accountNumber": "Y-1"}
+    assert columnar["header"]["metadata"]["parserId"] == "youtrip_statement"
+    assert columnar["columns"]["amountOut"] == [12.84, None]
+    assert columnar["sparseMetadata"]["feeAmount"] == {"index": [0], "values": [0.5]}
+    assert from_columnar(columnar) == _rows()
+
+
+def test_binary_encoding_round_trips_with_envelope():
+    columnar = to_columnar(_rows())
+
+    decoded, envelope = decode_binary(encode_binary(columnar, {"parserId": "youtrip_statement"}))
+
+    assert envelope == {"parserId": "youtrip_statement"}
+    assert from_columnar(decoded) == _rows()
+
+
+def test_binary_integer_columns_decode_as_integers():
+    rows = [{**row, "merchantId": merchant} for row, merchant in zip(_rows(), [90569213166891, 3])]
+
+    decoded, _ = decode_binary(encode_binary(to_columnar(rows)))
+
+    assert decoded["columns"]["merchantId"] == [90569213166891, 3]
+    assert all(type(value) is int for value in decoded["columns"]["merchantId"])
+    assert from_columnar(decoded) == rows
+
+
+def test_default_format_stays_plain_json():
+    assert negotiate_format(None, "application/json") == "json"
+    assert negotiate_format(None, "application/vnd.file-parser.columnar+json") == "columnar"
+    assert negotiate_format(None, "application/vnd.file-parser.columnar") == "columnar-binary"
+    assert negotiate_format("columnar", None) == "columnar"
@@ -0,0 +1,57 @@
+import gzip
+import io
+import zlib
+
+import pytest
+from werkzeug.datastructures import Accept
+
+from app import compression
+from app.main import app
+
+
+def test_zstd_is_preferred_when_both_are_accepted():
+    accept = Accept([("gzip", 1), ("zstd", 1)])
+    expected = "zstd" if compression.zstandard is not None else "gzip"
+
+    assert compression.choose_encoding(accept) == expected
+    assert compression.choose_encoding(Accept([("br", 1)])) is None
+
+
+def test_oversized_decompressed_upload_is_rejected(monkeypatch):
+    monkeypatch.setenv("MAX_DECOMPRESSED_BYTES", "1000")
+
+    with pytest.raises(ValueError, match="size limit"):
+        compression.decompress(gzip.compress(b"0" * 5000), "gzip")
+
+
+def test_streamed_gzip_body_decodes_to_the_original_chunks():
+    chunks = [b'{"row": 1}\n', b'{"row": 2}\n']
+
+    body = b"".join(compression.compress_stream(iter(chunks), "gzip"))
+
+    assert zlib.decompress(body, 47) == b"".join(chunks)
+
+
+def test_parse_accepts_gzipped_csv_and_compresses_large_responses(monkeypatch):
+    monkeypatch.setenv("COMPRESSION_MIN_BYTES", "10")
+    csv_text = b"Date,Description,Credit,Debit,Balance\n01/02/2024,Coffee,,4.50,95.50\n"
+    client = app.test_client()
+
+    response = client.post(
+        "/parse",
+        data={"parserId": "generic_csv", "file": (io.BytesIO(gzip.compress(csv_text)), "a.csv.gz")},
+        headers={"Accept-Encoding": "gzip"},
+        content_type="multipart/form-data",
+    )
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert b'"Coffee"' in gzip.decompress(response.data)
+
+
+def test_every_member_of_a_concatenated_gzip_upload_is_read(monkeypatch):
+    monkeypatch.setenv("MAX_DECOMPRESSED_BYTES", "1000")
+    body = gzip.compress(b"a" * 600) + gzip.compress(b"b" * 300)
+
+    assert compression.maybe_decompress(body) == b"a" * 600 + b"b" * 300
+    with pytest.raises(ValueError, match="size limit"):
+        compression.decompress(body + gzip.compress(b"c" * 200), "gzip")
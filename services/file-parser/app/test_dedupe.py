@@ -0,0 +1,99 @@
+from app.dedupe import attach_fingerprints, find_duplicates, transaction_fingerprint
+
+
+def _row(date, description, amount_out, account="123-456"):
+    return {
+        "date": date,
+        "description": description,
+        "amountIn": None,
+        "amountOut": amount_out,
+        "accountIdentifier": account,
+        "metadata": {},
+    }
+
+
+def test_fingerprint_is_stable_across_formatting_noise():
+    left = transaction_fingerprint(_row("2024-01-02", "GRAB *Ride  SG", 12.5))
+    right = transaction_fingerprint(_row("02 Jan 2024", "grab ride sg", "12.50", "123456"))
+
+    assert left == right
+
+
+def test_overlapping_reimport_is_a_multiset_intersection():
+    existing_rows = attach_fingerprints(
+        [_row("2024-01-02", "Coffee", 4.5), _row("2024-01-03", "Lunch", 12.0)]
+    )
+    existing = [
+        {"id": f"tx-{i}", "fingerprint": row["fingerprint"]}
+        for i, row in enumerate(existing_rows)
+    ]
+    batch = [
+        _row("2024-01-02", "Coffee", 4.5),
+        _row("2024-01-02", "Coffee", 4.5),
+        _row("2024-01-04", "Dinner", 30.0),
+    ]
+
+    result = find_duplicates(batch, existing)
+
+    assert [match["existingId"] for match in result["exact"]] == ["tx-0"]
+    assert result["batchDuplicates"] == []
+    assert result["new"] == [1, 2]
+
+
+def test_near_duplicates_use_bucket_and_date_window():
+    existing_row = attach_fingerprints([_row("2024-01-02", "Tokyo Metro", 3.2)])[0]
+    existing = [
+        {
+            "id": "tx-1",
+            "fingerprint": existing_row["fingerprint"],
+            "bucket": existing_row["fingerprintBucket"],
+            "date": "2024-01-02",
+            "description": "Tokyo Metro",
+        }
+    ]
+
+    result = find_duplicates(
+        [_row("2024-01-03", "Tokyo Metro Shinjuku", 3.2), _row("2024-01-09", "Tokyo Metro", 3.2)],
+        existing,
+    )
+
+    assert result["exact"] == []
+    assert result["near"][0]["index"] == 0
+    assert result["near"][0]["matches"][0]["existingId"] == "tx-1"
+    assert result["new"] == [1]
+
+
+def test_near_match_scores_stay_below_an_exact_match():
+    existing_row = attach_fingerprints([_row("2024-01-02", "Tokyo Metro Shinjuku Station", 3.2)])[0]
+    existing = [
+        {
+            "id": "tx-1",
+            "fingerprint": existing_row["fingerprint"],
+            "bucket": existing_row["fingerprintBucket"],
+            "date": "2024-01-02",
+            "description": "Tokyo Metro Shinjuku Station",
+        }
+    ]
+
+    result = find_duplicates([_row("2024-01-02", "Tokyo Metro Shinjuku Stn", 3.2)], existing)
+
+    score = result["near"][0]["matches"][0]["score"]
+    assert 0.7 < score < 1
+
+
+def test_impossible_dates_are_not_fingerprinted_or_bucketed():
+    existing = [{"id": "tx-1", "fingerprint": "abc", "bucket": "def", "date": "2024-02-30"}]
+
+    result = find_duplicates([_row("2024-02-30", "Coffee", 4.5)], existing)
+
+    assert transaction_fingerprint(_row("2024-02-30", "Coffee", 4.5)) is None
+    assert result["exact"] == []
+    assert result["near"] == []
+    assert result["new"] == [0]
+
+
+def test_signed_amounts_fingerprint_like_unsigned_ones():
+    signed = transaction_fingerprint(_row("2024-01-02", "Coffee", "-4.50"))
+
+    assert signed is not None
+    assert signed == transaction_fingerprint(_row("2024-01-02", "Coffee", 4.5))
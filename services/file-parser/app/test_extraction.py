@@ -0,0 +1,149 @@
+import pytest
+
+from app import extraction
+from app.parsers import (
+    dbs_paylah_parser,
+    dbs_posb_parser,
+    ocbc_frank_parser,
+    revolut_statement_parser,
+    youtrip_statement_parser,
+)
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _pdf(pages: list[list[str]]) -> bytes:
+    """A PDF drawing each line of each page in Helvetica, one line per baseline."""
+    objects = {
+        1: "<< /Type /Catalog /Pages 2 0 R >>",
+        3: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    }
+    kids = []
+    for index, lines in enumerate(pages):
+        stream = "BT /F1 9 Tf\n" + "\n".join(
+            f"1 0 0 1 40 {800 - 14 * row} Tm ({_escape(line)}) Tj" for row, line in enumerate(lines)
+        ) + "\nET"
+        contents, page = 4 + 2 * index, 5 + 2 * index
+        objects[contents] = f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream"
+        objects[page] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents {contents} 0 R "
+            "/Resources << /Font << /F1 3 0 R >> >> >>"
+        )
+        kids.append(f"{page} 0 R")
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    body = b"%PDF-1.4\n"
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(body)
+        body += f"{number} 0 obj\n{objects[number]}\nendobj\n".encode("latin-1")
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    body += "".join(f"{offsets[number]:010d} 00000 n \n" for number in sorted(objects)).encode()
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return body
+
+
+STATEMENTS = {
+    "paylah": (
+        dbs_paylah_parser.parse,
+        [
+            [
+                "22 Dec 2025 6593417426 888888002335658",
+                "NEW TRANSACTIONS",
+                "26 Nov MIRANA SIGN 4.40 DB",
+                "REF NO 123",
+                "27 Dec TOP UP FROM DBS 50.00 CR",
+                "Total : 54.40",
+            ]
+        ],
+    ),
+    "youtrip": (
+        youtrip_statement_parser.parse,
+        [
+            [
+                "My SGD Statement",
+                "Y-12345678",
+                "Transactions",
+                "1 Jan 2024 Grocery store $12.34 $100.00",
+                "(¥1,200.00 JPY)",
+                "FX rate: $1 SGD = ¥110.5 JPY",
+                "Fee $0.50",
+                "2 Jan 2024 SmartExchange $20.00 $120.00",
+                "$20.00 SGD to $14.80 USD",
+            ],
+            ["Some merchant", "3 Jan 2024 $3.00 $117.00", "4 Jan 2024 Top up $50.00 $167.00"],
+        ],
+    ),
+    "revolut": (
+        revolut_statement_parser.parse,
+        [
+            [
+                "SGD Statement",
+                "Account Number 1234567890123",
+                "Date Description Money out Money in Balance",
+                "1 Jan 2024 Card payment Lawson S$5.00 S$95.00",
+                "Revolut Rate S$1.00 = 110.50 JPY 552.50 JPY",
+                "Fee: S$0.20",
+                "2 Jan 2024 Top-up by *1234 S$100.00 S$195.00",
+                "Reference: abc",
+            ],
+            ["3 Jan 2024 Exchanged to JPY S$10.00 S$185.00"],
+        ],
+    ),
+}
+
+
+@pytest.mark.parametrize("name", sorted(STATEMENTS))
+def test_text_parsers_give_identical_rows_on_both_backends(monkeypatch, name):
+    monkeypatch.delenv("LAYOUT_ARTIFACT_DIR", raising=False)
+    parser_func, pages = STATEMENTS[name]
+
+    outputs = extraction.parse_on_each_backend(parser_func, _pdf(pages))
+
+    assert outputs[extraction.PDFIUM]
+    assert outputs[extraction.PDFIUM] == outputs[extraction.PDFPLUMBER]
+
+
+def test_text_parsers_stay_on_pdfplumber_unless_the_env_opts_into_pdfium(monkeypatch):
+    monkeypatch.delenv("LAYOUT_ARTIFACT_DIR", raising=False)
+    monkeypatch.delenv("PDF_TEXT_BACKEND", raising=False)
+    content = _pdf(STATEMENTS["paylah"][1])
+
+    assert dbs_paylah_parser.EXTRACTION_BACKEND == extraction.PDFIUM
+    assert dbs_posb_parser.EXTRACTION_BACKEND == extraction.PDFPLUMBER
+    assert ocbc_frank_parser.EXTRACTION_BACKEND == extraction.PDFPLUMBER
+    with extraction.open_pdf(content, extraction.PDFIUM) as pdf:
+        assert not isinstance(pdf, extraction.PdfiumDocument)
+
+    monkeypatch.setenv("PDF_TEXT_BACKEND", "pdfium")
+    with extraction.open_pdf(content, extraction.PDFIUM) as pdf:
+        assert isinstance(pdf, extraction.PdfiumDocument)
+        with pytest.raises(AttributeError):
+            pdf.pages[0].extract_words()
+    with extraction.open_pdf(content, extraction.PDFPLUMBER) as pdf:
+        assert pdf.pages[0].extract_words()
+
+
+def test_forcing_pdfium_leaves_column_parsers_on_pdfplumber(monkeypatch):
+    monkeypatch.delenv("LAYOUT_ARTIFACT_DIR", raising=False)
+    content = _pdf(
+        [
+            [
+                "Balance Brought Forward SGD 100.00",
+                "01/01/2024 Salary 50.00 150.00",
+                "02/01/2024 Coffee 5.00 145.00",
+                "Balance Carried Forward",
+            ]
+        ]
+    )
+
+    with extraction.use_backend(extraction.PDFIUM):
+        with extraction.open_pdf(content, extraction.PDFPLUMBER) as pdf:
+            assert pdf.pages[0].extract_words()
+    outputs = extraction.parse_on_each_backend(dbs_posb_parser.parse, content)
+
+    assert len(outputs[extraction.PDFIUM]) == 2
+    assert outputs[extraction.PDFIUM] == outputs[extraction.PDFPLUMBER]
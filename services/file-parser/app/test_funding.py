@@ -0,0 +1,61 @@
+from app.funding import expected_amounts, match_funding
+
+
+def _topup(date, amount_in, currency="SGD", **metadata):
+    return {
+        "date": date,
+        "description": "Top up",
+        "amountIn": amount_in,
+        "currency": currency,
+        "metadata": {"transactionType": "topup", **metadata},
+    }
+
+
+def _bank(bank_id, date, amount_out, description="FAST PAYMENT"):
+    return {"id": bank_id, "date": date, "description": description, "amountOut": amount_out}
+
+
+def test_expected_amounts_use_fee_and_fx_metadata():
+    sgd = expected_amounts(_topup("2024-05-01", 100.0, feeAmount=1.5))
+    jpy = expected_amounts(
+        _topup("2024-05-01", 11000.0, "JPY", fxRate=110.0, fxBaseCurrency="SGD", fxQuoteCurrency="JPY")
+    )
+
+    assert [(e["cents"], e["exact"]) for e in sgd] == [(10000, True), (10150, True)]
+    assert [(e["cents"], e["exact"]) for e in jpy] == [(10000, False)]
+
+
+def test_whole_trip_assignment_uses_each_bank_row_once():
+    topups = [
+        _topup("2024-05-01", 200.0),
+        _topup("2024-05-02", 200.0),
+        _topup("2024-05-03", 50.0, "USD", fxRate=0.74),
+        {"date": "2024-05-03", "amountOut": 12.0, "metadata": {"transactionType": "card_payment"}},
+    ]
+    bank = [
+        _bank("b1", "2024-05-01", 200.0, "FAST PAYMENT TO REVOLUT"),
+        _bank("b2", "2024-05-02", 200.0),
+        _bank("b3", "2024-05-03", 67.9),
+        _bank("b4", "2024-04-01", 200.0),
+        {**_bank("b5", "2024-05-02", 200.0), "currency": "USD"},
+    ]
+
+    result = match_funding(topups, bank, parser_id="revolut_statement")
+    recommended = {m["topupIndex"]: m["recommended"]["id"] for m in result["matches"]}
+
+    assert recommended == {0: "b1", 1: "b2", 2: "b3"}
+    first = result["matches"][0]
+    assert [c["id"] for c in first["candidates"]] == ["b1", "b2"]
+    assert "mentions revolut" in first["recommended"]["reason"]
+    assert result["unmatched"] == []
+
+
+def test_excluded_and_distant_bank_rows_leave_a_topup_unmatched():
+    result = match_funding(
+        [_topup("2024-05-01", 80.0)],
+        [_bank("b1", "2024-05-01", 80.0), _bank("b2", "2024-06-01", 80.0)],
+        exclude_bank_ids=["b1"],
+    )
+
+    assert result["matches"][0]["recommended"] is None
+    assert result["unmatched"] == [0]
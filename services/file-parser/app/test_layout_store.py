@@ -0,0 +1,59 @@
+from app import layout_store
+from app.main import app
+from app.parsers import youtrip_statement_parser
+
+
+def _document():
+    words = [
+        {"text": "Café", "x0": 10.25, "x1": 40.5, "top": 100.123, "bottom": 110.0},
+        {"text": "4.40", "x0": 300.0, "x1": 320.0, "top": 100.123, "bottom": 110.0, "upright": False},
+    ]
+    return layout_store.ArtifactDocument(
+        [
+            layout_store.ArtifactPage(
+                595.0,
+                842.0,
+                "My SGD Statement\nTransactions\n1 Jan 2024 Grocery store $12.34 $100.00",
+                [layout_store._word_record(word) for word in words],
+            )
+        ]
+    )
+
+
+def test_binary_round_trip_preserves_text_words_and_dimensions():
+    decoded = layout_store.decode_document(layout_store.encode_document(_document()))
+
+    page = decoded.pages[0]
+    assert (page.width, page.height) == (595.0, 842.0)
+    assert page.extract_text().endswith("$12.34 $100.00")
+    assert page.extract_words()[0]["text"] == "Café"
+    assert page.extract_words()[0]["top"] == 100.123
+    assert page.extract_words()[1]["upright"] is False
+
+
+def test_reparse_runs_current_parser_on_stored_artifacts(tmp_path):
+    doc_hash = layout_store.document_hash(b"statement")
+    layout_store.save_artifacts(doc_hash, _document(), str(tmp_path))
+
+    rows = layout_store.reparse(doc_hash, youtrip_statement_parser.parse, str(tmp_path))
+
+    assert rows[0]["amountOut"] == 12.34
+    missing = layout_store.document_hash(b"other")
+    assert layout_store.reparse(missing, youtrip_statement_parser.parse, str(tmp_path)) is None
+
+
+def test_hashes_that_could_leave_the_store_are_rejected(tmp_path, monkeypatch):
+    monkeypatch.setenv("LAYOUT_ARTIFACT_DIR", str(tmp_path / "store"))
+    (tmp_path / "x.pfla").write_bytes(layout_store.encode_document(_document()))
+
+    response = app.test_client().post(
+        "/reparse", json={"documentHash": "../x", "parserId": "youtrip_statement"}
+    )
+
+    assert response.status_code == 400
+    try:
+        layout_store.load_artifacts(str(tmp_path / "x"))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
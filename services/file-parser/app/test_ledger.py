@@ -0,0 +1,89 @@
+from app.ledger import build_ledger
+
+
+def _row(date, amount_in=None, amount_out=None, currency="SGD", **metadata):
+    return {
+        "date": date,
+        "description": metadata.pop("description", "row"),
+        "amountIn": amount_in,
+        "amountOut": amount_out,
+        "currency": currency,
+        "metadata": metadata,
+    }
+
+
+def test_conversions_carry_fifo_cost_basis_into_spend():
+    rows = [
+        _row("2024-05-01", amount_in=100.0, transactionType="topup"),
+        _row("2024-05-02", amount_out=100.0, transactionType="conversion",
+             fromAmount=100.0, fromCurrency="SGD", toAmount=11000.0, toCurrency="JPY"),
+        _row("2024-05-03", amount_in=50.0, transactionType="topup"),
+        _row("2024-05-04", amount_out=50.0, transactionType="conversion",
+             fromAmount=50.0, fromCurrency="SGD", toAmount=5000.0, toCurrency="JPY"),
+        _row("2024-05-05", amount_out=13000.0, currency="JPY", transactionType="card_payment"),
+    ]
+
+    ledger = build_ledger(rows)
+
+    # 11000 JPY at 1/110 plus 2000 of the 5000 JPY lot at 1/100
+    assert ledger["events"][-1]["homeAmount"] == 120.0
+    assert ledger["wallets"]["JPY"] == {
+        "balance": 3000.0,
+        "costBasis": 30.0,
+        "lots": [{"amount": 3000.0, "costBasis": 30.0}],
+    }
+    assert ledger["wallets"]["SGD"]["balance"] == 0.0
+    assert ledger["spend"] == {
+        "totalHome": 120.0,
+        "byCurrency": {"JPY": {"amount": 13000.0, "homeAmount": 120.0}},
+    }
+    assert ledger["unfunded"] == []
+
+
+def test_exchange_printed_on_both_wallet_statements_is_replayed_once():
+    exchange = dict(
+        transactionType="conversion",
+        fromAmount=10.0, fromCurrency="SGD", toAmount=1100.0, toCurrency="JPY",
+    )
+    rows = [
+        _row("2024-05-01", amount_in=100.0, transactionType="topup"),
+        _row("2024-05-02", amount_out=10.0, **exchange),
+        _row("2024-05-02", amount_in=1100.0, currency="JPY", **exchange),
+    ]
+
+    ledger = build_ledger(rows)
+
+    assert ledger["wallets"]["SGD"]["balance"] == 90.0
+    assert ledger["wallets"]["JPY"]["balance"] == 1100.0
+    assert len(ledger["events"]) == 2
+
+
+def test_opening_balance_comes_from_the_first_row_and_overspend_is_priced():
+    rows = [
+        {**_row("2024-05-01", amount_out=5.0, transactionType="card_payment"), "balance": 15.0},
+        _row("2024-05-02", amount_out=1500.0, currency="JPY", transactionType="card_payment",
+             fxRate=100.0, fxBaseCurrency="SGD", fxQuoteCurrency="JPY"),
+    ]
+
+    ledger = build_ledger(rows)
+
+    assert ledger["wallets"]["SGD"]["balance"] == 15.0
+    assert ledger["events"][1]["homeAmount"] == 15.0
+    assert ledger["unfunded"] == [{"index": 1, "currency": "JPY", "amount": 1500.0, "priced": True}]
+
+
+def test_ledger_endpoint_caches_per_import():
+    from app.main import app
+
+    client = app.test_client()
+    body = {
+        "transactions": [_row("2024-05-01", amount_in=10.0, transactionType="topup")],
+        "openingBalances": {"USD": {"amount": 20, "costBasis": 27}},
+    }
+
+    first = client.post("/ledger", json=body).get_json()
+    second = client.post("/ledger", json=body).get_json()
+
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert second["wallets"]["USD"]["costBasis"] == 27.0
+    assert second["wallets"]["SGD"]["balance"] == 10.0
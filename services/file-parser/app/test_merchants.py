@@ -0,0 +1,54 @@
+from app.merchants import attach_merchant_keys, merchant_id, merchant_key
+
+
+def test_raw_forms_of_one_merchant_share_a_key():
+    forms = [
+        "LAWSON TOKYO JP JPY 1,200.00",
+        "Card payment Lawson",
+        "Lawson USD 12.50 FX rate 1.35",
+        "LAWSON 4111-XXXX-XXXX-1234 01/02/2024",
+    ]
+
+    assert {merchant_key(form) for form in forms} == {"lawson"}
+    assert merchant_key("POS 12345678 NTUC FAIRPRICE SINGAPORE SG") == "ntuc fairprice"
+    assert merchant_key("FAST PAYMENT to JOHN ref 1234") == "john"
+    assert merchant_key("Debit Card Transaction\nKOPITIAM 12 JAN xxxx-5678") == "kopitiam"
+
+
+def test_descriptions_made_only_of_channel_words_keep_them():
+    assert merchant_key("NETS QR") == "nets qr"
+    assert merchant_key("MIRANA SIGN") == "mirana sign"
+    assert merchant_key("") == ""
+
+
+def test_rows_carry_an_interned_key_and_integer_id():
+    rows = attach_merchant_keys(
+        [
+            {"description": "STARBUCKS SINGAPORE SG"},
+            {"description": "Starbucks"},
+            {"description": "Coffee Bean"},
+        ]
+    )
+
+    assert rows[0]["merchantKey"] is rows[1]["merchantKey"]
+    assert rows[0]["merchantId"] == rows[1]["merchantId"] == merchant_id("starbucks")
+    assert rows[2]["merchantId"] != rows[0]["merchantId"]
+    assert merchant_key.cache_info().maxsize >= 1
+
+
+def test_merchant_ids_are_stable_hashes_of_the_key():
+    # Fixed across processes and restarts, and exact as a JSON number
+    assert merchant_id("starbucks") == 90569213166891
+    assert merchant_id("starbucks") < 2**53
+    assert merchant_id.cache_info().maxsize == merchant_key.cache_info().maxsize
+
+
+def test_numbers_and_words_inside_merchant_names_are_kept():
+    assert merchant_key("7-11 SINGAPORE") == "7 11"
+    assert merchant_key("24/7 FITNESS") == "24 7 fitness"
+    assert merchant_key("1 MARINA BOULEVARD") == "1 marina boulevard"
+    assert merchant_key("3 DECKS CAFE") == "3 decks cafe"
+    assert merchant_key("SHOP 2 JUNCTION 8") == "shop 2 junction 8"
+    assert merchant_key("TOYS R US") == "toys r us"
+    assert merchant_key("GRAB 12 MARCH 2024") == "grab"
+    assert merchant_key("GRAB 01/02") == "grab"
@@ -0,0 +1,25 @@
+from app.models import Statement, Transaction
+
+
+def test_rows_share_statement_metadata_until_serialized():
+    statement = Statement(
+        metadata={"source": "pdf", "parserId": "ocbc_frank_statement", "currency": "SGD"},
+        account_number="6871234567",
+    )
+    first = Transaction("2024-01-03", "FAST PAYMENT", statement, amount_out=25.0, balance=475.0)
+    second = Transaction(
+        "2024-01-05", "INTEREST", statement, amount_in=1.25, extra={"transactionType": "interest"}
+    )
+
+    assert first.statement is second.statement
+    assert not hasattr(first, "__dict__")
+
+    serialized = second.to_dict()
+    assert serialized["metadata"] == {
+        "source": "pdf",
+        "parserId": "ocbc_frank_statement",
+        "currency": "SGD",
+        "transactionType": "interest",
+    }
+    assert serialized["accountNumber"] == serialized["accountIdentifier"] == "6871234567"
+    assert "currency" not in serialized
@@ -0,0 +1,47 @@
+from app.money import from_cents, parse_cents, parse_decimal, to_cents
+
+
+def test_grouping_and_decimal_separators_in_both_locales():
+    assert parse_cents("1,234.56") == 123456
+    assert parse_cents("1.234,56") == 123456
+    assert parse_cents("1.234.567") == 123456700
+    assert parse_cents("1,234") == 123400
+    assert parse_cents("12,5") == 1250
+    assert parse_cents(".50") == 50
+
+
+def test_signs_parentheses_and_currency_prefixes():
+    assert parse_cents("(5.00)") == -500
+    assert parse_cents("-5.00") == -500
+    assert parse_cents("+5.00") == 500
+    assert parse_cents("5.00-") == -500
+    assert parse_cents("S$12.30") == 1230
+    assert parse_cents("US$ 1,000.00") == 100000
+    assert parse_cents("HK$-3.5") == -350
+    assert parse_cents("(S$1,234.50)") == -123450
+    assert parse_cents("SGD 20.00") == 2000
+    assert parse_cents("-$12.34") == -1234
+    assert parse_cents("SGD -5.00") == -500
+
+
+def test_hyphens_and_brackets_away_from_the_number_are_not_signs():
+    assert parse_cents("Top-up 5.00") == 500
+    assert parse_decimal("Top-up 5.00") == 5.0
+    assert parse_cents("(Refund 5.00 incl. fee)") == 500
+
+
+def test_blank_and_unparseable_tokens():
+    assert parse_cents(None) is None
+    assert parse_cents("-") is None
+    assert parse_cents("n/a") is None
+    assert to_cents("") is None
+
+
+def test_numbers_and_rounding():
+    assert parse_cents(3) == 300
+    assert parse_cents(12.34) == 1234
+    assert parse_cents("0.125") == 13
+    assert from_cents(1234) == 12.34
+    assert from_cents(parse_cents("1,234.56")) == 1234.56
+    assert parse_decimal("1.234") == 1.234
+    assert parse_decimal("1.23456") == 1.23456
@@ -0,0 +1,122 @@
+import io
+import os
+import time
+
+import pdfplumber
+
+from app import page_cache, workers
+from app.parsers import dbs_posb_parser
+from app.result_cache import ResultCache
+
+
+def _pdf(lines, font="ABCDEF+Helvetica") -> bytes:
+    stream = "BT /F1 10 Tf 20 800 Td " + " ".join(f"({line}) Tj 0 -12 Td" for line in lines) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 4 0 R "
+        "/Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+        f"<< /Type /Font /Subtype /Type1 /BaseFont /{font} >>",
+    ]
+    body = "%PDF-1.4\n" + "".join(
+        f"{number} 0 obj\n{obj}\nendobj\n" for number, obj in enumerate(objects, 1)
+    )
+    return (body + "trailer\n<< /Root 1 0 R >>\n%%EOF\n").encode()
+
+
+def _page_text(content: bytes):
+    with pdfplumber.open(io.BytesIO(content)) as pdf:
+        return page_cache.page_text(pdf.pages[0])
+
+
+def _fresh_caches(monkeypatch, tmp_path=None):
+    monkeypatch.setattr(page_cache, "_texts", ResultCache("PAGE_CACHE_SIZE", 16))
+    monkeypatch.setattr(page_cache, "_steps", ResultCache("PAGE_CACHE_SIZE", 16))
+    if tmp_path is None:
+        monkeypatch.delenv("PAGE_CACHE_DIR", raising=False)
+        monkeypatch.delenv("LAYOUT_ARTIFACT_DIR", raising=False)
+    else:
+        monkeypatch.setenv("PAGE_CACHE_DIR", str(tmp_path))
+
+
+def test_hash_ignores_subset_tags_but_not_drawn_text(monkeypatch):
+    _fresh_caches(monkeypatch)
+
+    text, digest, reused = _page_text(_pdf(["Coffee 4.50"]))
+    retagged = _page_text(_pdf(["Coffee 4.50"], font="GHIJKL+Helvetica"))
+    changed = _page_text(_pdf(["Coffee 5.50"]))
+
+    assert (text, reused) == ("Coffee 4.50", False)
+    assert retagged == (text, digest, True)
+    assert changed[1] != digest
+    assert changed[2] is False
+
+
+def test_entries_are_shared_through_the_cache_directory(monkeypatch, tmp_path):
+    _fresh_caches(monkeypatch, tmp_path)
+    calls = []
+
+    def step():
+        calls.append(1)
+        return [(0, {"balance": 1.0})], {"pending": None}
+
+    first = page_cache.cached_step("parser:1", "abc", {"pending": None}, step)
+    # A new worker starts with empty in-memory caches
+    _fresh_caches(monkeypatch, tmp_path)
+    second = page_cache.cached_step("parser:1", "abc", {"pending": None}, step)
+    other_state = page_cache.cached_step("parser:1", "abc", {"pending": {"x": 1}}, step)
+
+    assert first[2] is False and second[2] is True and other_state[2] is False
+    assert second[0] == [[0, {"balance": 1.0}]]
+    assert len(calls) == 2
+
+
+def test_disk_entries_are_opt_in_and_evicted_by_age_and_size(monkeypatch, tmp_path):
+    _fresh_caches(monkeypatch)
+    monkeypatch.setenv("LAYOUT_ARTIFACT_DIR", str(tmp_path / "artifacts"))
+    assert page_cache.cache_dir() is None
+
+    _fresh_caches(monkeypatch, tmp_path)
+    for index in range(4):
+        page_cache._write("text", f"{index:064x}", "x" * 1000)
+    paths = sorted((tmp_path / "text").iterdir())
+    stale = time.time() - 2 * 3600
+    os.utime(paths[0], (stale, stale))
+    monkeypatch.setenv("PAGE_CACHE_MAX_AGE_HOURS", "1")
+    assert page_cache._read("text", f"{0:064x}") is None
+
+    # Room for two entries: the oldest of the remaining three goes
+    os.utime(paths[1], (stale + 3000, stale + 3000))
+    monkeypatch.setenv("PAGE_CACHE_MAX_AGE_HOURS", "24")
+    monkeypatch.setattr(page_cache, "max_bytes", lambda: 2100)
+    assert page_cache.sweep() == 1
+    assert sorted((tmp_path / "text").iterdir()) == paths[2:]
+
+
+def _reused_pages_across_isolated_parses(content: bytes) -> list:
+    reports = [
+        workers.run_isolated(dbs_posb_parser.parse_with_report, (content,), timeout=30)[1]
+        for _ in range(2)
+    ]
+    return [report["pageCache"]["textReusedPages"] for report in reports]
+
+
+def test_isolated_workers_reuse_pages_only_through_the_cache_directory(monkeypatch, tmp_path):
+    monkeypatch.setenv("PARSE_ISOLATION", "process")
+    if workers.isolation_mode() != "process":
+        return
+    content = _pdf(
+        [
+            "Balance Brought Forward SGD 100.00",
+            "01/01/2024 Salary 50.00 150.00",
+            "Balance Carried Forward",
+        ]
+    )
+
+    # Each worker is a fresh process, so its in-memory LRU is gone after the parse
+    _fresh_caches(monkeypatch)
+    assert _reused_pages_across_isolated_parses(content) == [[], []]
+
+    _fresh_caches(monkeypatch, tmp_path)
+    assert _reused_pages_across_isolated_parses(content) == [[], [0]]
@@ -0,0 +1,75 @@
+import io
+import time
+
+from app import profiling
+from app.main import app
+
+CSV_TEXT = b"Date,Description,Credit,Debit,Balance\n01/02/2024,Coffee,,4.50,95.50\n"
+
+
+def _busy(seconds: float) -> str:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+    return "done"
+
+
+def _post(client, **kwargs):
+    return client.post(
+        "/parse",
+        data={"parserId": "generic_csv", "file": (io.BytesIO(CSV_TEXT), "a.csv")},
+        content_type="multipart/form-data",
+        **kwargs,
+    )
+
+
+def test_sampling_profile_has_folded_stacks_and_ranked_functions(monkeypatch):
+    monkeypatch.setenv("PROFILE_SAMPLE_INTERVAL_MS", "1")
+
+    result, report = profiling.run_profiled(profiling.SAMPLING, _busy, 0.05)
+
+    assert result == "done"
+    assert report["samples"] > 0
+    assert "_busy (app/test_profiling.py" in report["hotFunctions"][0]["function"]
+    line = report["folded"].splitlines()[0]
+    assert ";" in line and line.rsplit(" ", 1)[1].isdigit()
+
+
+def test_profile_flag_requires_the_token(monkeypatch):
+    monkeypatch.setenv("PROFILE_TOKEN", "secret")
+    client = app.test_client()
+
+    assert _post(client, headers={"X-Profile": "1"}).status_code == 403
+    assert _post(client, query_string={"profile": "sample"}).status_code == 403
+
+
+def test_profiled_parse_links_a_stored_report(monkeypatch):
+    monkeypatch.setenv("PROFILE_TOKEN", "secret")
+    monkeypatch.setenv("PARSE_ISOLATION", "inline")
+    client = app.test_client()
+    token = {"X-Profile-Token": "secret"}
+
+    body = _post(client, headers={"X-Profile": "deterministic", **token}).get_json()
+
+    profile = body["profile"]
+    assert body["transactions"][0]["description"] == "Coffee"
+    assert profile["mode"] == "deterministic"
+    assert profile["hotFunctions"][0]["calls"] >= 1
+    stored = client.get(profile["url"], headers=token).get_json()
+    assert stored["parserId"] == "generic_csv"
+    assert client.get(profile["url"]).status_code == 403
+    folded = client.get(profile["flamegraphUrl"], headers=token)
+    assert folded.mimetype == "text/plain"
+
+
+def test_one_in_n_requests_is_sampled_without_changing_the_response(monkeypatch):
+    monkeypatch.setenv("PROFILE_SAMPLE_EVERY", "2")
+    monkeypatch.setenv("PARSE_ISOLATION", "inline")
+    monkeypatch.setattr(profiling, "_request_counter", iter(range(1, 100)))
+    client = app.test_client()
+    before = len(profiling.store)
+
+    bodies = [_post(client).get_json() for _ in range(4)]
+
+    assert len(profiling.store) == before + 2
+    assert all("profile" not in body for body in bodies)
@@ -0,0 +1,42 @@
+from app.reconciliation import reconcile
+
+
+def test_balance_chain_with_missing_intermediate_balance_reconciles():
+    rows = [
+        {"amountOut": 5.0, "balance": 95.0},
+        {"amountIn": 10.0, "balance": None},
+        {"amountOut": 1.0, "balance": 104.0},
+    ]
+
+    report = reconcile(rows, opening_balance=100.0)
+
+    assert report["reconciled"] is True
+    assert report["checked"] == 2
+
+
+def test_break_in_chain_is_reported_at_row_index():
+    rows = [
+        {"amountOut": 5.0, "balance": 95.0},
+        {"amountOut": 1.0, "balance": 90.0},
+        {"amountOut": 1.0, "balance": 89.0},
+    ]
+
+    report = reconcile(rows)
+
+    assert report["mismatchIndices"] == [1]
+    assert report["unverifiedIndices"] == [0]
+
+
+def test_only_single_balance_chain_parsers_are_reconciled():
+    from app.parsers import reconcile_for
+
+    # SGD, JPY, SGD rows of a merged Revolut export
+    rows = [
+        {"amountOut": 5.0, "balance": 95.0},
+        {"amountOut": 100.0, "balance": 1000.0},
+        {"amountOut": 5.0, "balance": 90.0},
+    ]
+
+    assert reconcile_for("revolut_statement", rows) is None
+    assert reconcile_for("dbs_paylah_statement", rows) is None
+    assert reconcile_for("generic_csv", rows)["mismatched"] == 2
@@ -0,0 +1,80 @@
+import io
+
+import pytest
+
+from app.main import app
+from app.stitching import AccountMismatch, stitch_statements
+
+
+def _row(date, description, amount_in, amount_out, balance, period_start):
+    return {
+        "date": date,
+        "description": description,
+        "amountIn": amount_in,
+        "amountOut": amount_out,
+        "balance": balance,
+        "metadata": {"statementPeriodStart": period_start},
+    }
+
+
+def test_statements_are_ordered_and_boundary_overlap_removed():
+    january = [
+        _row("2024-01-05", "Salary", 1000.0, None, 1100.0, "1 Jan 2024"),
+        _row("2024-01-31", "Rent", None, 600.0, 500.0, "1 Jan 2024"),
+    ]
+    february = [
+        _row("2024-01-31", "Rent", None, 600.0, 500.0, "31 Jan 2024"),
+        _row("2024-02-03", "Groceries", None, 50.0, 450.0, "31 Jan 2024"),
+    ]
+
+    result = stitch_statements([february, january])
+
+    assert [row["description"] for row in result["transactions"]] == [
+        "Salary",
+        "Rent",
+        "Groceries",
+    ]
+    assert result["overlapsRemoved"] == 1
+    assert result["gaps"] == []
+
+
+def test_balance_chain_break_is_reported_as_gap():
+    january = [_row("2024-01-31", "Rent", None, 600.0, 500.0, "1 Jan 2024")]
+    march = [_row("2024-03-02", "Coffee", None, 5.0, 300.0, "1 Mar 2024")]
+
+    result = stitch_statements([january, march])
+
+    assert len(result["gaps"]) == 1
+    assert result["gaps"][0]["expectedBalance"] == 495.0
+    assert result["gaps"][0]["difference"] == -195.0
+
+
+def test_statements_of_different_accounts_are_not_stitched(monkeypatch):
+    january = [
+        {**_row("2024-01-31", "Rent", None, 600.0, 500.0, "1 Jan 2024"), "accountIdentifier": "123-45678-9"}
+    ]
+    february = [
+        {**_row("2024-02-03", "Coffee", None, 5.0, 495.0, "1 Feb 2024"), "accountIdentifier": "987-65432-1"}
+    ]
+    same_account = [{**february[0], "accountIdentifier": "123 45678 9"}]
+
+    assert len(stitch_statements([january, same_account])["transactions"]) == 2
+    with pytest.raises(AccountMismatch, match="different accounts"):
+        stitch_statements([january, february])
+
+    monkeypatch.setenv("PARSE_ISOLATION", "inline")
+    statements = iter([january, february])
+    monkeypatch.setattr(
+        "app.main._parse_all", lambda parser_func, contents: [next(statements) for _ in contents]
+    )
+    response = app.test_client().post(
+        "/stitch",
+        data={
+            "parserId": "dbs_posb_consolidated",
+            "files": [(io.BytesIO(b"a"), "jan.pdf"), (io.BytesIO(b"b"), "feb.pdf")],
+        },
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 400
+    assert response.get_json()["code"] == "ACCOUNT_MISMATCH"
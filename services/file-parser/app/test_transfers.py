@@ -0,0 +1,91 @@
+import time
+
+from app.transfers import INTERNAL, REIMBURSEMENT, match_transfers
+
+
+def _row(date, description, amount_in=None, amount_out=None, account="dbs-1"):
+    return {
+        "date": date,
+        "description": description,
+        "amountIn": amount_in,
+        "amountOut": amount_out,
+        "accountIdentifier": account,
+    }
+
+
+def test_transfer_legs_across_accounts_are_paired():
+    rows = [
+        _row("2024-03-01", "FAST PAYMENT to PAYLAH", amount_out=50.0),
+        _row("2024-03-02", "TOP UP FROM DBS", amount_in=50.0, account="paylah-9"),
+        _row("2024-03-02", "Coffee", amount_out=4.5),
+        _row("2024-03-20", "Salary", amount_in=50.0, account="ocbc-2"),
+    ]
+
+    result = match_transfers(rows)
+
+    assert len(result["pairs"]) == 1
+    pair = result["pairs"][0]
+    assert (pair["type"], pair["outIndex"], pair["inIndex"]) == (INTERNAL, 0, 1)
+    assert pair["amount"] == 50.0
+    assert 0.8 < pair["confidence"] <= 0.99
+    assert "1 day apart" in pair["reason"]
+    assert result["unmatched"] == [2, 3]
+
+
+def test_same_account_legs_are_not_transfers_but_refunds_are_found():
+    rows = [
+        _row("2024-03-01", "AMAZON SG 4111-XXXX-XXXX-1234", amount_out=80.0),
+        _row("2024-03-10", "AMAZON SG REFUND", amount_in=30.0),
+        _row("2024-03-01", "Lunch", amount_out=12.0),
+        _row("2024-03-01", "Lunch", amount_in=12.0),
+    ]
+
+    pairs = match_transfers(rows)["pairs"]
+
+    assert [(p["type"], p["outIndex"], p["inIndex"]) for p in pairs] == [
+        (REIMBURSEMENT, 0, 1),
+        (REIMBURSEMENT, 2, 3),
+    ]
+    assert "partial amount" in pairs[0]["reason"]
+
+
+def test_each_row_is_used_once_and_closer_legs_win():
+    rows = [
+        _row("2024-03-01", "Transfer", amount_out=20.0),
+        _row("2024-03-03", "Transfer", amount_in=20.0, account="ocbc-2"),
+        _row("2024-03-01", "Transfer", amount_in=20.0, account="ocbc-2"),
+        _row("2024-03-05", "Transfer", amount_out=20.0),
+    ]
+
+    pairs = match_transfers(rows, transfer_window_days=5)["pairs"]
+
+    assert [(p["outIndex"], p["inIndex"]) for p in pairs] == [(0, 2), (3, 1)]
+
+
+def test_thousand_row_batch_is_fast():
+    rows = []
+    for i in range(1500):
+        day = f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}"
+        rows.append(_row(day, "Transfer", amount_out=10.0 + i % 7))
+        rows.append(_row(day, "Top up", amount_in=10.0 + i % 7, account="wallet"))
+
+    started = time.perf_counter()
+    result = match_transfers(rows, amount_tolerance_cents=50)
+
+    assert time.perf_counter() - started < 5
+    assert len(result["pairs"]) == 1500
+
+
+def test_legs_without_two_known_accounts_need_transfer_wording():
+    rows = [
+        _row("2024-03-01", "Bookshop", amount_out=25.0, account=""),
+        _row("2024-03-01", "Freelance invoice", amount_in=25.0, account=""),
+        _row("2024-03-04", "Transfer", amount_out=40.0),
+        _row("2024-03-04", "Incoming", amount_in=40.0, account=""),
+    ]
+
+    pairs = match_transfers(rows)["pairs"]
+
+    assert [(p["outIndex"], p["inIndex"]) for p in pairs] == [(2, 3)]
+    assert "transfer wording" in pairs[0]["reason"]
+    assert "different accounts" not in pairs[0]["reason"]
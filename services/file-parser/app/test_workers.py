@@ -0,0 +1,128 @@
+import time
+
+from app import workers
+from app.deadlines import ParseCancelled, ParseTimeout, check_deadline, deadline_scope
+
+
+def _cooperative_loop():
+    while True:
+        check_deadline()
+        time.sleep(0.01)
+
+
+def _stuck_without_checks():
+    time.sleep(30)
+
+
+def _raise_value_error():
+    raise ValueError("bad statement")
+
+
+def test_check_deadline_is_a_noop_outside_a_scope():
+    check_deadline()
+
+
+def test_cancelled_deadline_raises_at_the_next_check():
+    with deadline_scope(10) as deadline:
+        deadline.cancel()
+        try:
+            check_deadline()
+        except ParseCancelled:
+            pass
+        else:
+            raise AssertionError("expected ParseCancelled")
+
+
+def test_cooperative_parse_stops_at_its_deadline(monkeypatch):
+    monkeypatch.setenv("PARSE_ISOLATION", "inline")
+
+    try:
+        workers.run_isolated(_cooperative_loop, timeout=0.1)
+    except ParseTimeout:
+        pass
+    else:
+        raise AssertionError("expected ParseTimeout")
+
+
+def test_stuck_worker_is_killed_after_the_grace_period(monkeypatch):
+    monkeypatch.setenv("PARSE_ISOLATION", "process")
+    if workers.isolation_mode() != "process":
+        return
+
+    started = time.monotonic()
+    try:
+        workers.run_isolated(_stuck_without_checks, timeout=0.2, grace=0.2)
+    except ParseTimeout:
+        pass
+    else:
+        raise AssertionError("expected ParseTimeout")
+    assert time.monotonic() - started < 5
+
+
+def test_worker_exceptions_and_results_cross_the_process_boundary(monkeypatch):
+    monkeypatch.setenv("PARSE_ISOLATION", "process")
+
+    assert workers.run_isolated(sorted, ([3, 1, 2],), timeout=5) == [1, 2, 3]
+    try:
+        workers.run_isolated(_raise_value_error, timeout=5)
+    except ValueError as e:
+        assert "bad statement" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_disconnected_client_cancels_the_worker(monkeypatch):
+    monkeypatch.setenv("PARSE_ISOLATION", "process")
+    if workers.isolation_mode() != "process":
+        return
+
+    try:
+        workers.run_isolated(_stuck_without_checks, timeout=10, is_cancelled=lambda: True)
+    except ParseCancelled:
+        pass
+    else:
+        raise AssertionError("expected ParseCancelled")
+
+
+def _allocate(megabytes: int) -> int:
+    return len(bytearray(megabytes * 1024 * 1024))
+
+
+def _spin():
+    while True:
+        pass
+
+
+def test_worker_past_its_memory_budget_fails_with_a_specific_code(monkeypatch):
+    monkeypatch.setenv("PARSE_ISOLATION", "process")
+    monkeypatch.setenv("PARSE_MEMORY_LIMIT_MB", "64")
+    if workers.isolation_mode() != "process" or workers.resource is None:
+        return
+
+    assert workers.run_isolated(_allocate, (16,), timeout=10, label="small") == 16 * 1024 * 1024
+    try:
+        workers.run_isolated(_allocate, (512,), timeout=10, label="big")
+    except workers.ParseMemoryExceeded as e:
+        assert e.code == "PARSE_MEMORY_EXCEEDED"
+    else:
+        raise AssertionError("expected ParseMemoryExceeded")
+
+    stats = workers.usage_stats.snapshot()
+    assert stats["small"]["parses"] == 1
+    # Only what the parse added counts, not the RSS inherited from the test process
+    assert 10 < stats["small"]["peakRssMb"] < 40
+    assert stats["big"]["budgetExceeded"] == 1
+
+
+def test_worker_past_its_cpu_budget_fails_with_a_specific_code(monkeypatch):
+    monkeypatch.setenv("PARSE_ISOLATION", "process")
+    monkeypatch.setenv("PARSE_CPU_LIMIT_SECONDS", "1")
+    if workers.isolation_mode() != "process" or workers.resource is None:
+        return
+
+    try:
+        workers.run_isolated(_spin, timeout=20)
+    except workers.ParseCpuExceeded as e:
+        assert e.code == "PARSE_CPU_EXCEEDED"
+    else:
+        raise AssertionError("expected ParseCpuExceeded")
@@ -0,0 +1,202 @@
+"""Pair both legs of internal transfers and refunds inside an import batch.
+
+Inflows are indexed twice, both sorted by day: per amount in cents for transfer legs
+and per merchant key for refunds, which may be smaller than the purchase. Each
+outflow only looks at the amounts inside its tolerance and, within those, the days
+inside its date window, so a batch is matched in near-linear time. Candidate pairs
+are scored and assigned greedily by confidence so every row is in at most one pair.
+"""
+import re
+from bisect import bisect_left, bisect_right
+from typing import Optional
+
+from .dates import date_ordinal
+from .merchants import merchant_key
+from .money import from_cents, to_cents
+
+DEFAULT_TRANSFER_WINDOW_DAYS = 3
+DEFAULT_REFUND_WINDOW_DAYS = 45
+DEFAULT_AMOUNT_TOLERANCE_CENTS = 0
+
+INTERNAL = "internal"
+REIMBURSEMENT = "reimbursement"
+
+_TRANSFER_PATTERN = re.compile(
+    r"\b(?:top[\s-]?up|transfer|trf|fast|giro|paynow|payment from|payment to|to own"
+    r"|from own|exchanged|ibg|withdrawal)\b"
+)
+_REFUND_PATTERN = re.compile(r"\b(?:refund|reversal|reversed|cashback|chargeback|rebate)\b")
+
+
+def _account(transaction: dict) -> str:
+    metadata = transaction.get("metadata") if isinstance(transaction.get("metadata"), dict) else {}
+    account = (
+        transaction.get("accountIdentifier")
+        or transaction.get("accountNumber")
+        or metadata.get("accountIdentifier")
+        or metadata.get("accountNumber")
+        or ""
+    )
+    return re.sub(r"[^0-9a-z]", "", str(account).lower())
+
+
+def _legs(transactions: list[dict]) -> tuple[list[dict], list[dict]]:
+    outflows, inflows = [], []
+    for index, transaction in enumerate(transactions):
+        if not isinstance(transaction, dict):
+            continue
+        linkage = transaction.get("linkage")
+        if isinstance(linkage, dict) and linkage.get("type"):
+            continue
+        day = date_ordinal(transaction.get("date"))
+        if day is None:
+            continue
+        description = str(transaction.get("description") or "")
+        leg = {
+            "index": index,
+            "day": day,
+            "account": _account(transaction),
+            "merchant": transaction.get("merchantKey") or merchant_key(description),
+            "text": description.lower(),
+        }
+        amount_in = to_cents(transaction.get("amountIn")) or 0
+        amount_out = to_cents(transaction.get("amountOut")) or 0
+        if amount_out > 0:
+            outflows.append({**leg, "cents": amount_out})
+        elif amount_in > 0:
+            if _REFUND_PATTERN.search(leg["text"]):
+                # Index refunds under the merchant they refund, without the refund wording
+                leg["merchant"] = merchant_key(_REFUND_PATTERN.sub(" ", leg["text"]))
+            inflows.append({**leg, "cents": amount_in})
+    return outflows, inflows
+
+
+def _transfer_candidate(out_leg: dict, in_leg: dict, window_days: int) -> Optional[dict]:
+    if out_leg["account"] and out_leg["account"] == in_leg["account"]:
+        return None
+    keyword = bool(
+        _TRANSFER_PATTERN.search(out_leg["text"]) or _TRANSFER_PATTERN.search(in_leg["text"])
+    )
+    different_accounts = bool(out_leg["account"] and in_leg["account"])
+    # Without two known accounts, amount and date alone also pair unrelated spend and income
+    if not keyword and not different_accounts:
+        return None
+    days = abs(in_leg["day"] - out_leg["day"])
+    exact = in_leg["cents"] == out_leg["cents"]
+    confidence = 0.55 + (0.2 if exact else 0.0) + (0.15 if keyword else 0.0)
+    confidence += 0.1 * (1 - days / (window_days + 1))
+
+    reasons = ["same amount" if exact else "amount within tolerance"]
+    reasons.append("same day" if days == 0 else f"{days} day{'s' if days != 1 else ''} apart")
+    if keyword:
+        reasons.append("transfer wording")
+    if different_accounts:
+        reasons.append("different accounts")
+    return {
+        "type": INTERNAL,
+        "confidence": confidence,
+        "days": days,
+        "reason": "Opposite legs: " + ", ".join(reasons),
+    }
+
+
+def _refund_candidate(out_leg: dict, in_leg: dict) -> Optional[dict]:
+    if in_leg["cents"] > out_leg["cents"]:
+        return None
+    days = in_leg["day"] - out_leg["day"]
+    exact = in_leg["cents"] == out_leg["cents"]
+    keyword = bool(_REFUND_PATTERN.search(in_leg["text"]))
+    if not exact and not keyword:
+        return None
+    confidence = 0.5 + (0.2 if exact else 0.0) + (0.2 if keyword else 0.0)
+    confidence += 0.05 if out_leg["account"] == in_leg["account"] else 0.0
+
+    reasons = [f"same merchant ({out_leg['merchant']})"]
+    reasons.append("full amount" if exact else "partial amount")
+    if keyword:
+        reasons.append("refund wording")
+    reasons.append(f"{days} day{'s' if days != 1 else ''} after purchase")
+    return {
+        "type": REIMBURSEMENT,
+        "confidence": confidence,
+        "days": days,
+        "reason": "Refund: " + ", ".join(reasons),
+    }
+
+
+def match_transfers(
+    transactions: list[dict],
+    transfer_window_days: int = DEFAULT_TRANSFER_WINDOW_DAYS,
+    refund_window_days: int = DEFAULT_REFUND_WINDOW_DAYS,
+    amount_tolerance_cents: int = DEFAULT_AMOUNT_TOLERANCE_CENTS,
+) -> dict:
+    """Pair outflows with inflows as internal transfers or refunds.
+
+    Returns {"pairs": [...], "unmatched": [indices]}. Each pair names the outflow
+    and inflow row indices, its linkage type, a confidence in [0, 1] and a reason.
+    """
+    outflows, inflows = _legs(transactions)
+
+    by_amount: dict[int, list[dict]] = {}
+    by_merchant: dict[str, list[dict]] = {}
+    for leg in sorted(inflows, key=lambda leg: leg["day"]):
+        by_amount.setdefault(leg["cents"], []).append(leg)
+        by_merchant.setdefault(leg["merchant"], []).append(leg)
+    amounts = sorted(by_amount)
+    amount_days = {cents: [leg["day"] for leg in legs] for cents, legs in by_amount.items()}
+    merchant_days = {key: [leg["day"] for leg in legs] for key, legs in by_merchant.items()}
+
+    candidates = []
+    for out_leg in outflows:
+        low = bisect_left(amounts, out_leg["cents"] - amount_tolerance_cents)
+        high = bisect_right(amounts, out_leg["cents"] + amount_tolerance_cents)
+        for cents in amounts[low:high]:
+            days = amount_days[cents]
+            first = bisect_left(days, out_leg["day"] - transfer_window_days)
+            last = bisect_right(days, out_leg["day"] + transfer_window_days)
+            for in_leg in by_amount[cents][first:last]:
+                candidate = _transfer_candidate(out_leg, in_leg, transfer_window_days)
+                if candidate:
+                    candidates.append((candidate, out_leg, in_leg))
+
+        if not out_leg["merchant"] or out_leg["merchant"] not in by_merchant:
+            continue
+        days = merchant_days[out_leg["merchant"]]
+        low = bisect_left(days, out_leg["day"])
+        high = bisect_right(days, out_leg["day"] + refund_window_days)
+        for in_leg in by_merchant[out_leg["merchant"]][low:high]:
+            candidate = _refund_candidate(out_leg, in_leg)
+            if candidate:
+                candidates.append((candidate, out_leg, in_leg))
+
+    # Best first; ties go to the closer pair and then to batch order
+    candidates.sort(
+        key=lambda item: (
+            -item[0]["confidence"],
+            item[0]["days"],
+            item[1]["index"],
+            item[2]["index"],
+        )
+    )
+    paired: set[int] = set()
+    pairs = []
+    for candidate, out_leg, in_leg in candidates:
+        if out_leg["index"] in paired or in_leg["index"] in paired:
+            continue
+        paired.update((out_leg["index"], in_leg["index"]))
+        pairs.append(
+            {
+                "type": candidate["type"],
+                "outIndex": out_leg["index"],
+                "inIndex": in_leg["index"],
+                "amount": from_cents(in_leg["cents"]),
+                "confidence": round(min(candidate["confidence"], 0.99), 2),
+                "reason": candidate["reason"],
+            }
+        )
+
+    pairs.sort(key=lambda pair: (pair["outIndex"], pair["inIndex"]))
+    unmatched = [
+        leg["index"] for leg in outflows + inflows if leg["index"] not in paired
+    ]
+    return {"pairs": pairs, "unmatched": sorted(unmatched)}
@@ -0,0 +1,298 @@
+"""Run parses in worker processes that can be hard-killed.
+
+Workers are forked from a forkserver rather than from the threaded web server, so
+they never inherit a lock some other request thread held at the moment of the
+fork. The forkserver preloads the parsers once, and each worker is handed the
+server's current environment so settings read during a parse still apply.
+
+Each worker also runs under an address-space and CPU-time rlimit. The
+address-space budget is added on top of what the worker inherits at fork, so it
+bounds what one parse allocates rather than the size of the server. Likewise the
+peak RSS a worker adds beyond what it inherited, and its CPU time, are recorded
+per label (the parser id) to help size those budgets.
+"""
+import multiprocessing
+import os
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Callable, Optional
+
+from .deadlines import ParseCancelled, ParseTimeout, deadline_scope
+from .env import env_float
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+_POLL_INTERVAL_SECONDS = 0.05
+_MB = 1024 * 1024
+_START_METHOD = "forkserver"
+_PRELOAD_MODULES = [f"{__package__}.parsers", f"{__package__}.profiling"]
+
+
+class WorkerCrashed(Exception):
+    """Raised when a parse worker exits without returning a result."""
+
+    code = "PARSE_WORKER_CRASHED"
+
+
+class ParseBudgetExceeded(Exception):
+    """Raised when a parse worker runs past its memory or CPU budget."""
+
+    code = "PARSE_BUDGET_EXCEEDED"
+
+
+class ParseMemoryExceeded(ParseBudgetExceeded):
+    code = "PARSE_MEMORY_EXCEEDED"
+
+
+class ParseCpuExceeded(ParseBudgetExceeded):
+    code = "PARSE_CPU_EXCEEDED"
+
+
+def parse_timeout_seconds() -> float:
+    return env_float("PARSE_TIMEOUT_SECONDS", 60.0)
+
+
+def kill_grace_seconds() -> float:
+    return env_float("PARSE_KILL_GRACE_SECONDS", 5.0)
+
+
+def memory_limit_bytes() -> int:
+    """Address space a worker may add beyond what it inherits; 0 disables the limit."""
+    return max(int(env_float("PARSE_MEMORY_LIMIT_MB", 2048) * _MB), 0)
+
+
+def cpu_limit_seconds() -> int:
+    """CPU seconds a worker may use; 0 disables the limit."""
+    return max(int(env_float("PARSE_CPU_LIMIT_SECONDS", 120)), 0)
+
+
+def isolation_mode() -> str:
+    mode = (os.getenv("PARSE_ISOLATION") or "process").strip().lower()
+    if mode == "process" and _START_METHOD not in multiprocessing.get_all_start_methods():
+        return "inline"
+    return mode
+
+
+def client_disconnected(environ: Optional[dict]) -> bool:
+    """Best-effort check whether the HTTP client behind a WSGI request has gone away."""
+    sock = (environ or {}).get("werkzeug.socket")
+    if sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        if not readable:
+            return False
+        return sock.recv(1, socket.MSG_PEEK) == b""
+    except (BlockingIOError, InterruptedError):
+        return False
+    except (OSError, ValueError):
+        return True
+
+
+def _address_space_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _set_soft_limit(kind: int, soft: int, hard: Optional[int] = None):
+    _, current_hard = resource.getrlimit(kind)
+    if current_hard != resource.RLIM_INFINITY:
+        soft = min(soft, current_hard)
+        hard = current_hard if hard is None else min(hard, current_hard)
+    resource.setrlimit(kind, (soft, current_hard if hard is None else hard))
+
+
+def _raise_cpu_exceeded(signum, frame):
+    raise ParseCpuExceeded(f"Parse used more than {cpu_limit_seconds()}s of CPU time")
+
+
+def _apply_limits() -> bool:
+    """Apply the worker's rlimits; returns whether an address-space limit is active."""
+    if resource is None:
+        return False
+    limited = False
+    memory = memory_limit_bytes()
+    inherited = _address_space_bytes()
+    if memory and inherited is not None:
+        _set_soft_limit(resource.RLIMIT_AS, inherited + memory)
+        limited = True
+    cpu = cpu_limit_seconds()
+    if cpu:
+        # SIGXCPU at the soft limit fails the parse cleanly; the hard limit kills it
+        signal.signal(signal.SIGXCPU, _raise_cpu_exceeded)
+        _set_soft_limit(resource.RLIMIT_CPU, cpu, cpu + max(int(kill_grace_seconds()), 1))
+    return limited
+
+
+def _peak_rss_bytes(usage) -> int:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return int(usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024)
+
+
+def _worker_usage(inherited_rss: int) -> dict:
+    """Peak RSS the worker added beyond what it inherited at fork, and its CPU time."""
+    if resource is None:
+        return {}
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return {
+        "peakRssBytes": max(_peak_rss_bytes(usage) - inherited_rss, 0),
+        "cpuSeconds": round(usage.ru_utime + usage.ru_stime, 3),
+    }
+
+
+def _worker_context():
+    context = multiprocessing.get_context(_START_METHOD)
+    context.set_forkserver_preload(_PRELOAD_MODULES)
+    return context
+
+
+def _child_main(
+    connection, func: Callable, args: tuple, timeout: Optional[float], environ: dict
+):
+    # The forkserver's environment dates from when it started
+    os.environ.clear()
+    os.environ.update(environ)
+    # A forked child starts with the forkserver's resident pages already counted as its peak
+    inherited_rss = _peak_rss_bytes(resource.getrusage(resource.RUSAGE_SELF)) if resource else 0
+    try:
+        memory_limited = _apply_limits()
+        try:
+            with deadline_scope(timeout):
+                result = func(*args)
+        except MemoryError:
+            if not memory_limited:
+                raise
+            raise ParseMemoryExceeded(
+                f"Parse needed more than its {memory_limit_bytes() // _MB} MB memory budget"
+            ) from None
+        connection.send(("ok", result, _worker_usage(inherited_rss)))
+    except BaseException as e:
+        usage = _worker_usage(inherited_rss)
+        try:
+            connection.send(("error", e, usage))
+        except Exception:
+            connection.send(("error", RuntimeError(f"{type(e).__name__}: {e}"), usage))
+    finally:
+        connection.close()
+
+
+class UsageStats:
+    """Peak RSS and CPU time of finished workers, per label."""
+
+    def __init__(self):
+        self._labels: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, label: str, usage: dict, exceeded: bool = False):
+        with self._lock:
+            stats = self._labels.setdefault(
+                label,
+                {
+                    "parses": 0,
+                    "peakRssBytes": 0,
+                    "totalPeakRssBytes": 0,
+                    "cpuSeconds": 0.0,
+                    "budgetExceeded": 0,
+                },
+            )
+            peak = int(usage.get("peakRssBytes") or 0)
+            stats["parses"] += 1
+            stats["peakRssBytes"] = max(stats["peakRssBytes"], peak)
+            stats["totalPeakRssBytes"] += peak
+            stats["lastPeakRssBytes"] = peak
+            stats["cpuSeconds"] = round(stats["cpuSeconds"] + float(usage.get("cpuSeconds") or 0), 3)
+            stats["budgetExceeded"] += 1 if exceeded else 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                label: {
+                    "parses": stats["parses"],
+                    "peakRssMb": round(stats["peakRssBytes"] / _MB, 1),
+                    "meanPeakRssMb": round(stats["totalPeakRssBytes"] / stats["parses"] / _MB, 1),
+                    "lastPeakRssMb": round(stats["lastPeakRssBytes"] / _MB, 1),
+                    "cpuSeconds": stats["cpuSeconds"],
+                    "budgetExceeded": stats["budgetExceeded"],
+                }
+                for label, stats in sorted(self._labels.items())
+            }
+
+
+usage_stats = UsageStats()
+
+
+def run_isolated(
+    func: Callable,
+    args: tuple = (),
+    timeout: Optional[float] = None,
+    grace: Optional[float] = None,
+    is_cancelled: Optional[Callable[[], bool]] = None,
+    label: Optional[str] = None,
+):
+    """Run `func(*args)` under a deadline, in a worker process unless PARSE_ISOLATION=inline.
+
+    `func`, `args` and the result cross the process boundary by pickling, so `func`
+    must be a module-level function.
+
+    The worker checks the deadline cooperatively and normally stops on its own with
+    ParseTimeout. If it is stuck somewhere without checks (e.g. deep inside pdfminer),
+    it is killed once the deadline plus the grace period has passed. `is_cancelled`
+    is polled while waiting so a disconnected client stops the work too. Workers that
+    report back have their peak RSS and CPU time recorded under `label`.
+    """
+    timeout = parse_timeout_seconds() if timeout is None else timeout
+    grace = kill_grace_seconds() if grace is None else grace
+
+    if isolation_mode() != "process":
+        with deadline_scope(timeout):
+            return func(*args)
+
+    context = _worker_context()
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_child_main, args=(sender, func, args, timeout, dict(os.environ)), daemon=True
+    )
+    process.start()
+    sender.close()
+
+    hard_deadline = time.monotonic() + timeout + grace if timeout else None
+    try:
+        while True:
+            if receiver.poll(_POLL_INTERVAL_SECONDS):
+                try:
+                    status, payload, usage = receiver.recv()
+                except EOFError:
+                    process.join(1)
+                    raise WorkerCrashed(
+                        f"Parse worker exited with code {process.exitcode}"
+                    )
+                break
+            if not process.is_alive():
+                if process.exitcode == -signal.SIGXCPU:
+                    raise ParseCpuExceeded("Parse worker was stopped at its CPU time limit")
+                raise WorkerCrashed(f"Parse worker exited with code {process.exitcode}")
+            if hard_deadline is not None and time.monotonic() > hard_deadline:
+                raise ParseTimeout("Parse exceeded its deadline and was killed")
+            if is_cancelled is not None and is_cancelled():
+                raise ParseCancelled("Client disconnected")
+    finally:
+        receiver.close()
+        if process.is_alive():
+            process.kill()
+        process.join()
+
+    if label and usage:
+        usage_stats.record(label, usage, isinstance(payload, ParseBudgetExceeded))
+    if status == "ok":
+        return payload
+    raise payload